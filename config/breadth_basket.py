@@ -5,6 +5,9 @@ Stock basket for market breadth calculation
 Using liquid Nifty 50 stocks
 """
 
+from functools import cache
+from typing import Tuple
+
 # Top 30 Nifty stocks for breadth calculation (liquid & representative)
 BREADTH_BASKET = {
     # IT Sector
@@ -57,14 +60,16 @@ BREADTH_BASKET = {
 }
 
 
-def get_breadth_symbols():
-    """Get list of symbols for breadth calculation"""
-    return list(BREADTH_BASKET.values())
+@cache
+def get_breadth_symbols() -> Tuple[str, ...]:
+    """Get symbols for breadth calculation (resolved once, shared by all callers)"""
+    return tuple(BREADTH_BASKET.values())
 
 
-def get_breadth_symbol_names():
-    """Get list of symbol names"""
-    return list(BREADTH_BASKET.keys())
+@cache
+def get_breadth_symbol_names() -> Tuple[str, ...]:
+    """Get symbol names"""
+    return tuple(BREADTH_BASKET.keys())
 
 
 # Smaller basket for faster calculation (top 15 liquid stocks)
@@ -87,9 +92,10 @@ BREADTH_BASKET_QUICK = {
 }
 
 
-def get_quick_breadth_symbols():
-    """Get smaller basket for quick breadth calculation"""
-    return list(BREADTH_BASKET_QUICK.values())
+@cache
+def get_quick_breadth_symbols() -> Tuple[str, ...]:
+    """Get smaller basket for quick breadth calculation (resolved once, shared by all callers)"""
+    return tuple(BREADTH_BASKET_QUICK.values())
 
 
 if __name__ == "__main__":
@@ -26,6 +26,30 @@ class MarketBreadth(Enum):
     NEUTRAL = "NEUTRAL"  # Near equal
 
 
+# A/D ratio thresholds for breadth classification
+BREADTH_BULL_THRESHOLD = 1.5
+BREADTH_BEAR_THRESHOLD = 1.0 / BREADTH_BULL_THRESHOLD
+
+
+def classify_breadth(ad_ratio: float, bull_threshold: float = BREADTH_BULL_THRESHOLD) -> str:
+    """Classify an advance/decline ratio as BULLISH, BEARISH or NEUTRAL (bearish below 1/bull_threshold)"""
+    if bull_threshold == BREADTH_BULL_THRESHOLD:
+        bear_threshold = BREADTH_BEAR_THRESHOLD
+    else:
+        bear_threshold = 1.0 / bull_threshold
+
+    if ad_ratio >= bull_threshold:
+        return "BULLISH"
+    if ad_ratio <= bear_threshold:
+        return "BEARISH"
+    return "NEUTRAL"
+
+
+def classify_market_breadth(ad_ratio: float, bull_threshold: float = BREADTH_BULL_THRESHOLD) -> MarketBreadth:
+    """classify_breadth as a MarketBreadth member"""
+    return MarketBreadth(classify_breadth(ad_ratio, bull_threshold))
+
+
 class MMFSSetupType(Enum):
     """MMFS trade setup types"""
     GAP_UP_BREAKOUT = "GAP_UP_BREAKOUT"  # Setup 1: Gap-Up + Breadth Confirmation
@@ -34,9 +58,9 @@ class MMFSSetupType(Enum):
     RANGE_BREAKDOWN = "RANGE_BREAKDOWN"  # Setup 4: Opening Range Breakdown
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MMFSStrategyConfig:
-    """5-Minute Market Force Scalping Strategy Configuration"""
+    """5-Minute Market Force Scalping Strategy Configuration (immutable once built)"""
 
     # Portfolio settings
     portfolio_value: float = 100000  # ₹1 lakh
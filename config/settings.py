@@ -70,6 +70,13 @@ class TradingConfig:
     WEBSOCKET_TIMEOUT = int(os.getenv('WEBSOCKET_TIMEOUT', '30'))
     REST_API_FALLBACK = os.getenv('REST_API_FALLBACK', 'true').lower() == 'true'
 
+    # Order placement
+    MAX_CONCURRENT_ORDERS = int(os.getenv('MAX_CONCURRENT_ORDERS', '25'))  # In-flight broker calls
+
+    # Market data API limits (Fyers: 10 requests/second)
+    API_RATE_LIMIT_PER_SECOND = float(os.getenv('API_RATE_LIMIT_PER_SECOND', '10'))
+    DATA_FETCH_CONCURRENCY = int(os.getenv('DATA_FETCH_CONCURRENCY', '10'))  # In-flight data calls
+
 
 # Risk Management Configuration
 class RiskConfig:
@@ -85,6 +92,8 @@ class LogConfig:
     LOG_FILE_PREFIX = 'mmfs'
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+    LOG_MAX_BYTES = 32 * 1024 * 1024
+    LOG_BACKUP_COUNT = 5
 
 
 # Database Configuration (Optional)
@@ -118,6 +118,7 @@ def load_configuration():
 
 async def run_mmfs_strategy():
     """Main function to run the MMFS strategy with enhanced authentication"""
+    token_refresher = None
     try:
         logger.info("=" * 60)
         logger.info("STARTING 5-MINUTE MARKET FORCE SCALPING STRATEGY")
@@ -199,12 +200,23 @@ async def run_mmfs_strategy():
         )
 
         # Initialize the breadth service
-        if not breadth_service.initialize():
+        if not await breadth_service.initialize():
             logger.error(" Failed to initialize market breadth service")
             return
 
         logger.info(" Hybrid market breadth service initialized (REST + WebSocket)")
 
+        # Swap refreshed tokens into the shared client and every socket holding the old one
+        def apply_refreshed_token(new_token: str):
+            fyers_config.access_token = new_token
+            fyers_client.token = new_token
+            fyers_client.header = f"{fyers_config.client_id}:{new_token}"
+            breadth_service.update_access_token(new_token)
+            order_manager.update_access_token()
+            logger.info(" Fyers client and sockets updated with refreshed access token")
+
+        token_refresher = config_dict['auth_manager'].start_token_refresher(apply_refreshed_token)
+
         # Get trading symbols
         # primary_symbols = get_primary_symbols()
         stocks_symbols = get_symbols_by_group("STOCKS")
@@ -232,6 +244,9 @@ async def run_mmfs_strategy():
     except Exception as e:
         logger.error(f" Fatal error in main: {e}")
         logger.exception("Full error details:")
+    finally:
+        if token_refresher is not None:
+            token_refresher.cancel()
 
 
 def show_strategy_help():
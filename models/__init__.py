@@ -6,7 +6,9 @@ from models.mmfs_models import (
     MMFSPosition,
     MMFSTradeResult,
     MMFSStrategyMetrics,
-    MMFSMarketState
+    MMFSMarketState,
+    BreadthSnapshot,
+    BreadthSummary
 )
 
 __all__ = [
@@ -15,5 +17,7 @@ __all__ = [
     'MMFSPosition',
     'MMFSTradeResult',
     'MMFSStrategyMetrics',
-    'MMFSMarketState'
+    'MMFSMarketState',
+    'BreadthSnapshot',
+    'BreadthSummary'
 ]
\ No newline at end of file
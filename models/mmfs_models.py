@@ -6,7 +6,8 @@ Defines all MMFS-specific data structures
 """
 
 import logging
-from dataclasses import dataclass, field
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import Optional, Dict
 
@@ -15,6 +16,10 @@ from config.mmfs_config import GapType, MarketBreadth, MMFSSetupType
 
 logger = logging.getLogger(__name__)
 
+# Enum members bound once so per-tick direction checks are identity tests
+_LONG = SignalType.LONG
+_SHORT = SignalType.SHORT
+
 
 @dataclass
 class PreMarketData:
@@ -120,7 +125,7 @@ class MMFSSignal:
         self.signal_minute = max(0, min(4, minutes_past_915))
 
 
-@dataclass
+@dataclass(slots=True)
 class MMFSPosition:
     """MMFS Trading Position"""
     symbol: str
@@ -145,6 +150,7 @@ class MMFSPosition:
 
     # Position tracking
     current_price: float = 0.0
+    direction: int = field(init=False)  # +1 LONG, -1 SHORT
     current_stop_loss: float = field(init=False)
     highest_price: float = field(init=False)
     lowest_price: float = field(init=False)
@@ -163,11 +169,15 @@ class MMFSPosition:
     moved_to_breakeven: bool = False
     breakeven_time: Optional[datetime] = None
 
+    # Monotonic clock at entry, for elapsed-time checks
+    entry_monotonic: float = field(default_factory=time.monotonic, repr=False)
+
     def __post_init__(self):
         """Initialize position tracking"""
+        self.direction = 1 if self.signal_type is _LONG else -1
         self.current_stop_loss = self.stop_loss
-        self.highest_price = self.entry_price if self.signal_type == SignalType.LONG else 0.0
-        self.lowest_price = self.entry_price if self.signal_type == SignalType.SHORT else float('inf')
+        self.highest_price = self.entry_price if self.signal_type is _LONG else 0.0
+        self.lowest_price = self.entry_price if self.signal_type is _SHORT else float('inf')
 
         # Calculate entry minute
         minutes_past_915 = (self.entry_time.hour - 9) * 60 + (self.entry_time.minute - 15)
@@ -178,7 +188,7 @@ class MMFSPosition:
         self.current_price = current_price
 
         # Update highest/lowest
-        if self.signal_type == SignalType.LONG:
+        if self.signal_type is _LONG:
             self.highest_price = max(self.highest_price, current_price)
             favorable_move = current_price - self.entry_price
             adverse_move = self.entry_price - min(self.lowest_price, current_price)
@@ -192,22 +202,20 @@ class MMFSPosition:
         self.max_adverse_excursion = max(self.max_adverse_excursion, adverse_move)
 
         # Calculate unrealized P&L
-        if self.signal_type == SignalType.LONG:
-            self.unrealized_pnl = (current_price - self.entry_price) * self.quantity
-        else:
-            self.unrealized_pnl = (self.entry_price - current_price) * self.quantity
+        self.unrealized_pnl = self.direction * (current_price - self.entry_price) * self.quantity
 
-    def get_holding_duration(self) -> float:
-        """Get holding duration in minutes"""
-        duration = datetime.now() - self.entry_time
-        return duration.total_seconds() / 60
+    def get_holding_duration(self, now: Optional[float] = None) -> float:
+        """Get holding duration in minutes (now is a time.monotonic() reading)"""
+        if now is None:
+            now = time.monotonic()
+        return (now - self.entry_monotonic) / 60
 
-    def should_exit_by_time(self) -> bool:
+    def should_exit_by_time(self, now: Optional[float] = None) -> bool:
         """Check if position should be exited due to time limit"""
-        return self.get_holding_duration() >= self.max_holding_minutes
+        return self.get_holding_duration(now) >= self.max_holding_minutes
 
 
-@dataclass
+@dataclass(slots=True)
 class MMFSTradeResult:
     """Completed MMFS Trade Result"""
     symbol: str
@@ -244,7 +252,7 @@ class MMFSTradeResult:
         duration = self.exit_time - self.entry_time
         self.holding_duration_seconds = int(duration.total_seconds())
 
-        if self.signal_type == SignalType.LONG:
+        if self.signal_type is _LONG:
             self.gross_pnl = (self.exit_price - self.entry_price) * self.quantity
         else:
             self.gross_pnl = (self.entry_price - self.exit_price) * self.quantity
@@ -488,6 +496,62 @@ class MMFSMarketState:
         self.stop_trading_till_945 = False
 
 
+@dataclass
+class BreadthSnapshot:
+    """Market breadth evaluated once from a single A/D ratio calculation"""
+    ratio: float
+    classification: str
+    score: float  # 0-100
+    is_bullish: bool
+    is_bearish: bool
+    is_neutral: bool
+
+
+@dataclass(slots=True)
+class BreadthSummary:
+    """Market breadth summary returned by the breadth services"""
+    available: bool
+    advances: int = 0
+    declines: int = 0
+    unchanged: int = 0
+    total: int = 0
+    advance_pct: float = 0.0
+    decline_pct: float = 0.0
+    unchanged_pct: float = 0.0
+    ad_ratio: float = 1.0
+    classification: str = "NEUTRAL"
+    is_bullish: bool = False
+    is_bearish: bool = False
+    is_neutral: bool = False
+    timestamp: Optional[str] = None  # ISO format
+    source: str = 'unknown'
+    websocket_active: bool = False
+    basket_size: Optional[int] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def unavailable(cls, error: str) -> "BreadthSummary":
+        """Summary for when no breadth data could be produced"""
+        return cls(available=False, error=error)
+
+    def to_dict(self) -> Dict:
+        """Plain dict view (for JSON serialization)"""
+        return asdict(self)
+
+    # Read-only mapping access for callers written against the former dict summary
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default=None):
+        """dict.get() equivalent"""
+        return getattr(self, key) if key in self.__slots__ else default
+
+
 if __name__ == "__main__":
     print("MMFS Data Models Test")
     print("=" * 60)
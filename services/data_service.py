@@ -5,23 +5,60 @@ Market Data Service
 Handles fetching historical and real-time market data
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import pandas as pd
 
+from config.settings import TradingConfig
+from utils.rate_limiter import AsyncRateLimiter
+
 logger = logging.getLogger(__name__)
 
 
 class DataService:
     """Market data service for MMFS strategy"""
 
+    # Symbols per quotes request (Fyers API limit)
+    QUOTES_BATCH_SIZE = 50
+
     def __init__(self, fyers_client):
         self.fyers = fyers_client
         self.cache = {}
 
+        # Shared across all history/quotes calls to stay within the broker's per-second limit
+        self._rate_limiter = AsyncRateLimiter(TradingConfig.API_RATE_LIMIT_PER_SECOND)
+
+        # Per-symbol tick listeners (async callables taking symbol, quote)
+        self._tick_callbacks: Dict[str, List[Callable]] = {}
+
         logger.info("DataService initialized")
 
+    async def _call_api(self, method: Callable, data: Dict):
+        """Run a blocking Fyers call in a worker thread once the rate limiter admits it"""
+        await self._rate_limiter.acquire()
+        return await asyncio.to_thread(method, data=data)
+
+    def on_tick(self, symbol: str, callback: Callable):
+        """Register an async callback invoked with (symbol, quote) on each new quote"""
+        self._tick_callbacks.setdefault(symbol, []).append(callback)
+
+    def clear_tick_callbacks(self, symbol: Optional[str] = None):
+        """Remove tick callbacks for one symbol, or for all symbols"""
+        if symbol is None:
+            self._tick_callbacks.clear()
+        else:
+            self._tick_callbacks.pop(symbol, None)
+
+    async def publish_tick(self, symbol: str, quote: Dict):
+        """Dispatch a quote to the callbacks registered for its symbol"""
+        for callback in self._tick_callbacks.get(symbol, ()):
+            try:
+                await callback(symbol, quote)
+            except Exception as e:
+                logger.error(f"Error in tick callback for {symbol}: {e}")
+
     async def get_previous_day_data(self, symbol: str) -> Optional[Dict]:
         """
         Get previous day's OHLCV data
@@ -43,7 +80,7 @@ class DataService:
                 "cont_flag": "1"
             }
 
-            response = self.fyers.history(data=data)
+            response = await self._call_api(self.fyers.history, data)
 
             if response.get('s') == 'ok':
                 candles = response.get('candles', [])
@@ -75,6 +112,23 @@ class DataService:
             logger.error(f"Error fetching previous day data for {symbol}: {e}")
             return None
 
+    @staticmethod
+    def _parse_quote(quote: Dict) -> Dict:
+        """Convert one entry of a quotes response into the service's quote dict"""
+        v = quote.get('v', {})
+        return {
+            'symbol': quote.get('n'),
+            'last_price': v.get('lp'),
+            'open': v.get('open_price'),
+            'high': v.get('high_price'),
+            'low': v.get('low_price'),
+            'close': v.get('prev_close_price'),
+            'volume': v.get('volume'),
+            'change': v.get('ch'),
+            'change_pct': v.get('chp'),
+            'timestamp': datetime.now()
+        }
+
     async def get_current_quote(self, symbol: str) -> Optional[Dict]:
         """
         Get current quote for symbol
@@ -84,25 +138,15 @@ class DataService:
         """
         try:
             data = {"symbols": symbol}
-            response = self.fyers.quotes(data=data)
+            response = await self._call_api(self.fyers.quotes, data)
 
             if response.get('s') == 'ok':
                 quotes = response.get('d', [])
                 if quotes:
-                    quote = quotes[0]
+                    result = self._parse_quote(quotes[0])
 
-                    result = {
-                        'symbol': quote.get('n'),
-                        'last_price': quote.get('v', {}).get('lp'),
-                        'open': quote.get('v', {}).get('open_price'),
-                        'high': quote.get('v', {}).get('high_price'),
-                        'low': quote.get('v', {}).get('low_price'),
-                        'close': quote.get('v', {}).get('prev_close_price'),
-                        'volume': quote.get('v', {}).get('volume'),
-                        'change': quote.get('v', {}).get('ch'),
-                        'change_pct': quote.get('v', {}).get('chp'),
-                        'timestamp': datetime.now()
-                    }
+                    if symbol in self._tick_callbacks:
+                        await self.publish_tick(symbol, result)
 
                     return result
 
@@ -113,6 +157,49 @@ class DataService:
             logger.error(f"Error fetching quote for {symbol}: {e}")
             return None
 
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Get current quotes for many symbols, one quotes call per batch
+
+        Returns:
+            Dict of symbol -> quote dict (same shape as get_current_quote)
+        """
+        results = {}
+
+        for start in range(0, len(symbols), self.QUOTES_BATCH_SIZE):
+            batch = symbols[start:start + self.QUOTES_BATCH_SIZE]
+            try:
+                data = {"symbols": ",".join(batch)}
+                response = await self._call_api(self.fyers.quotes, data)
+
+                if response.get('s') == 'ok':
+                    for quote in response.get('d', []):
+                        result = self._parse_quote(quote)
+                        results[result['symbol']] = result
+                else:
+                    logger.error(f"Failed to fetch quotes: {response}")
+
+            except Exception as e:
+                logger.error(f"Error fetching quotes for {len(batch)} symbols: {e}")
+
+        if self._tick_callbacks:
+            for symbol, result in results.items():
+                if symbol in self._tick_callbacks:
+                    await self.publish_tick(symbol, result)
+
+        return results
+
+    async def get_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        Get last traded prices for many symbols, one quotes call per batch
+
+        Returns:
+            Dict of symbol -> last price (symbols without a price are omitted)
+        """
+        quotes = await self.get_quotes(symbols)
+        return {symbol: quote['last_price'] for symbol, quote in quotes.items()
+                if quote['last_price'] is not None}
+
     async def get_intraday_data(self, symbol: str, interval: str = "1") -> Optional[pd.DataFrame]:
         """
         Get intraday data
@@ -138,7 +225,7 @@ class DataService:
                 "cont_flag": "1"
             }
 
-            response = self.fyers.history(data=data)
+            response = await self._call_api(self.fyers.history, data)
 
             if response.get('s') == 'ok':
                 candles = response.get('candles', [])
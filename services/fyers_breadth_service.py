@@ -6,9 +6,12 @@ Calculates advance/decline using actual stock quotes from Fyers
 """
 
 import logging
+import time
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime
-from config.mmfs_config import MarketBreadth
+from config.mmfs_config import MarketBreadth, BREADTH_BULL_THRESHOLD, classify_breadth, classify_market_breadth
+from models.mmfs_models import BreadthSnapshot, BreadthSummary
+from services.market_breadth_service import MarketBreadthService
 from config.breadth_basket import get_breadth_symbols, get_quick_breadth_symbols
 
 logger = logging.getLogger(__name__)
@@ -36,14 +39,22 @@ class FyersMarketBreadthService:
             self.symbols = get_breadth_symbols()
             logger.info(f"Using full basket: {len(self.symbols)} stocks")
 
+        # Basket is fixed for the service lifetime, build the quotes request once
+        self._symbols_frozen = tuple(self.symbols)
+        self._symbols_csv = ",".join(self._symbols_frozen)
+
         # Cache for breadth data
         self.last_breadth_data = None
-        self.last_update_time = None
+        self._last_update_mono: Optional[float] = None
         self.cache_duration_seconds = 60  # Cache for 1 minute
 
         # Track previous close prices
         self.previous_closes: Dict[str, float] = {}
 
+        # Derived results memoized per breadth snapshot (key, value)
+        self._ratio_cache: Tuple[Optional[Tuple], Optional[Tuple[float, str]]] = (None, None)
+        self._summary_cache: Tuple[Optional[Tuple], Optional[BreadthSummary]] = (None, None)
+
     def fetch_advance_decline_data(self) -> Optional[Dict]:
         """
         Fetch current advance/decline data using Fyers API
@@ -69,7 +80,7 @@ class FyersMarketBreadthService:
 
             if breadth_data:
                 self.last_breadth_data = breadth_data
-                self.last_update_time = datetime.now()
+                self._last_update_mono = time.monotonic()
 
                 logger.info(f" Market Breadth: Adv={breadth_data['advances']}, "
                             f"Dec={breadth_data['declines']}, Unch={breadth_data['unchanged']}")
@@ -87,9 +98,7 @@ class FyersMarketBreadthService:
         try:
             # Fyers API supports fetching multiple symbols at once
             # Format: "symbol1,symbol2,symbol3"
-            symbols_str = ",".join(self.symbols)
-
-            data = {"symbols": symbols_str}
+            data = {"symbols": self._symbols_csv}
             response = self.fyers.quotes(data=data)
 
             if response.get('s') != 'ok':
@@ -108,6 +117,9 @@ class FyersMarketBreadthService:
                 quote_data = quote.get('v', {})
 
                 if symbol and quote_data:
+                    if quote_data.get('prev_close_price'):
+                        self.previous_closes[symbol] = quote_data['prev_close_price']
+
                     quotes_dict[symbol] = {
                         'ltp': quote_data.get('lp', 0),  # Last traded price
                         'prev_close': quote_data.get('prev_close_price', 0),
@@ -115,7 +127,7 @@ class FyersMarketBreadthService:
                         'change_pct': quote_data.get('chp', 0)
                     }
 
-            logger.debug(f"Fetched quotes for {len(quotes_dict)} symbols")
+            logger.debug("Fetched quotes for %d symbols", len(quotes_dict))
             return quotes_dict
 
         except Exception as e:
@@ -167,46 +179,38 @@ class FyersMarketBreadthService:
         if not breadth_data:
             return 1.0, "UNKNOWN"
 
-        advances = breadth_data['advances']
-        declines = breadth_data['declines']
+        cache_key = self._snapshot_key(breadth_data)
+        if self._ratio_cache[0] == cache_key:
+            return self._ratio_cache[1]
 
-        # Avoid division by zero
-        if declines == 0:
-            declines = 1
-        if advances == 0:
-            advances = 1
+        ad_ratio = max(breadth_data['advances'], 1) / max(breadth_data['declines'], 1)
+        classification = classify_breadth(ad_ratio)
 
-        ad_ratio = advances / declines
-
-        # Classify
-        if ad_ratio >= 1.5:
-            classification = "BULLISH"
-        elif ad_ratio <= (1 / 1.5):
-            classification = "BEARISH"
-        else:
-            classification = "NEUTRAL"
-
-        logger.debug(f"Breadth Ratio: {ad_ratio:.2f} ({classification})")
+        logger.debug("Breadth Ratio: %.2f (%s)", ad_ratio, classification)
+        self._ratio_cache = (cache_key, (ad_ratio, classification))
         return ad_ratio, classification
 
-    def get_market_breadth(self, breadth_ratio_threshold: float = 1.5) -> MarketBreadth:
+    def get_market_breadth(self, breadth_ratio_threshold: float = BREADTH_BULL_THRESHOLD) -> MarketBreadth:
         """Get market breadth classification"""
         ad_ratio, _ = self.calculate_breadth_ratio()
+        return classify_market_breadth(ad_ratio, breadth_ratio_threshold)
 
-        if ad_ratio >= breadth_ratio_threshold:
-            return MarketBreadth.BULLISH
-        elif ad_ratio <= (1 / breadth_ratio_threshold):
-            return MarketBreadth.BEARISH
-        else:
-            return MarketBreadth.NEUTRAL
+    def get_breadth_snapshot(self) -> BreadthSnapshot:
+        """Evaluate ratio, classification, score and flags from one ratio calculation"""
+        return MarketBreadthService._snapshot(*self.calculate_breadth_ratio())
 
-    def get_breadth_summary(self) -> Dict:
+    def get_breadth_summary(self) -> BreadthSummary:
         """Get comprehensive market breadth summary"""
         try:
             breadth_data = self.fetch_advance_decline_data()
 
             if not breadth_data:
-                return {'available': False, 'error': 'Failed to fetch breadth data'}
+                return BreadthSummary.unavailable('Failed to fetch breadth data')
+
+            # Summary only changes when a new snapshot is fetched
+            cache_key = self._snapshot_key(breadth_data)
+            if self._summary_cache[0] == cache_key:
+                return self._summary_cache[1]
 
             ad_ratio, classification = self.calculate_breadth_ratio(breadth_data)
 
@@ -215,62 +219,62 @@ class FyersMarketBreadthService:
             dec_pct = (breadth_data['declines'] / total * 100) if total > 0 else 0
             unch_pct = (breadth_data['unchanged'] / total * 100) if total > 0 else 0
 
-            return {
-                'available': True,
-                'advances': breadth_data['advances'],
-                'declines': breadth_data['declines'],
-                'unchanged': breadth_data['unchanged'],
-                'total': total,
-                'advance_pct': round(adv_pct, 1),
-                'decline_pct': round(dec_pct, 1),
-                'unchanged_pct': round(unch_pct, 1),
-                'ad_ratio': round(ad_ratio, 2),
-                'classification': classification,
-                'is_bullish': ad_ratio >= 1.5,
-                'is_bearish': ad_ratio <= (1 / 1.5),
-                'is_neutral': (1 / 1.5) < ad_ratio < 1.5,
-                'timestamp': breadth_data['timestamp'].isoformat(),
-                'source': 'fyers_api',
-                'basket_size': breadth_data.get('basket_size', len(self.symbols))
-            }
+            summary = BreadthSummary(
+                available=True,
+                advances=breadth_data['advances'],
+                declines=breadth_data['declines'],
+                unchanged=breadth_data['unchanged'],
+                total=total,
+                advance_pct=adv_pct,
+                decline_pct=dec_pct,
+                unchanged_pct=unch_pct,
+                ad_ratio=ad_ratio,
+                classification=classification,
+                is_bullish=classification == "BULLISH",
+                is_bearish=classification == "BEARISH",
+                is_neutral=classification == "NEUTRAL",
+                timestamp=breadth_data['timestamp'].isoformat(),
+                source='fyers_api',
+                basket_size=breadth_data.get('basket_size', len(self.symbols))
+            )
+
+            self._summary_cache = (cache_key, summary)
+            return summary
 
         except Exception as e:
             logger.error(f"Error generating breadth summary: {e}")
-            return {'available': False, 'error': str(e)}
+            return BreadthSummary.unavailable(str(e))
 
-    def is_breadth_bullish(self, min_ratio: float = 1.5) -> bool:
+    def is_breadth_bullish(self, min_ratio: float = BREADTH_BULL_THRESHOLD) -> bool:
         """Check if market breadth is bullish"""
         ad_ratio, _ = self.calculate_breadth_ratio()
         return ad_ratio >= min_ratio
 
-    def is_breadth_bearish(self, min_ratio: float = 1.5) -> bool:
+    def is_breadth_bearish(self, min_ratio: float = BREADTH_BULL_THRESHOLD) -> bool:
         """Check if market breadth is bearish"""
         ad_ratio, _ = self.calculate_breadth_ratio()
-        return ad_ratio <= (1 / min_ratio)
+        return ad_ratio <= 1.0 / min_ratio
 
     def get_breadth_strength_score(self) -> float:
         """Calculate strength score (0-100)"""
         try:
             ad_ratio, _ = self.calculate_breadth_ratio()
-
-            if ad_ratio >= 1.0:
-                score = 50 + min((ad_ratio - 1.0) / 2.0, 1.0) * 50
-            else:
-                score = (ad_ratio - 0.33) / 0.67 * 50
-
-            return max(0, min(100, score))
+            return MarketBreadthService._strength_score(ad_ratio)
 
         except Exception as e:
             logger.error(f"Error calculating strength score: {e}")
             return 50
 
+    def _snapshot_key(self, breadth_data: Dict) -> Tuple:
+        """Key identifying a breadth snapshot for memoized derived results"""
+        return breadth_data['timestamp'], breadth_data.get('basket_size', len(self.symbols))
+
     def _is_cache_valid(self) -> bool:
         """Check if cached data is still valid"""
-        if not self.last_breadth_data or not self.last_update_time:
+        if not self.last_breadth_data or self._last_update_mono is None:
             return False
 
-        elapsed = (datetime.now() - self.last_update_time).total_seconds()
-        return elapsed < self.cache_duration_seconds
+        return time.monotonic() - self._last_update_mono < self.cache_duration_seconds
 
     def _get_fallback_breadth_data(self) -> Optional[Dict]:
         """Get fallback breadth data"""
@@ -6,20 +6,42 @@ Real-time market breadth tracking using Fyers WebSocket
 
 import logging
 import asyncio
+import random
 import threading
-from typing import Dict, Optional, Callable
-from datetime import datetime
+import time
+import numpy as np
+from typing import Dict, Optional, Callable, Any
+from datetime import datetime, timedelta
 from fyers_apiv3.FyersWebsocket import data_ws
 from config.breadth_basket import get_quick_breadth_symbols, get_breadth_symbols
-from config.mmfs_config import MarketBreadth
+from config.mmfs_config import MarketBreadth, BREADTH_BULL_THRESHOLD, classify_breadth, classify_market_breadth
+from config.settings import TradingConfig
+from services.market_breadth_service import MarketBreadthService
+from models.mmfs_models import BreadthSnapshot
+from utils.json_utils import json_loads
+from utils.helpers import get_current_ist_time, is_market_open
 
 logger = logging.getLogger(__name__)
 
+# Move (as a fraction of previous close) beyond which a stock counts as advancing/declining
+_CHANGE_THRESHOLD = 0.001  # 0.1%
+
 
 class FyersWebSocketBreadthTracker:
     """Track market breadth in real-time using WebSocket"""
 
-    def __init__(self, access_token: str, client_id: str, use_quick_basket: bool = True):
+    # Ticks buffered between the SDK thread and the event loop before dropping
+    TICK_QUEUE_MAXSIZE = 10000
+
+    # Fyers V3 limit on symbols subscribed over one data socket
+    MAX_SYMBOLS_PER_CONNECTION = 5000
+
+    # A connected feed with no ticks for this long (during market hours) is treated as stalled
+    STALE_FEED_SECONDS = 15
+
+    def __init__(self, access_token: str, client_id: str, use_quick_basket: bool = True,
+                 ltp_only: bool = True, fyers_client=None,
+                 update_event: Optional[threading.Event] = None, batch_size: int = 64):
         """
         Initialize WebSocket breadth tracker
 
@@ -27,9 +49,16 @@ class FyersWebSocketBreadthTracker:
             access_token: Fyers access token
             client_id: Fyers client ID
             use_quick_basket: Use 15-stock basket (True) or 30-stock basket (False)
+            ltp_only: Subscribe in lite mode (LTP only) instead of full quote payloads
+            fyers_client: Fyers API client used to load previous closes on start
+            update_event: Event set after every breadth recalculation (created if not given)
+            batch_size: Max queued ticks applied per breadth recalculation on the event loop
         """
+        self.client_id = client_id
         self.access_token = f"{client_id}:{access_token}"
         self.use_quick_basket = use_quick_basket
+        self.ltp_only = ltp_only
+        self.fyers_client = fyers_client
 
         # Get appropriate symbol basket
         if use_quick_basket:
@@ -39,30 +68,85 @@ class FyersWebSocketBreadthTracker:
             self.symbols = get_breadth_symbols()
             logger.info(f"WebSocket tracker using full basket: {len(self.symbols)} stocks")
 
-        # Track current prices and previous closes
-        self.current_prices: Dict[str, float] = {}
-        self.previous_closes: Dict[str, float] = {}
+        # FyersDataSocket is a process-wide singleton, so the basket must fit one connection
+        if len(self.symbols) > self.MAX_SYMBOLS_PER_CONNECTION:
+            logger.warning(f"Basket of {len(self.symbols)} symbols exceeds the per-connection limit, "
+                           f"tracking first {self.MAX_SYMBOLS_PER_CONNECTION}")
+            self.symbols = self.symbols[:self.MAX_SYMBOLS_PER_CONNECTION]
+
+        # Prices are stored as arrays indexed by basket position (symbol -> index)
+        n_symbols = len(self.symbols)
+        self._previous_closes_expiry: Optional[datetime] = None  # IST, next market close
+        self._symbol_idx: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._last_price = np.zeros(n_symbols)
+        self._prev_close = np.zeros(n_symbols)
+        self._change = np.zeros(n_symbols)
+        self._has_cur = np.zeros(n_symbols, dtype=bool)
+        self._valid_mask = np.zeros(n_symbols, dtype=bool)  # has current price and usable prev close
+        self._n_cur = 0   # symbols with a current price
+        self._n_prev = 0  # symbols with a usable previous close
 
         # Breadth metrics
         self.advances = 0
         self.declines = 0
         self.unchanged = 0
-        self.last_update = None
+        self.last_update_mono: Optional[float] = None  # time.monotonic() of last recalculation
 
         # WebSocket instance
         self.ws = None
         self.is_running = False
         self.is_connected = False
+        self._connected_event = threading.Event()  # set while the socket is open
+
+        # Event loop integration: SDK callbacks are marshalled onto the loop that
+        # called start(), which then owns all mutable breadth state
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tick_queue: Optional[asyncio.Queue] = None
+        self._processor_task: Optional[asyncio.Task] = None
+        self._ws_task: Optional[asyncio.Future] = None
+        self._stop_evt: Optional[asyncio.Event] = None
 
-        # Thread for WebSocket
+        # Fallback thread when no event loop is running (standalone scripts)
         self.ws_thread = None
 
+        # Reconnects are driven here (exponential backoff with full jitter), not by the SDK
+        self._reconnect_attempt = 0
+        self._max_backoff = 120
+        self._reconnect_timer: Optional[threading.Timer] = None
+        self._closing_socket = False  # set while the tracker itself closes the socket
+
+        # Stalled-feed watchdog
+        self._last_tick_ts = time.monotonic()
+        self._watchdog_stop = threading.Event()
+        self._watchdog_thread: Optional[threading.Thread] = None
+
         # Callbacks
         self.on_breadth_update_callback: Optional[Callable] = None
+        self.update_event = update_event if update_event is not None else threading.Event()
+        self.batch_size = max(1, batch_size)
 
         # Statistics
         self.message_count = 0
         self.error_count = 0
+        self.dropped_count = 0
+        self._last_logged_count = 0
+
+        # Breadth view mutated in place on every tick and handed to the update
+        # callback as-is (read-only for callers); get_breadth_data() copies it
+        self._breadth_view: Dict[str, Any] = {
+            'advances': 0,
+            'declines': 0,
+            'unchanged': 0,
+            'total': 0,
+            'ad_ratio': 1.0,
+            'timestamp': None,
+            'last_update_mono': None,
+            'source': 'websocket',
+            'is_connected': False,
+            'message_count': 0,
+            'error_count': 0,
+            'symbols_tracked': 0
+        }
 
     def set_previous_closes(self, closes: Dict[str, float]):
         """
@@ -71,40 +155,181 @@ class FyersWebSocketBreadthTracker:
         Args:
             closes: Dict mapping symbol to previous close price
         """
-        self.previous_closes = closes
+        self._prev_close.fill(0.0)
+        for symbol, prev_close in closes.items():
+            idx = self._symbol_idx.get(symbol)
+            if idx is not None and prev_close:
+                self._prev_close[idx] = prev_close
+        np.logical_and(self._has_cur, self._prev_close > 0, out=self._valid_mask)
+        self._n_prev = int(np.count_nonzero(self._prev_close))
+
+        # Previous closes hold for the trading day, until the next market close
+        now = get_current_ist_time()
+        market_close = now.replace(hour=TradingConfig.MARKET_CLOSE_HOUR, minute=TradingConfig.MARKET_CLOSE_MINUTE,
+                                   second=0, microsecond=0)
+        if now >= market_close:
+            market_close += timedelta(days=1)
+        self._previous_closes_expiry = market_close
+
         logger.info(f"Set previous closes for {len(closes)} symbols")
 
+    @property
+    def previous_closes(self) -> Dict[str, float]:
+        """Previous closes by symbol (built from the price arrays)"""
+        return {symbol: float(self._prev_close[i])
+                for symbol, i in self._symbol_idx.items() if self._prev_close[i] > 0}
+
+    @property
+    def current_prices(self) -> Dict[str, float]:
+        """Latest traded prices by symbol (built from the price arrays)"""
+        return {symbol: float(self._last_price[i]) for symbol, i in self._symbol_idx.items() if self._has_cur[i]}
+
+    def _previous_closes_valid(self) -> bool:
+        """Check if previous closes are loaded for the current trading day"""
+        return self._n_prev > 0 and self._previous_closes_expiry is not None \
+            and get_current_ist_time() < self._previous_closes_expiry
+
+    def load_previous_closes(self) -> bool:
+        """Fetch previous closes for the basket in one quotes call"""
+        try:
+            response = self.fyers_client.quotes(data={"symbols": ",".join(self.symbols)})
+
+            if response.get('s') != 'ok':
+                logger.error(f"Quotes API error: {response.get('message', 'Unknown error')}")
+                return False
+
+            closes = {}
+            for quote in response.get('d', []):
+                symbol = quote.get('n')
+                prev_close = quote.get('v', {}).get('prev_close_price', 0)
+                if symbol and prev_close:
+                    closes[symbol] = prev_close
+
+            if not closes:
+                logger.warning("No previous closes returned")
+                return False
+
+            self.set_previous_closes(closes)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading previous closes: {e}")
+            return False
+
+    def wait_connected(self, timeout: Optional[float] = None) -> bool:
+        """Block until the socket is open; False if it did not open within timeout"""
+        return self._connected_event.wait(timeout)
+
+    def _on_ws_message(self, message):
+        """SDK thread callback: hand the tick to the event loop, or process inline without one"""
+        self._last_tick_ts = time.monotonic()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._enqueue_tick, message)
+        else:
+            self.on_message(message)
+
+    def _enqueue_tick(self, message):
+        """Queue a tick on the loop thread, dropping the oldest one when the consumer falls behind"""
+        try:
+            self._tick_queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self._tick_queue.get_nowait()
+            self._tick_queue.put_nowait(message)
+            self.dropped_count += 1
+
+    async def _process_ticks(self):
+        """Consume queued ticks on the event loop until stop is signalled, one breadth update per batch"""
+        tick_queue = self._tick_queue
+        batch_size = self.batch_size
+
+        while not self._stop_evt.is_set():
+            message = await tick_queue.get()
+
+            # Drain whatever else is already queued (up to batch_size) before recalculating
+            updated = False
+            n = 1
+            while message is not None:
+                updated |= self._apply_tick(message)
+                if n >= batch_size or tick_queue.empty():
+                    break
+                message = tick_queue.get_nowait()
+                n += 1
+
+            if updated:
+                self._publish_update()
+
+    def _signal_stop(self):
+        """Set the stop event and wake the tick processor (loop thread)"""
+        self._stop_evt.set()
+        self._enqueue_tick(None)
+
     def on_message(self, message):
         """Handle WebSocket messages"""
+        if self._apply_tick(message):
+            self._publish_update()
+
+    def _apply_tick(self, message) -> bool:
+        """Store one tick's price without recalculating; True if it carried a usable LTP"""
         try:
             self.message_count += 1
 
+            # The SDK normally delivers decoded dicts; raw JSON frames are parsed here
+            if isinstance(message, (bytes, bytearray, str)):
+                message = json_loads(message)
+
             if isinstance(message, dict):
                 symbol = message.get('symbol')
                 ltp = message.get('ltp')
 
-                if not ltp:
-                    # Try alternative field names
+                if not ltp and not self.ltp_only:
+                    # Full mode payloads may use alternative field names
                     ltp = message.get('last_price') or message.get('v', {}).get('lp')
 
                 if symbol and ltp:
+                    # A live tick confirms the connection, reset the backoff
+                    if self._reconnect_attempt:
+                        self._reconnect_attempt = 0
+
                     # Update current price
-                    self.current_prices[symbol] = ltp
+                    idx = self._symbol_idx.get(symbol)
+                    if idx is not None:
+                        self._last_price[idx] = ltp
+                        if not self._has_cur[idx]:
+                            self._has_cur[idx] = True
+                            self._valid_mask[idx] = self._prev_close[idx] > 0
+                            self._n_cur += 1
+                    return True
 
-                    # Recalculate breadth
-                    self._recalculate_breadth()
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"Error processing WebSocket message: {e}")
 
-                    # Call callback if registered
-                    if self.on_breadth_update_callback:
-                        try:
-                            self.on_breadth_update_callback(self.get_breadth_data())
-                        except Exception as e:
-                            logger.error(f"Error in breadth update callback: {e}")
+        return False
 
-                    # Log periodically
-                    if self.message_count % 100 == 0:
-                        logger.debug(f"Processed {self.message_count} messages. "
-                                     f"Current breadth: Adv={self.advances}, Dec={self.declines}")
+    def _publish_update(self):
+        """Recalculate breadth once for the applied ticks and notify waiters and the callback"""
+        try:
+            # Recalculate breadth and wake anyone waiting for an update
+            self._recalculate_breadth()
+            self.update_event.set()
+
+            # Call callback if registered
+            if self.on_breadth_update_callback:
+                try:
+                    view = self._breadth_view
+                    view['message_count'] = self.message_count
+                    view['error_count'] = self.error_count
+                    view['is_connected'] = self.is_connected
+                    self.on_breadth_update_callback(view)
+                except Exception as e:
+                    logger.error(f"Error in breadth update callback: {e}")
+
+            # Log periodically
+            if self.message_count - self._last_logged_count >= 100:
+                self._last_logged_count = self.message_count
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Processed %d messages. Current breadth: Adv=%d, Dec=%d",
+                                 self.message_count, self.advances, self.declines)
 
         except Exception as e:
             self.error_count += 1
@@ -115,55 +340,156 @@ class FyersWebSocketBreadthTracker:
         self.error_count += 1
         logger.error(f"WebSocket error: {error}")
 
-    def on_close(self):
+    def on_close(self, message=None):
         """Handle WebSocket close"""
         logger.info("WebSocket connection closed")
-        self.is_running = False
         self.is_connected = False
+        self._connected_event.clear()
+
+        # Unexpected close while running: reconnect after a backoff delay
+        if self.is_running and not self._closing_socket:
+            self._schedule_reconnect()
+
+    def _get_reconnect_delay(self) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self._max_backoff, 2 ** self._reconnect_attempt))
+
+    def _schedule_reconnect(self):
+        """Schedule a reconnect attempt on a timer thread"""
+        if self._reconnect_timer is not None and self._reconnect_timer.is_alive():
+            return
+
+        delay = self._get_reconnect_delay()
+        self._reconnect_attempt += 1
+        logger.info(f"Reconnecting WebSocket in {delay:.1f}s (attempt {self._reconnect_attempt})")
+
+        self._reconnect_timer = threading.Timer(delay, self._reconnect)
+        self._reconnect_timer.daemon = True
+        self._reconnect_timer.start()
+
+    def _build_socket(self):
+        """Configure the SDK data socket with the current access token"""
+        # FyersDataSocket is a singleton; constructing it again re-initializes it
+        return data_ws.FyersDataSocket(
+            access_token=self.access_token,
+            log_path="",
+            litemode=self.ltp_only,
+            write_to_file=False,
+            reconnect=False,
+            on_connect=self.on_connect,
+            on_close=self.on_close,
+            on_error=self.on_error,
+            on_message=self._on_ws_message
+        )
+
+    def update_access_token(self, access_token: str):
+        """Use a refreshed access token; a running socket reconnects with it"""
+        self.access_token = f"{self.client_id}:{access_token}"
+        if self.is_running:
+            threading.Thread(target=self._reconnect, daemon=True).start()
+
+    def _close_socket(self):
+        """Close the socket on purpose; on_close fires during the call and must not schedule a reconnect"""
+        self._closing_socket = True
+        try:
+            self.ws.close_connection()
+        finally:
+            self._closing_socket = False
+
+    def _reconnect(self):
+        """Tear down the dropped socket and connect again"""
+        if not self.is_running:
+            return
+
+        try:
+            # The SDK only opens a new socket once the old one is released
+            self._close_socket()
+            self.ws = self._build_socket()
+            self.ws.connect()
+        except Exception as e:
+            logger.error(f"WebSocket reconnect failed: {e}")
+            self._schedule_reconnect()
 
     def on_connect(self):
         """Handle WebSocket connection"""
         logger.info(" WebSocket breadth tracker connected successfully")
         self.is_connected = True
+        self._connected_event.set()
+        self._last_tick_ts = time.monotonic()
+
+        # Subscribe on every (re)connect, the SDK drops subscriptions on reconnect
+        logger.info(f"Subscribing to {len(self.symbols)} symbols...")
+        self.ws.subscribe(symbols=self.symbols, data_type="SymbolUpdate")
+
+    @property
+    def is_stale(self) -> bool:
+        """True when the socket is up but no ticks arrived recently during market hours"""
+        return self.is_connected \
+            and time.monotonic() - self._last_tick_ts > self.STALE_FEED_SECONDS \
+            and is_market_open()[0]
+
+    def _watch_feed(self):
+        """Check once a second for a stalled feed and force a reconnect"""
+        while not self._watchdog_stop.wait(1.0):
+            if not self.is_running or not self.is_stale:
+                continue
+
+            logger.warning(f"No ticks for {self.STALE_FEED_SECONDS}s, reconnecting stalled WebSocket")
+            self._last_tick_ts = time.monotonic()
+            try:
+                self._close_socket()
+            except Exception as e:
+                logger.error(f"Error closing stalled WebSocket: {e}")
+            self.is_connected = False
+            self._connected_event.clear()
+            self._schedule_reconnect()
 
     def _recalculate_breadth(self):
         """Recalculate advance/decline based on current prices"""
-        if not self.previous_closes:
+        if not self._n_prev:
             logger.debug("No previous closes available yet")
             return
 
-        advances = 0
-        declines = 0
-        unchanged = 0
-
-        for symbol in self.symbols:
-            if symbol not in self.current_prices or symbol not in self.previous_closes:
-                continue
-
-            current = self.current_prices[symbol]
-            prev_close = self.previous_closes[symbol]
-
-            if prev_close == 0:
-                continue
-
-            change_pct = ((current - prev_close) / prev_close) * 100
+        # Fractional change for symbols with both prices; others are masked out
+        valid = self._valid_mask
+        change = self._change
+        np.subtract(self._last_price, self._prev_close, out=change)
+        np.divide(change, self._prev_close, out=change, where=valid)
 
-            # Classify with 0.1% threshold
-            if change_pct > 0.1:
-                advances += 1
-            elif change_pct < -0.1:
-                declines += 1
-            else:
-                unchanged += 1
+        advances = int(np.count_nonzero((change > _CHANGE_THRESHOLD) & valid))
+        declines = int(np.count_nonzero((change < -_CHANGE_THRESHOLD) & valid))
+        unchanged = int(np.count_nonzero(valid)) - advances - declines
 
         # Update breadth metrics
         self.advances = advances
         self.declines = declines
         self.unchanged = unchanged
-        self.last_update = datetime.now()
+        self.last_update_mono = time.monotonic()
+
+        view = self._breadth_view
+        view['advances'] = advances
+        view['declines'] = declines
+        view['unchanged'] = unchanged
+        view['total'] = advances + declines + unchanged
+        view['ad_ratio'] = max(advances, 1) / max(declines, 1)
+        view['last_update_mono'] = self.last_update_mono
+        view['symbols_tracked'] = self._n_cur
+
+    @property
+    def last_update(self) -> Optional[datetime]:
+        """Wall-clock time of the last recalculation, derived on demand"""
+        if self.last_update_mono is None:
+            return None
+        return datetime.now() - timedelta(seconds=time.monotonic() - self.last_update_mono)
+
+    def start(self, load_previous_closes: bool = True):
+        """
+        Start WebSocket breadth tracking on the running event loop (or a background thread)
 
-    def start(self):
-        """Start WebSocket breadth tracking in background thread"""
+        Args:
+            load_previous_closes: Fetch previous closes first if none are set; pass False
+                when the caller supplies them via set_previous_closes() after starting
+        """
         try:
             if self.is_running:
                 logger.warning("WebSocket tracker already running")
@@ -171,103 +497,143 @@ class FyersWebSocketBreadthTracker:
 
             logger.info(" Starting WebSocket breadth tracker...")
 
+            # Breadth needs previous closes from the first tick on
+            if load_previous_closes and not self._previous_closes_valid() and self.fyers_client is not None:
+                self.load_previous_closes()
+
             # Initialize WebSocket
-            self.ws = data_ws.FyersDataSocket(
-                access_token=self.access_token,
-                log_path="",
-                litemode=False,
-                write_to_file=False,
-                reconnect=True,
-                on_connect=self.on_connect,
-                on_close=self.on_close,
-                on_error=self.on_error,
-                on_message=self.on_message
-            )
-
-            # Subscribe to symbols
-            logger.info(f"Subscribing to {len(self.symbols)} symbols...")
-            self.ws.subscribe(symbols=self.symbols, data_type="SymbolUpdate")
+            self.ws = self._build_socket()
 
-            self.is_running = True
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._loop = None
 
-            # Start WebSocket in background thread
-            self.ws_thread = threading.Thread(target=self._run_websocket, daemon=True)
-            self.ws_thread.start()
+            self.is_running = True
 
-            logger.info(" WebSocket breadth tracker started in background")
+            self._watchdog_stop.clear()
+            self._watchdog_thread = threading.Thread(target=self._watch_feed, daemon=True)
+            self._watchdog_thread.start()
+
+            if self._loop is not None:
+                # Ticks are processed by a task on the loop; the blocking SDK connect runs off-loop
+                # and is submitted right away, so the handshake starts even if the caller blocks
+                self._tick_queue = asyncio.Queue(maxsize=self.TICK_QUEUE_MAXSIZE)
+                self._stop_evt = asyncio.Event()
+                self._processor_task = self._loop.create_task(self._process_ticks())
+                self._ws_task = self._loop.run_in_executor(None, self._run_websocket)
+                logger.info(" WebSocket breadth tracker started on event loop")
+            else:
+                self.ws_thread = threading.Thread(target=self._run_websocket, daemon=True)
+                self.ws_thread.start()
+                logger.info(" WebSocket breadth tracker started in background")
 
         except Exception as e:
             logger.error(f" Error starting WebSocket tracker: {e}")
             self.is_running = False
 
     def _run_websocket(self):
-        """Run WebSocket in thread"""
+        """Open the WebSocket connection (blocking, runs off the event loop)"""
         try:
-            self.ws.keep_running()
+            self.ws.connect()
         except Exception as e:
             logger.error(f"WebSocket thread error: {e}")
             self.is_running = False
 
-    def get_breadth_data(self) -> Dict:
-        """Get current breadth data"""
-        total = self.advances + self.declines + self.unchanged
-        ad_ratio = self.advances / max(self.declines, 1) if self.declines > 0 else 1.0
+    def get_breadth_data(self, snapshot: bool = True) -> Dict:
+        """
+        Get current breadth data
 
-        return {
-            'advances': self.advances,
-            'declines': self.declines,
-            'unchanged': self.unchanged,
-            'total': total,
-            'ad_ratio': ad_ratio,
-            'timestamp': self.last_update,
-            'source': 'websocket',
-            'is_connected': self.is_connected,
-            'message_count': self.message_count,
-            'error_count': self.error_count,
-            'symbols_tracked': len(self.current_prices)
-        }
+        Args:
+            snapshot: Return a copy (True) or the live, read-only view (False)
+        """
+        view = self._breadth_view
+        view['timestamp'] = self.last_update
+        view['is_connected'] = self.is_connected
+        view['message_count'] = self.message_count
+        view['error_count'] = self.error_count
+
+        return dict(view) if snapshot else view
 
-    def get_market_breadth(self, threshold: float = 1.5) -> MarketBreadth:
+    def get_market_breadth(self, threshold: float = BREADTH_BULL_THRESHOLD) -> MarketBreadth:
         """Get market breadth classification"""
-        ad_ratio = self.advances / max(self.declines, 1) if self.declines > 0 else 1.0
+        ad_ratio = max(self.advances, 1) / max(self.declines, 1)
+        return classify_market_breadth(ad_ratio, threshold)
 
-        if ad_ratio >= threshold:
-            return MarketBreadth.BULLISH
-        elif ad_ratio <= (1 / threshold):
-            return MarketBreadth.BEARISH
-        else:
-            return MarketBreadth.NEUTRAL
+    def get_breadth_snapshot(self) -> BreadthSnapshot:
+        """Ratio, classification, score and flags from the current counts"""
+        ad_ratio = max(self.advances, 1) / max(self.declines, 1)
+        return MarketBreadthService._snapshot(ad_ratio, classify_breadth(ad_ratio))
 
     def get_breadth_strength_score(self) -> float:
         """Calculate strength score (0-100)"""
-        ad_ratio = self.advances / max(self.declines, 1) if self.declines > 0 else 1.0
-
-        if ad_ratio >= 1.0:
-            score = 50 + min((ad_ratio - 1.0) / 2.0, 1.0) * 50
-        else:
-            score = (ad_ratio - 0.33) / 0.67 * 50
-
-        return max(0, min(100, score))
+        ad_ratio = max(self.advances, 1) / max(self.declines, 1)
+        return MarketBreadthService._strength_score(ad_ratio)
 
     def register_callback(self, callback: Callable):
         """Register callback for breadth updates"""
         self.on_breadth_update_callback = callback
         logger.info("Breadth update callback registered")
 
+    async def aclose(self):
+        """Stop WebSocket tracker from the event loop it was started on"""
+        logger.info("Stopping WebSocket breadth tracker...")
+        self.is_running = False
+
+        if self._stop_evt is not None:
+            self._signal_stop()
+
+        if self._reconnect_timer is not None:
+            self._reconnect_timer.cancel()
+        self._watchdog_stop.set()
+
+        for task in (self._processor_task, self._ws_task):
+            if task is None:
+                continue
+            try:
+                await asyncio.wait_for(task, timeout=5)
+            except asyncio.TimeoutError:
+                logger.warning("WebSocket tracker task did not finish in time, cancelled")
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Error stopping WebSocket tracker task: {e}")
+        self._processor_task = None
+        self._ws_task = None
+
+        if self.ws:
+            try:
+                await asyncio.to_thread(self.ws.close_connection)
+            except Exception as e:
+                logger.error(f"Error closing WebSocket: {e}")
+
+        self.is_connected = False
+        self._connected_event.clear()
+        logger.info("WebSocket breadth tracker stopped")
+
     def stop(self):
-        """Stop WebSocket tracker"""
+        """Stop WebSocket tracker (blocking, for callers without an event loop)"""
         logger.info("Stopping WebSocket breadth tracker...")
         self.is_running = False
 
+        if self._stop_evt is not None:
+            self._loop.call_soon_threadsafe(self._signal_stop)
+
+        if self._reconnect_timer is not None:
+            self._reconnect_timer.cancel()
+        self._watchdog_stop.set()
+
         if self.ws:
             try:
-                self.ws.close()
-            except:
-                pass
+                self.ws.close_connection()
+            except Exception as e:
+                logger.error(f"Error closing WebSocket: {e}")
 
         if self.ws_thread and self.ws_thread.is_alive():
             self.ws_thread.join(timeout=2)
 
+        self.is_connected = False
+        self._connected_event.clear()
         logger.info("WebSocket breadth tracker stopped")
 
     def get_statistics(self) -> Dict:
@@ -277,7 +643,9 @@ class FyersWebSocketBreadthTracker:
             'is_connected': self.is_connected,
             'message_count': self.message_count,
             'error_count': self.error_count,
-            'symbols_tracked': len(self.current_prices),
+            'dropped_count': self.dropped_count,
+            'reconnect_attempt': self._reconnect_attempt,
+            'symbols_tracked': self._n_cur,
             'total_symbols': len(self.symbols),
             'last_update': self.last_update,
             'current_breadth': {
@@ -5,12 +5,15 @@ Hybrid Market Breadth Service
 Uses REST API for initialization and WebSocket for real-time updates
 """
 
+import asyncio
 import logging
-from typing import Dict, Optional
-from datetime import datetime
+import threading
+import time
+from typing import Dict, Optional, Tuple
 from services.fyers_breadth_service import FyersMarketBreadthService
-from services.fyers_breadth_websocket import FyersWebSocketBreadthTracker
-from config.mmfs_config import MarketBreadth
+from config.mmfs_config import MarketBreadth, BREADTH_BULL_THRESHOLD, classify_breadth
+from models.mmfs_models import BreadthSnapshot, BreadthSummary
+from utils.json_utils import json_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +25,19 @@ class HybridMarketBreadthService:
     - Uses WebSocket for real-time updates
     """
 
+    __slots__ = (
+        'fyers_client', 'enable_websocket', 'rest_service',
+        'access_token', 'client_id', 'use_quick_basket', '_ws_tracker',
+        'use_websocket_data', 'update_event', 'ws_batch_size',
+        '_summary_cache', '_summary_cache_key', '_summary_cache_ts', '_summary_json_bytes'
+    )
+
+    # "Short" cache policy for summaries polled by dashboards/strategy loops
+    SUMMARY_CACHE_TTL_SECONDS = 1.0
+
     def __init__(self, fyers_client, access_token: str, client_id: str,
-                 use_quick_basket: bool = True, enable_websocket: bool = True):
+                 use_quick_basket: bool = True, enable_websocket: bool = True,
+                 ws_batch_size: int = 64):
         """
         Initialize hybrid breadth service
 
@@ -33,6 +47,7 @@ class HybridMarketBreadthService:
             client_id: Client ID for WebSocket
             use_quick_basket: Use 15-stock basket (faster)
             enable_websocket: Enable real-time WebSocket updates
+            ws_batch_size: Max WebSocket ticks applied per breadth recalculation
         """
         self.fyers_client = fyers_client
         self.enable_websocket = enable_websocket
@@ -43,65 +58,92 @@ class HybridMarketBreadthService:
             use_quick_basket=use_quick_basket
         )
 
-        # Initialize WebSocket tracker
-        self.ws_tracker = None
-        if enable_websocket:
-            self.ws_tracker = FyersWebSocketBreadthTracker(
-                access_token,
-                client_id,
-                use_quick_basket=use_quick_basket
-            )
+        # WebSocket tracker is built on first use (see ws_tracker)
+        self.access_token = access_token
+        self.client_id = client_id
+        self.use_quick_basket = use_quick_basket
+        self.ws_batch_size = ws_batch_size
+        self._ws_tracker = None
 
         self.use_websocket_data = False
+
+        # Set by the WebSocket tracker on every breadth recalculation
+        self.update_event = threading.Event()
+
+        # Last summary, reused while counts are unchanged and served stale on errors
+        self._summary_cache: Optional[BreadthSummary] = None
+        self._summary_cache_key: Optional[Tuple[int, int, int]] = None
+        self._summary_cache_ts = 0.0
+        self._summary_json_bytes: Optional[bytes] = None  # serialized _summary_cache, built on demand
+
         logger.info(f"Hybrid breadth service initialized (WebSocket: {'enabled' if enable_websocket else 'disabled'})")
 
-    def initialize(self) -> bool:
+    @property
+    def ws_tracker(self):
+        """WebSocket tracker, created on first access (None when WebSocket is disabled)"""
+        if self._ws_tracker is None and self.enable_websocket:
+            from services.fyers_breadth_websocket import FyersWebSocketBreadthTracker
+
+            self._ws_tracker = FyersWebSocketBreadthTracker(
+                self.access_token,
+                self.client_id,
+                use_quick_basket=self.use_quick_basket,
+                fyers_client=self.fyers_client,
+                update_event=self.update_event,
+                batch_size=self.ws_batch_size
+            )
+        return self._ws_tracker
+
+    async def initialize(self) -> bool:
         """
         Initialize the service
         - Fetch initial data via REST
         - Set previous closes for WebSocket
         - Start WebSocket tracker
+
+        Blocking broker calls and the connection wait run in worker threads,
+        so the event loop keeps running while this awaits.
         """
         try:
             logger.info("Initializing hybrid breadth service...")
 
-            # Step 1: Fetch initial breadth data via REST
-            initial_data = self.rest_service.fetch_advance_decline_data()
-            if not initial_data:
-                logger.error("Failed to fetch initial breadth data")
-                return False
+            start_websocket = self.enable_websocket
 
-            logger.info(f" Initial breadth: Adv={initial_data['advances']}, Dec={initial_data['declines']}")
+            # Step 1: Fetch initial breadth data via REST while the WebSocket handshake runs.
+            # The tracker starts on the loop thread so it attaches to the running event loop.
+            f_initial = asyncio.ensure_future(asyncio.to_thread(self.rest_service.fetch_advance_decline_data))
 
-            # Step 2: Get previous closes for WebSocket
-            if self.enable_websocket and self.ws_tracker:
+            if start_websocket:
                 logger.info("Setting up WebSocket tracker...")
+                # First ws_tracker access builds the tracker, only reached with WebSocket enabled.
+                # Previous closes come from the initial quotes call below
+                self.ws_tracker.start(load_previous_closes=False)
 
-                # Fetch quotes to get previous close prices
-                quotes = self.rest_service._fetch_basket_quotes()
-                if quotes:
-                    prev_closes = {
-                        symbol: data.get('prev_close', 0)
-                        for symbol, data in quotes.items()
-                    }
+            initial_data = await f_initial
 
-                    self.ws_tracker.set_previous_closes(prev_closes)
-                    logger.info(f"Set previous closes for {len(prev_closes)} symbols")
+            if not initial_data:
+                logger.error("Failed to fetch initial breadth data")
+                if start_websocket:
+                    await self.ws_tracker.aclose()
+                return False
 
-                    # Start WebSocket
-                    self.ws_tracker.start()
+            logger.info(f" Initial breadth: Adv={initial_data['advances']}, Dec={initial_data['declines']}")
 
-                    # Wait a moment for connection
-                    import time
-                    time.sleep(2)
+            # Step 2: Hand previous closes to the WebSocket tracker
+            if start_websocket:
+                # Reuse previous closes from the initial quotes call;
+                # fall back to the tracker's own quotes call if none were captured
+                if self.rest_service.previous_closes:
+                    self.ws_tracker.set_previous_closes(dict(self.rest_service.previous_closes))
+                else:
+                    await asyncio.to_thread(self.ws_tracker.load_previous_closes)
 
-                    if self.ws_tracker.is_connected:
-                        logger.info(" WebSocket tracker connected and running")
-                        self.use_websocket_data = True
-                    else:
-                        logger.warning(" WebSocket connection delayed, using REST fallback")
+                # Wait for the connection, returns as soon as the socket opens
+                if await asyncio.to_thread(self.ws_tracker.wait_connected, 5):
+                    logger.info(" WebSocket tracker connected and running")
+                    self.use_websocket_data = True
                 else:
-                    logger.warning("Could not fetch quotes for WebSocket initialization")
+                    logger.warning(" WebSocket connection delayed, using REST fallback")
 
             return True
 
@@ -115,13 +157,13 @@ class HybridMarketBreadthService:
         Uses WebSocket data if available, otherwise REST API
         """
         try:
-            # Try WebSocket first if enabled and connected
-            if self.use_websocket_data and self.ws_tracker and self.ws_tracker.is_connected:
+            # Try WebSocket first if enabled, connected and ticking
+            if self._websocket_usable():
                 ws_data = self.ws_tracker.get_breadth_data()
 
                 # Only use WebSocket data if we have recent updates
-                if ws_data.get('last_update'):
-                    elapsed = (datetime.now() - ws_data['last_update']).total_seconds()
+                if ws_data.get('last_update_mono') is not None:
+                    elapsed = time.monotonic() - ws_data['last_update_mono']
 
                     if elapsed < 60:  # Data less than 1 minute old
                         logger.debug("Using WebSocket breadth data (real-time)")
@@ -137,19 +179,50 @@ class HybridMarketBreadthService:
             logger.error(f"Error fetching breadth data: {e}")
             return None
 
-    def get_market_breadth(self, threshold: float = 1.5) -> MarketBreadth:
+    def wait_for_update(self, timeout: float = 2.0) -> bool:
+        """
+        Block until the WebSocket feed updates breadth or the timeout expires
+
+        Returns:
+            True if an update arrived, False on timeout
+        """
+        updated = self.update_event.wait(timeout)
+        self.update_event.clear()
+        return updated
+
+    def _websocket_usable(self) -> bool:
+        """WebSocket data is used only while connected and the feed is not stalled"""
+        return self.use_websocket_data and self._ws_tracker is not None \
+            and self.ws_tracker.is_connected and not self.ws_tracker.is_stale
+
+    def get_market_breadth(self, threshold: float = BREADTH_BULL_THRESHOLD) -> MarketBreadth:
         """Get market breadth classification"""
-        if self.use_websocket_data and self.ws_tracker and self.ws_tracker.is_connected:
+        if self._websocket_usable():
             return self.ws_tracker.get_market_breadth(threshold)
         else:
             return self.rest_service.get_market_breadth(threshold)
 
-    def get_breadth_summary(self) -> Dict:
+    def get_breadth_snapshot(self) -> BreadthSnapshot:
+        """Get ratio, classification, score and flags from one ratio calculation"""
+        if self._websocket_usable():
+            return self.ws_tracker.get_breadth_snapshot()
+        else:
+            return self.rest_service.get_breadth_snapshot()
+
+    def get_breadth_summary(self) -> BreadthSummary:
         """Get comprehensive breadth summary"""
         try:
             data = self.fetch_advance_decline_data()
             if not data:
-                return {'available': False, 'error': 'No breadth data'}
+                if self._summary_cache is not None:
+                    logger.warning("No breadth data, serving last summary")
+                    return self._summary_cache
+                return BreadthSummary.unavailable('No breadth data')
+
+            key = (data['advances'], data['declines'], data['unchanged'])
+            now = time.monotonic()
+            if key == self._summary_cache_key and now - self._summary_cache_ts < self.SUMMARY_CACHE_TTL_SECONDS:
+                return self._summary_cache
 
             total = data['total']
             # Calculate ad_ratio if not present (REST API doesn't include it)
@@ -160,40 +233,51 @@ class HybridMarketBreadthService:
                 advances = data['advances']
                 ad_ratio = advances / max(declines, 1) if declines > 0 else 1.0
 
-            # Classify
-            if ad_ratio >= 1.5:
-                classification = "BULLISH"
-            elif ad_ratio <= (1 / 1.5):
-                classification = "BEARISH"
-            else:
-                classification = "NEUTRAL"
-
-            return {
-                'available': True,
-                'advances': data['advances'],
-                'declines': data['declines'],
-                'unchanged': data['unchanged'],
-                'total': total,
-                'advance_pct': round((data['advances'] / total * 100) if total > 0 else 0, 1),
-                'decline_pct': round((data['declines'] / total * 100) if total > 0 else 0, 1),
-                'unchanged_pct': round((data['unchanged'] / total * 100) if total > 0 else 0, 1),
-                'ad_ratio': round(ad_ratio, 2),
-                'classification': classification,
-                'is_bullish': ad_ratio >= 1.5,
-                'is_bearish': ad_ratio <= (1 / 1.5),
-                'is_neutral': (1 / 1.5) < ad_ratio < 1.5,
-                'timestamp': data['timestamp'].isoformat() if data.get('timestamp') else None,
-                'source': data.get('source', 'unknown'),
-                'websocket_active': self.use_websocket_data and self.ws_tracker.is_connected if self.ws_tracker else False
-            }
+            classification = classify_breadth(ad_ratio)
+
+            summary = BreadthSummary(
+                available=True,
+                advances=data['advances'],
+                declines=data['declines'],
+                unchanged=data['unchanged'],
+                total=total,
+                advance_pct=(data['advances'] / total * 100) if total > 0 else 0,
+                decline_pct=(data['declines'] / total * 100) if total > 0 else 0,
+                unchanged_pct=(data['unchanged'] / total * 100) if total > 0 else 0,
+                ad_ratio=ad_ratio,
+                classification=classification,
+                is_bullish=classification == "BULLISH",
+                is_bearish=classification == "BEARISH",
+                is_neutral=classification == "NEUTRAL",
+                timestamp=data['timestamp'].isoformat() if data.get('timestamp') else None,
+                source=data.get('source', 'unknown'),
+                websocket_active=self.use_websocket_data and self._ws_tracker.is_connected if self._ws_tracker else False
+            )
+
+            self._summary_cache = summary
+            self._summary_cache_key = key
+            self._summary_cache_ts = now
+            self._summary_json_bytes = None
+            return summary
 
         except Exception as e:
             logger.error(f"Error generating breadth summary: {e}")
-            return {'available': False, 'error': str(e)}
+            if self._summary_cache is not None:
+                return self._summary_cache
+            return BreadthSummary.unavailable(str(e))
+
+    def get_breadth_summary_bytes(self) -> bytes:
+        """Get the breadth summary as JSON bytes, serialized on first request per cached summary"""
+        summary = self.get_breadth_summary()
+        if summary is not self._summary_cache:
+            return json_dumps(summary.to_dict())
+        if self._summary_json_bytes is None:
+            self._summary_json_bytes = json_dumps(summary.to_dict())
+        return self._summary_json_bytes
 
     def get_breadth_strength_score(self) -> float:
         """Get breadth strength score (0-100)"""
-        if self.use_websocket_data and self.ws_tracker and self.ws_tracker.is_connected:
+        if self._websocket_usable():
             return self.ws_tracker.get_breadth_strength_score()
         else:
             return self.rest_service.get_breadth_strength_score()
@@ -202,11 +286,24 @@ class HybridMarketBreadthService:
         """Calculate breadth ratio"""
         return self.rest_service.calculate_breadth_ratio(breadth_data)
 
+    def update_access_token(self, access_token: str):
+        """Hand a refreshed access token to the WebSocket tracker (REST calls share the Fyers client)"""
+        self.access_token = access_token
+        if self._ws_tracker is not None:
+            self._ws_tracker.update_access_token(access_token)
+
     def stop(self):
         """Stop the service"""
         logger.info("Stopping hybrid breadth service...")
-        if self.ws_tracker:
-            self.ws_tracker.stop()
+        if self._ws_tracker:
+            self._ws_tracker.stop()
+        logger.info("Hybrid breadth service stopped")
+
+    async def aclose(self):
+        """Stop the service from the event loop"""
+        logger.info("Stopping hybrid breadth service...")
+        if self._ws_tracker:
+            await self._ws_tracker.aclose()
         logger.info("Hybrid breadth service stopped")
 
     def get_statistics(self) -> Dict:
@@ -216,8 +313,9 @@ class HybridMarketBreadthService:
             'using_websocket_data': self.use_websocket_data
         }
 
-        if self.ws_tracker:
-            stats['websocket_stats'] = self.ws_tracker.get_statistics()
+        if self._ws_tracker:
+            stats['websocket_stats'] = self._ws_tracker.get_statistics()
+            stats['websocket_reconnect_attempt'] = stats['websocket_stats']['reconnect_attempt']
 
         return stats
 
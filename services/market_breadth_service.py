@@ -7,18 +7,64 @@ Fetches advance/decline data and calculates market breadth indicators
 
 import requests
 import logging
-from typing import Dict, Optional, Tuple
+import time
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Optional, Tuple, Union
+from dataclasses import replace
 from datetime import datetime
 from enum import Enum
 
-from config.mmfs_config import MarketBreadth
+try:
+    import httpx
+    import h2  # noqa: F401 - required for httpx HTTP/2 support
+except ImportError:
+    httpx = None
+
+from config.mmfs_config import (
+    MarketBreadth, BREADTH_BULL_THRESHOLD, BREADTH_BEAR_THRESHOLD, classify_breadth, classify_market_breadth
+)
+from models.mmfs_models import BreadthSnapshot, BreadthSummary
+from utils.json_utils import json_loads
 
 logger = logging.getLogger(__name__)
 
+# Transport errors from whichever HTTP client is in use
+_NETWORK_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+# Sentinel for rows without a change field
+_MISSING = object()
+
 
 class MarketBreadthService:
     """Service to fetch and analyze market breadth data"""
 
+    __slots__ = (
+        'nse_base_url', 'market_status_url', 'advance_decline_url', 'headers',
+        'last_breadth_data', 'last_update_time', 'last_update_mono', 'cache_duration_seconds',
+        '_session', '_cookies_refreshed_at',
+        '_summary_cache', '_summary_cache_key', '_summary_cache_ts',
+        '_last_ratio', '_last_ratio_mono', '_cached_score'
+    )
+
+    # A/D ratio classification thresholds
+    BULL_THRESHOLD = BREADTH_BULL_THRESHOLD
+    BEAR_THRESHOLD = BREADTH_BEAR_THRESHOLD
+
+    # Strength score slopes: ratio 0.33 -> 0, 1.0 -> 50, 3.0 -> 100
+    _SLOPE_HI = 25.0         # 50 points over ratio 1.0-3.0
+    _SLOPE_LO = 50.0 / 0.67  # 50 points over ratio 0.33-1.0
+
+    # "Short" cache policy for summaries polled by dashboards/strategy loops
+    SUMMARY_CACHE_TTL_SECONDS = 1.0
+
+    # Re-visit the NSE home page for fresh cookies after this long
+    COOKIE_REFRESH_SECONDS = 600
+
+    # Back-to-back ratio lookups within this window reuse the previous result
+    RATIO_REUSE_SECONDS = 0.1
+
     def __init__(self):
         # NSE API endpoints
         self.nse_base_url = "https://www.nseindia.com"
@@ -37,20 +83,56 @@ class MarketBreadthService:
         # Cache for breadth data
         self.last_breadth_data = None
         self.last_update_time = None
+        self.last_update_mono: Optional[float] = None
         self.cache_duration_seconds = 60  # Cache for 1 minute
 
-    def get_session(self) -> requests.Session:
-        """Create a session with proper headers for NSE"""
-        session = requests.Session()
-        session.headers.update(self.headers)
+        # Persistent HTTP session (created on first use)
+        self._session: Optional[Union[requests.Session, "httpx.Client"]] = None
+        self._cookies_refreshed_at = 0.0
+
+        # Last summary, reused while counts are unchanged and served stale on errors
+        self._summary_cache: Optional[BreadthSummary] = None
+        self._summary_cache_key: Optional[Tuple[int, int, int]] = None
+        self._summary_cache_ts = 0.0
+
+        # Last calculate_breadth_ratio() result for the fetched data
+        self._last_ratio: Optional[Tuple[float, str]] = None
+        self._last_ratio_mono = 0.0
+
+        # Strength score for the current fetched data (cleared on each new fetch)
+        self._cached_score: Optional[float] = None
+
+    def get_session(self) -> Union[requests.Session, "httpx.Client"]:
+        """Get the pooled NSE session, refreshing cookies when missing or old"""
+        if self._session is None and httpx is not None:
+            # HTTP/2: the cookie visit and API calls share one multiplexed TLS connection
+            self._session = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                timeout=15,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5)
+            )
+        elif self._session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                  max_retries=Retry(total=2, backoff_factor=0.3))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
 
         # Get cookies by visiting the main page first
-        try:
-            session.get(self.nse_base_url, timeout=10)
-        except:
-            pass
+        now = time.monotonic()
+        if not self._session.cookies or now - self._cookies_refreshed_at > self.COOKIE_REFRESH_SECONDS:
+            try:
+                self._session.get(self.nse_base_url, timeout=10)
+                self._cookies_refreshed_at = now
+            except _NETWORK_ERRORS as e:
+                logger.debug("NSE cookie refresh failed: %s", e)
 
-        return session
+        return self._session
 
     def fetch_advance_decline_data(self) -> Optional[Dict]:
         """
@@ -71,12 +153,14 @@ class MarketBreadthService:
             response = session.get(self.advance_decline_url, timeout=15)
 
             if response.status_code == 200:
-                data = response.json()
+                data = json_loads(response.content)
                 breadth_data = self._parse_nse_breadth_data(data)
 
                 if breadth_data:
                     self.last_breadth_data = breadth_data
                     self.last_update_time = datetime.now()
+                    self.last_update_mono = time.monotonic()
+                    self._cached_score = None
 
                     logger.info(f"Market Breadth Updated: Adv={breadth_data['advances']}, "
                                 f"Dec={breadth_data['declines']}, Unch={breadth_data['unchanged']}")
@@ -86,7 +170,7 @@ class MarketBreadthService:
             logger.warning(f"Failed to fetch breadth data: Status {response.status_code}")
             return self._get_fallback_breadth_data()
 
-        except requests.exceptions.RequestException as e:
+        except _NETWORK_ERRORS as e:
             logger.error(f"Network error fetching breadth data: {e}")
             return self._get_fallback_breadth_data()
         except Exception as e:
@@ -106,16 +190,27 @@ class MarketBreadthService:
                 unchanged = 0
 
                 if isinstance(market_data, list):
-                    for item in market_data:
-                        if 'change' in item or 'pChange' in item:
-                            change = item.get('pChange', item.get('change', 0))
-
-                            if change > 0:
-                                advances += 1
-                            elif change < 0:
-                                declines += 1
-                            else:
-                                unchanged += 1
+                    # Rows normally share one layout: read the first row's change field
+                    # directly once the whole payload is confirmed to use it
+                    key = 'pChange' if market_data and 'pChange' in market_data[0] else 'change'
+                    if key == 'pChange':
+                        uniform = all('pChange' in item for item in market_data)
+                    else:
+                        uniform = all('change' in item and 'pChange' not in item for item in market_data)
+
+                    if uniform:
+                        changes = np.fromiter((item[key] or 0 for item in market_data),
+                                              dtype=np.float64, count=len(market_data))
+                    else:
+                        # Mixed layouts: per-row fallback, pChange first (rows with neither are skipped)
+                        changes = np.fromiter(
+                            (change or 0 for item in market_data
+                             if (change := item.get('pChange', item.get('change', _MISSING))) is not _MISSING),
+                            dtype=np.float64
+                        )
+                    # One pass: sign -1/0/1 shifted to bins 0/1/2
+                    counts = np.bincount((np.sign(changes) + 1).astype(np.intp), minlength=3)
+                    declines, unchanged, advances = int(counts[0]), int(counts[1]), int(counts[2])
 
                 if advances > 0 or declines > 0:
                     return {
@@ -134,11 +229,10 @@ class MarketBreadthService:
 
     def _is_cache_valid(self) -> bool:
         """Check if cached breadth data is still valid"""
-        if not self.last_breadth_data or not self.last_update_time:
+        if not self.last_breadth_data or self.last_update_mono is None:
             return False
 
-        elapsed = (datetime.now() - self.last_update_time).total_seconds()
-        return elapsed < self.cache_duration_seconds
+        return time.monotonic() - self.last_update_mono < self.cache_duration_seconds
 
     def _get_fallback_breadth_data(self) -> Optional[Dict]:
         """
@@ -168,7 +262,11 @@ class MarketBreadthService:
         Returns:
             Tuple of (ratio, classification_str)
         """
-        if not breadth_data:
+        reuse = not breadth_data
+        if reuse:
+            now = time.monotonic()
+            if self._last_ratio is not None and now - self._last_ratio_mono < self.RATIO_REUSE_SECONDS:
+                return self._last_ratio
             breadth_data = self.fetch_advance_decline_data()
 
         if not breadth_data:
@@ -187,18 +285,36 @@ class MarketBreadthService:
         ad_ratio = advances / declines
 
         # Classify market breadth
-        if ad_ratio >= 1.5:
-            classification = "BULLISH"
-        elif ad_ratio <= (1 / 1.5):
-            classification = "BEARISH"
-        else:
-            classification = "NEUTRAL"
+        classification = classify_breadth(ad_ratio)
 
         logger.debug(f"Breadth Ratio: {ad_ratio:.2f} ({classification})")
 
+        if reuse:
+            self._last_ratio = (ad_ratio, classification)
+            self._last_ratio_mono = now
+
         return ad_ratio, classification
 
-    def get_market_breadth(self, breadth_ratio_threshold: float = 1.5) -> MarketBreadth:
+    def get_breadth_snapshot(self) -> BreadthSnapshot:
+        """Evaluate ratio, classification, score and flags from one ratio calculation"""
+        return self._snapshot(*self.calculate_breadth_ratio())
+
+    @classmethod
+    def _snapshot(cls, ad_ratio: float, classification: str) -> BreadthSnapshot:
+        """Build a snapshot from an already calculated ratio (shared by the other breadth services)"""
+        is_bullish = ad_ratio >= cls.BULL_THRESHOLD
+        is_bearish = ad_ratio <= cls.BEAR_THRESHOLD
+
+        return BreadthSnapshot(
+            ratio=ad_ratio,
+            classification=classification,
+            score=cls._strength_score(ad_ratio),
+            is_bullish=is_bullish,
+            is_bearish=is_bearish,
+            is_neutral=not (is_bullish or is_bearish)
+        )
+
+    def get_market_breadth(self, breadth_ratio_threshold: float = BULL_THRESHOLD) -> MarketBreadth:
         """
         Get market breadth classification using configured threshold
 
@@ -209,35 +325,37 @@ class MarketBreadthService:
             MarketBreadth enum value
         """
         ad_ratio, _ = self.calculate_breadth_ratio()
+        return classify_market_breadth(ad_ratio, breadth_ratio_threshold)
 
-        if ad_ratio >= breadth_ratio_threshold:
-            return MarketBreadth.BULLISH
-        elif ad_ratio <= (1 / breadth_ratio_threshold):
-            return MarketBreadth.BEARISH
-        else:
-            return MarketBreadth.NEUTRAL
-
-    def is_breadth_bullish(self, min_ratio: float = 1.5) -> bool:
+    def is_breadth_bullish(self, min_ratio: float = BULL_THRESHOLD) -> bool:
         """Check if market breadth is bullish"""
         ad_ratio, _ = self.calculate_breadth_ratio()
         return ad_ratio >= min_ratio
 
-    def is_breadth_bearish(self, min_ratio: float = 1.5) -> bool:
+    def is_breadth_bearish(self, min_ratio: float = BULL_THRESHOLD) -> bool:
         """Check if market breadth is bearish"""
         ad_ratio, _ = self.calculate_breadth_ratio()
         return ad_ratio <= (1 / min_ratio)
 
-    def is_breadth_neutral(self, ratio_range: float = 1.5) -> bool:
+    def is_breadth_neutral(self, ratio_range: float = BULL_THRESHOLD) -> bool:
         """Check if market breadth is neutral"""
         ad_ratio, _ = self.calculate_breadth_ratio()
         return (1 / ratio_range) < ad_ratio < ratio_range
 
-    def get_breadth_summary(self) -> Dict:
+    def get_breadth_summary(self) -> BreadthSummary:
         """Get comprehensive breadth summary"""
         try:
             data = self.fetch_advance_decline_data()
             if not data:
-                return {'available': False, 'error': 'No breadth data'}
+                if self._summary_cache is not None:
+                    logger.warning("No breadth data, serving last summary")
+                    return self._summary_cache
+                return BreadthSummary.unavailable('No breadth data')
+
+            key = (data['advances'], data['declines'], data['unchanged'])
+            now = time.monotonic()
+            if key == self._summary_cache_key and now - self._summary_cache_ts < self.SUMMARY_CACHE_TTL_SECONDS:
+                return self._summary_cache
 
             total = data['total']
 
@@ -250,36 +368,37 @@ class MarketBreadthService:
                 declines = data['declines']
                 ad_ratio = advances / max(declines, 1) if declines > 0 else 1.0
 
-            # Classify
-            if ad_ratio >= 1.5:
-                classification = "BULLISH"
-            elif ad_ratio <= (1 / 1.5):
-                classification = "BEARISH"
-            else:
-                classification = "NEUTRAL"
-
-            return {
-                'available': True,
-                'advances': data['advances'],
-                'declines': data['declines'],
-                'unchanged': data['unchanged'],
-                'total': total,
-                'advance_pct': round((data['advances'] / total * 100) if total > 0 else 0, 1),
-                'decline_pct': round((data['declines'] / total * 100) if total > 0 else 0, 1),
-                'unchanged_pct': round((data['unchanged'] / total * 100) if total > 0 else 0, 1),
-                'ad_ratio': round(ad_ratio, 2),
-                'classification': classification,
-                'is_bullish': ad_ratio >= 1.5,
-                'is_bearish': ad_ratio <= (1 / 1.5),
-                'is_neutral': (1 / 1.5) < ad_ratio < 1.5,
-                'timestamp': data['timestamp'].isoformat() if data.get('timestamp') else None,
-                'source': data.get('source', 'unknown'),
-                'websocket_active': self.use_websocket_data and self.ws_tracker.is_connected if self.ws_tracker else False
-            }
+            classification = classify_breadth(ad_ratio)
+
+            summary = BreadthSummary(
+                available=True,
+                advances=data['advances'],
+                declines=data['declines'],
+                unchanged=data['unchanged'],
+                total=total,
+                advance_pct=(data['advances'] / total * 100) if total > 0 else 0,
+                decline_pct=(data['declines'] / total * 100) if total > 0 else 0,
+                unchanged_pct=(data['unchanged'] / total * 100) if total > 0 else 0,
+                ad_ratio=ad_ratio,
+                classification=classification,
+                is_bullish=classification == "BULLISH",
+                is_bearish=classification == "BEARISH",
+                is_neutral=classification == "NEUTRAL",
+                timestamp=data['timestamp'].isoformat() if data.get('timestamp') else None,
+                source=data.get('source', 'unknown'),
+                websocket_active=False
+            )
+
+            self._summary_cache = summary
+            self._summary_cache_key = key
+            self._summary_cache_ts = now
+            return summary
 
         except Exception as e:
             logger.error(f"Error generating breadth summary: {e}")
-            return {'available': False, 'error': str(e)}
+            if self._summary_cache is not None:
+                return self._summary_cache
+            return BreadthSummary.unavailable(str(e))
 
     def validate_breadth_for_setup(self, setup_type: str, required_breadth: MarketBreadth) -> bool:
         """
@@ -314,35 +433,43 @@ class MarketBreadthService:
             Score from 0 (very bearish) to 100 (very bullish)
         """
         try:
-            ad_ratio, _ = self.calculate_breadth_ratio()
-
-            # Normalize ratio to 0-100 scale
-            # Ratio of 3.0 = 100 (very bullish)
-            # Ratio of 0.33 = 0 (very bearish)
-            # Ratio of 1.0 = 50 (neutral)
+            # Memoized until the next A/D fetch replaces the data
+            if self._cached_score is not None and self._is_cache_valid():
+                return self._cached_score
 
-            if ad_ratio >= 1.0:
-                # Bullish side: map 1.0-3.0 to 50-100
-                score = 50 + min((ad_ratio - 1.0) / 2.0, 1.0) * 50
-            else:
-                # Bearish side: map 0.33-1.0 to 0-50
-                score = (ad_ratio - 0.33) / 0.67 * 50
-
-            return max(0, min(100, score))
+            ad_ratio, _ = self.calculate_breadth_ratio()
+            self._cached_score = self._strength_score(ad_ratio)
+            return self._cached_score
 
         except Exception as e:
             logger.error(f"Error calculating breadth strength score: {e}")
             return 50  # Neutral on error
 
+    @classmethod
+    def _strength_score(cls, ad_ratio: float) -> float:
+        """Map an A/D ratio to a 0-100 strength score"""
+        # Normalize ratio to 0-100 scale
+        # Ratio of 3.0 = 100 (very bullish)
+        # Ratio of 0.33 = 0 (very bearish)
+        # Ratio of 1.0 = 50 (neutral)
+
+        # Bullish side maps 1.0-3.0 to 50-100, bearish side 0.33-1.0 to 0-50
+        score = 50.0 + (ad_ratio - 1.0) * cls._SLOPE_HI if ad_ratio >= 1.0 \
+            else (ad_ratio - 0.33) * cls._SLOPE_LO
+        return 0.0 if score < 0.0 else (100.0 if score > 100.0 else score)
+
 
 # Simulated market breadth for testing/development
 class SimulatedMarketBreadthService(MarketBreadthService):
     """Simulated market breadth service for testing"""
 
+    __slots__ = ('simulated_advances', 'simulated_declines', '_cached_summary')
+
     def __init__(self, simulated_advances: int = 120, simulated_declines: int = 80):
         super().__init__()
         self.simulated_advances = simulated_advances
         self.simulated_declines = simulated_declines
+        self._cached_summary = self._build_simulated_summary()
 
     def fetch_advance_decline_data(self) -> Optional[Dict]:
         """Return simulated breadth data"""
@@ -362,6 +489,42 @@ class SimulatedMarketBreadthService(MarketBreadthService):
         self.simulated_advances = advances
         self.simulated_declines = declines
         self.last_breadth_data = None  # Clear cache
+        self._cached_score = None
+        self._cached_summary = self._build_simulated_summary()
+
+    def _build_simulated_summary(self) -> BreadthSummary:
+        """Precompute the summary for the current simulated values"""
+        advances = self.simulated_advances
+        declines = self.simulated_declines
+        unchanged = 50
+        total = advances + declines + unchanged
+
+        # Same values the fetch-based get_breadth_summary() produces for this data
+        ad_ratio = advances / declines if declines > 0 else 1.0
+        classification = classify_breadth(ad_ratio)
+
+        return BreadthSummary(
+            available=True,
+            advances=advances,
+            declines=declines,
+            unchanged=unchanged,
+            total=total,
+            advance_pct=advances / total * 100,
+            decline_pct=declines / total * 100,
+            unchanged_pct=unchanged / total * 100,
+            ad_ratio=ad_ratio,
+            classification=classification,
+            is_bullish=classification == "BULLISH",
+            is_bearish=classification == "BEARISH",
+            is_neutral=classification == "NEUTRAL",
+            timestamp=None,
+            source='unknown',
+            websocket_active=False
+        )
+
+    def get_breadth_summary(self) -> BreadthSummary:
+        """Return a copy of the precomputed simulated summary with a fresh timestamp"""
+        return replace(self._cached_summary, timestamp=datetime.now().isoformat())
 
 
 if __name__ == "__main__":
@@ -375,30 +538,30 @@ if __name__ == "__main__":
     bullish_service = SimulatedMarketBreadthService(simulated_advances=180, simulated_declines=80)
     summary = bullish_service.get_breadth_summary()
     print(f"\nBullish Scenario:")
-    print(f"  Advances: {summary['advances']} ({summary['advance_pct']}%)")
-    print(f"  Declines: {summary['declines']} ({summary['decline_pct']}%)")
-    print(f"  A/D Ratio: {summary['ad_ratio']}")
-    print(f"  Classification: {summary['classification']}")
+    print(f"  Advances: {summary.advances} ({summary.advance_pct:.1f}%)")
+    print(f"  Declines: {summary.declines} ({summary.decline_pct:.1f}%)")
+    print(f"  A/D Ratio: {summary.ad_ratio:.2f}")
+    print(f"  Classification: {summary.classification}")
     print(f"  Strength Score: {bullish_service.get_breadth_strength_score():.1f}/100")
 
     # Bearish scenario
     bearish_service = SimulatedMarketBreadthService(simulated_advances=70, simulated_declines=170)
     summary = bearish_service.get_breadth_summary()
     print(f"\nBearish Scenario:")
-    print(f"  Advances: {summary['advances']} ({summary['advance_pct']}%)")
-    print(f"  Declines: {summary['declines']} ({summary['decline_pct']}%)")
-    print(f"  A/D Ratio: {summary['ad_ratio']}")
-    print(f"  Classification: {summary['classification']}")
+    print(f"  Advances: {summary.advances} ({summary.advance_pct:.1f}%)")
+    print(f"  Declines: {summary.declines} ({summary.decline_pct:.1f}%)")
+    print(f"  A/D Ratio: {summary.ad_ratio:.2f}")
+    print(f"  Classification: {summary.classification}")
     print(f"  Strength Score: {bearish_service.get_breadth_strength_score():.1f}/100")
 
     # Neutral scenario
     neutral_service = SimulatedMarketBreadthService(simulated_advances=125, simulated_declines=125)
     summary = neutral_service.get_breadth_summary()
     print(f"\nNeutral Scenario:")
-    print(f"  Advances: {summary['advances']} ({summary['advance_pct']}%)")
-    print(f"  Declines: {summary['declines']} ({summary['decline_pct']}%)")
-    print(f"  A/D Ratio: {summary['ad_ratio']}")
-    print(f"  Classification: {summary['classification']}")
+    print(f"  Advances: {summary.advances} ({summary.advance_pct:.1f}%)")
+    print(f"  Declines: {summary.declines} ({summary.decline_pct:.1f}%)")
+    print(f"  A/D Ratio: {summary.ad_ratio:.2f}")
+    print(f"  Classification: {summary.classification}")
     print(f"  Strength Score: {neutral_service.get_breadth_strength_score():.1f}/100")
 
     # Test real NSE data (may fail if network issues)
@@ -407,14 +570,14 @@ if __name__ == "__main__":
         real_service = MarketBreadthService()
         summary = real_service.get_breadth_summary()
 
-        if summary['available']:
+        if summary.available:
             print(f"   Successfully fetched real market breadth")
-            print(f"  Advances: {summary['advances']}")
-            print(f"  Declines: {summary['declines']}")
-            print(f"  A/D Ratio: {summary['ad_ratio']}")
-            print(f"  Classification: {summary['classification']}")
-            print(f"  Fallback Mode: {summary['is_fallback']}")
+            print(f"  Advances: {summary.advances}")
+            print(f"  Declines: {summary.declines}")
+            print(f"  A/D Ratio: {summary.ad_ratio:.2f}")
+            print(f"  Classification: {summary.classification}")
+            print(f"  Source: {summary.source}")
         else:
-            print(f"   Failed to fetch: {summary.get('error', 'Unknown error')}")
+            print(f"   Failed to fetch: {summary.error or 'Unknown error'}")
     except Exception as e:
         print(f"   Error: {e}")
\ No newline at end of file
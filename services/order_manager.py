@@ -5,23 +5,336 @@ Order Management Service
 Handles order placement, modification, and tracking
 """
 
+import asyncio
 import logging
-from typing import Dict, Optional
+import random
+import sys
+import threading
+import time
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Optional
 from datetime import datetime
+from fyers_apiv3.FyersWebsocket import order_ws
+from fyers_apiv3.fyersModel import Config as FyersEndpoints
 from config.settings import OrderSide, OrderType, TradingMode, TradingConfig
+from utils.json_utils import json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
+# Small-integer codes for the order store columns
+_SIDES = (OrderSide.BUY, OrderSide.SELL)
+_ORDER_TYPES = tuple(OrderType)
+_ORDER_TYPE_IDX = {order_type: i for i, order_type in enumerate(_ORDER_TYPES)}
+_STATUSES = ('PLACED', 'FILLED', 'CANCELLED', 'REJECTED')
+PLACED, FILLED, CANCELLED, REJECTED = range(len(_STATUSES))
+
+# Fyers order status codes (order updates/orderbook) that change the tracked status
+_BROKER_STATUS = {1: CANCELLED, 2: FILLED, 5: REJECTED}
+
+# Fyers order field codes
+_SIDE_CODE = {OrderSide.BUY: 1, OrderSide.SELL: -1}
+_TYPE_CODE = {OrderType.LIMIT: 1, OrderType.MARKET: 2, OrderType.STOP_LOSS: 3, OrderType.STOP_LOSS_MARKET: 3}
+_EXIT_SIDE = {OrderSide.BUY: OrderSide.SELL, OrderSide.SELL: OrderSide.BUY}
+_PROD_INTRADAY = sys.intern("INTRADAY")
+_VAL_DAY = sys.intern("DAY")
+
+
+async def _retry(coro_factory, attempts: int = 3, base: float = 0.05):
+    """
+    Await coro_factory() until it returns an ok response, backing off between tries
+
+    Only for idempotent broker calls (cancel, modify, orderbook); order placement
+    is never retried. Returns the last response, or re-raises the last error.
+    """
+    for attempt in range(attempts):
+        try:
+            response = await coro_factory()
+            if response.get('s') == 'ok' or attempt == attempts - 1:
+                return response
+            logger.debug("Broker call not ok (attempt %d/%d): %s", attempt + 1, attempts, response)
+        except Exception as e:
+            if attempt == attempts - 1:
+                raise
+            logger.debug("Broker call failed (attempt %d/%d): %s", attempt + 1, attempts, e)
+
+        await asyncio.sleep(base * 2 ** attempt + random.random() * 0.05)
+
+
+class OrderStore:
+    """Tracked orders held column-wise in NumPy arrays, indexed by order id"""
+
+    def __init__(self, capacity: int = 64):
+        self._id_to_idx: Dict[str, int] = {}
+        self._ids_by_symbol: Dict[str, List[str]] = {}  # per-symbol shard of order ids
+        self.symbols: List[str] = []
+        self.sides = np.zeros(capacity, dtype=np.int8)  # index into _SIDES
+        self.order_types = np.zeros(capacity, dtype=np.int8)  # index into _ORDER_TYPES
+        self.quantities = np.zeros(capacity, dtype=np.int32)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.statuses = np.zeros(capacity, dtype=np.int8)  # index into _STATUSES
+        self.timestamps = np.zeros(capacity, dtype='datetime64[ns]')
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._id_to_idx
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        capacity = 2 * len(self.sides)
+        self.sides = np.resize(self.sides, capacity)
+        self.order_types = np.resize(self.order_types, capacity)
+        self.quantities = np.resize(self.quantities, capacity)
+        self.prices = np.resize(self.prices, capacity)
+        self.statuses = np.resize(self.statuses, capacity)
+        self.timestamps = np.resize(self.timestamps, capacity)
+
+    def append(self, order_id: str, symbol: str, side: OrderSide, quantity: int,
+               order_type: OrderType, price: float, status: int, timestamp: datetime) -> int:
+        """Store one order and return its row index"""
+        idx = len(self.symbols)
+        if idx == len(self.sides):
+            self._grow()
+
+        # A fixed universe repeats the same few hundred symbols; keep one copy of each
+        symbol = sys.intern(symbol)
+        self.symbols.append(symbol)
+        self.sides[idx] = side is OrderSide.SELL
+        self.order_types[idx] = _ORDER_TYPE_IDX[order_type]
+        self.quantities[idx] = quantity
+        self.prices[idx] = price
+        self.statuses[idx] = status
+        self.timestamps[idx] = np.datetime64(timestamp, 'ns')
+        self._id_to_idx[order_id] = idx
+        self._ids_by_symbol.setdefault(symbol, []).append(order_id)
+        return idx
+
+    def ids_for_symbol(self, symbol: str) -> List[str]:
+        """Order ids tracked for one symbol, oldest first"""
+        return self._ids_by_symbol.get(symbol, [])
+
+    def set_status(self, order_id: str, status: int) -> bool:
+        """Update an order's status; False if the order is unknown"""
+        idx = self._id_to_idx.get(order_id)
+        if idx is None:
+            return False
+        self.statuses[idx] = status
+        return True
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        """Order as a dict (built on demand), or None if unknown"""
+        idx = self._id_to_idx.get(order_id)
+        if idx is None:
+            return None
+
+        return {
+            'symbol': self.symbols[idx],
+            'side': _SIDES[self.sides[idx]],
+            'quantity': int(self.quantities[idx]),
+            'order_type': _ORDER_TYPES[self.order_types[idx]],
+            'price': float(self.prices[idx]),
+            'status': _STATUSES[self.statuses[idx]],
+            'timestamp': self.timestamps[idx].astype('datetime64[us]').item()
+        }
+
 
 class OrderManager:
     """Order management for MMFS strategy"""
 
+    # Fyers multi-order endpoint accepts at most this many orders per request
+    BASKET_MAX_ORDERS = 10
+
+    # Status lookups within this window share one orderbook fetch
+    ORDERBOOK_CACHE_TTL_SECONDS = 0.25
+
+    # Constant order fields; each order copies a template and sets the rest
+    _MARKET_TEMPLATE = {
+        "productType": _PROD_INTRADAY,
+        "limitPrice": 0,
+        "stopPrice": 0,
+        "validity": _VAL_DAY,
+        "disclosedQty": 0,
+        "offlineOrder": False
+    }
+    _LIMIT_TEMPLATE = {
+        "productType": _PROD_INTRADAY,
+        "stopPrice": 0,
+        "validity": _VAL_DAY,
+        "disclosedQty": 0,
+        "offlineOrder": False
+    }
+    _SL_TEMPLATE = {
+        "productType": _PROD_INTRADAY,
+        "limitPrice": 0,
+        "validity": _VAL_DAY,
+        "disclosedQty": 0,
+        "offlineOrder": False
+    }
+    _ORDER_TEMPLATES = {
+        OrderType.MARKET: _MARKET_TEMPLATE,
+        OrderType.LIMIT: _LIMIT_TEMPLATE,
+        OrderType.STOP_LOSS: _SL_TEMPLATE,
+        OrderType.STOP_LOSS_MARKET: _SL_TEMPLATE
+    }
+    # Payload field that carries the order price (market orders have none)
+    _PRICE_FIELD = {
+        OrderType.MARKET: None,
+        OrderType.LIMIT: "limitPrice",
+        OrderType.STOP_LOSS: "stopPrice",
+        OrderType.STOP_LOSS_MARKET: "stopPrice"
+    }
+
     def __init__(self, fyers_client):
         self.fyers = fyers_client
         self.trading_mode = TradingConfig.MODE
-        self.orders = {}  # Track placed orders
+        self._mode_str = self.trading_mode.value
+        self.orders = OrderStore()  # Track placed orders
+
+        # Caps concurrent broker requests (bracket/basket bursts, grid strategies)
+        self._sem = asyncio.Semaphore(TradingConfig.MAX_CONCURRENT_ORDERS)
+        self._configure_connection_pool()
+
+        # Last broker orderbook, indexed by order id (kept live by the order socket)
+        self._orderbook_cache: Dict[str, Dict] = {}
+        self._orderbook_cache_ts = 0.0
+
+        # Order update socket (live mode, started on the running event loop)
+        self._order_ws = None
+        self._order_ws_connected = threading.Event()
+        self._ws_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None  # owns _orderbook_cache and orders
+        if self.trading_mode is TradingMode.LIVE and getattr(self.fyers, 'header', None):
+            try:
+                self._ws_task = asyncio.get_running_loop().create_task(self._run_order_ws())
+            except RuntimeError:
+                logger.info("No running event loop, order status will poll the orderbook")
+
+        logger.info("OrderManager initialized in %s mode", self._mode_str)
+
+    async def _run_order_ws(self):
+        """Connect the Fyers order socket; updates then arrive on the SDK thread"""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._order_ws = order_ws.FyersOrderSocket(
+                access_token=self.fyers.header,
+                write_to_file=False,
+                log_path="",
+                on_orders=self._on_order_update,
+                on_connect=self._on_order_ws_connect,
+                on_close=self._on_order_ws_close,
+                on_error=lambda message: logger.error("Order socket error: %s", message),
+                reconnect=True
+            )
+            await asyncio.to_thread(self._order_ws.connect)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Error starting order socket, falling back to orderbook polling: %s", e)
+
+    def _on_order_ws_connect(self):
+        """Subscribe to order updates once the socket opens"""
+        self._order_ws.subscribe(data_type="OnOrders")
+        self._order_ws_connected.set()
+        logger.info("Order socket connected")
+
+    def _on_order_ws_close(self, message=None):
+        """Order statuses fall back to orderbook polling while disconnected"""
+        self._order_ws_connected.clear()
+        logger.warning("Order socket closed: %s", message)
+
+    def _on_order_update(self, message: Dict):
+        """SDK thread callback: hand the update to the event loop that owns the order state"""
+        try:
+            self._loop.call_soon_threadsafe(self._apply_order_update, message)
+        except RuntimeError:
+            logger.warning("Event loop closed, dropping order update")
+
+    def _apply_order_update(self, message: Dict):
+        """Apply one order update to the live orderbook and the tracked orders (loop thread)"""
+        order = message.get('orders') if message else None
+        order_id = order.get('id') if order else None
+        if order_id is None:
+            return
+
+        self._orderbook_cache[order_id] = order
+
+        status = _BROKER_STATUS.get(order.get('status'))
+        if status is not None:
+            self.orders.set_status(order_id, status)
+
+    def update_access_token(self):
+        """Reconnect the order socket after the Fyers client's token was refreshed"""
+        if self._ws_task is None:
+            return
+        self._ws_task = asyncio.get_running_loop().create_task(self._restart_order_ws(self._ws_task))
+
+    async def _restart_order_ws(self, previous: asyncio.Task):
+        """Close the socket opened with the old token and connect again with the client's header"""
+        self._order_ws_connected.clear()
+        previous.cancel()
+        if self._order_ws is not None:
+            try:
+                await asyncio.to_thread(self._order_ws.close_connection)
+            except Exception as e:
+                logger.error("Error closing order socket: %s", e)
+        await self._run_order_ws()
+
+    async def close(self):
+        """Stop the order update socket"""
+        self._order_ws_connected.clear()
+
+        if self._ws_task is not None:
+            self._ws_task.cancel()
+            try:
+                await self._ws_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._ws_task = None
+
+        if self._order_ws is not None:
+            try:
+                await asyncio.to_thread(self._order_ws.close_connection)
+            except Exception as e:
+                logger.error("Error closing order socket: %s", e)
+            self._order_ws = None
+
+    def _configure_connection_pool(self):
+        """Size the Fyers client's keep-alive pool for the allowed concurrent calls"""
+        session = getattr(getattr(self.fyers, 'service', None), 'session', None)
+        if not isinstance(session, requests.Session):
+            return
+
+        # Retry only failed connects; an order POST that reached the broker is never resent
+        adapter = HTTPAdapter(pool_connections=10,
+                              pool_maxsize=max(50, TradingConfig.MAX_CONCURRENT_ORDERS),
+                              max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1))
+        session.mount("https://", adapter)
+        logger.debug("Fyers connection pool sized for %d concurrent calls", TradingConfig.MAX_CONCURRENT_ORDERS)
+
+    def _post_orders(self, endpoint: str, payload) -> Dict:
+        """POST an order payload on the SDK's pooled session, encoded with orjson when available"""
+        session = getattr(getattr(self.fyers, 'service', None), 'session', None)
+        if not isinstance(session, requests.Session):
+            # Not the synchronous SDK service; let the SDK encode and send
+            if endpoint == FyersEndpoints.multi_orders:
+                return self.fyers.place_basket_orders(data=payload)
+            return self.fyers.place_order(data=payload)
+
+        response = session.post(
+            FyersEndpoints.API + endpoint,
+            data=json_dumps(payload),
+            headers={"Authorization": self.fyers.header, "Content-Type": "application/json", "version": "3"}
+        )
+        return json_loads(response.content)
 
-        logger.info(f"OrderManager initialized in {self.trading_mode.value} mode")
+    async def _broker_call(self, func, *args, **kwargs):
+        """Run a blocking Fyers SDK call off the event loop, within the concurrency limit"""
+        async with self._sem:
+            return await asyncio.to_thread(func, *args, **kwargs)
 
     async def place_order(
             self,
@@ -41,57 +354,138 @@ class OrderManager:
         """
         try:
             # Paper trading simulation
-            if self.trading_mode == TradingMode.PAPER:
+            if self.trading_mode is TradingMode.PAPER:
                 order_id = self._simulate_order(symbol, side, quantity, order_type, price)
-                logger.info(f" PAPER ORDER: {side.value} {quantity} {symbol} @ {price if price > 0 else 'Market'}")
+                logger.info(" PAPER ORDER: %s %d %s @ %s", side.value, quantity, symbol, price or 'Market')
                 return order_id
 
-            # Live trading
-            order_data = {
-                "symbol": symbol,
-                "qty": quantity,
-                "type": 2 if order_type == OrderType.MARKET else 1,  # 1=Limit, 2=Market
-                "side": 1 if side == OrderSide.BUY else -1,
-                "productType": "INTRADAY",
-                "limitPrice": 0 if order_type == OrderType.MARKET else price,
-                "stopPrice": 0,
-                "validity": "DAY",
-                "disclosedQty": 0,
-                "offlineOrder": False
-            }
+            # Live trading: entry and bracket legs go out in one basket request
+            if stop_loss or target:
+                return await self._place_bracket_order(symbol, side, quantity, order_type, price, stop_loss, target)
+
+            order_data = self._build_order_data(symbol, side, quantity, order_type, price)
 
-            response = self.fyers.place_order(data=order_data)
+            response = await self._broker_call(self._post_orders, FyersEndpoints.orders_endpoint, order_data)
 
             if response.get('s') == 'ok':
+                self._orderbook_cache_ts = 0.0
                 order_id = response.get('id')
-                self.orders[order_id] = {
-                    'symbol': symbol,
-                    'side': side,
-                    'quantity': quantity,
-                    'order_type': order_type,
-                    'price': price,
-                    'status': 'PLACED',
-                    'timestamp': datetime.now()
-                }
-
-                logger.info(f" ORDER PLACED: {order_id} - {side.value} {quantity} {symbol}")
-
-                # Place bracket orders if stop_loss or target provided
-                if stop_loss:
-                    await self.place_stop_loss_order(symbol, quantity, stop_loss, side)
-
-                if target:
-                    await self.place_target_order(symbol, quantity, target, side)
+                self._record_order(order_id, symbol, side, quantity, order_type, price)
 
+                logger.info(" ORDER PLACED: %s - %s %d %s", order_id, side.value, quantity, symbol)
                 return order_id
             else:
-                logger.error(f" Order placement failed: {response}")
+                logger.error(" Order placement failed: %s", response)
                 return None
 
         except Exception as e:
-            logger.error(f"Error placing order: {e}")
+            logger.error("Error placing order: %s", e)
+            return None
+
+    async def _place_bracket_order(
+            self,
+            symbol: str,
+            side: OrderSide,
+            quantity: int,
+            order_type: OrderType,
+            price: float,
+            stop_loss: Optional[float],
+            target: Optional[float]
+    ) -> Optional[str]:
+        """Place entry, stop loss and target legs as one basket; returns the entry order ID"""
+        exit_side = _EXIT_SIDE[side]
+
+        legs = [{'symbol': symbol, 'side': side, 'quantity': quantity, 'order_type': order_type, 'price': price}]
+        if stop_loss:
+            legs.append({'symbol': symbol, 'side': exit_side, 'quantity': quantity,
+                         'order_type': OrderType.STOP_LOSS, 'price': stop_loss})
+        if target:
+            legs.append({'symbol': symbol, 'side': exit_side, 'quantity': quantity,
+                         'order_type': OrderType.LIMIT, 'price': target})
+
+        order_ids = await self.place_orders_batch(legs)
+        order_id = order_ids[0]
+
+        if order_id is None:
+            # Exit legs without an entry would open a position on their own
+            for exit_id in order_ids[1:]:
+                if exit_id:
+                    await self.cancel_order(exit_id)
+            logger.error(" Order placement failed: %s %d %s", side.value, quantity, symbol)
             return None
 
+        # One line per bracket with all leg ids
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(" ORDER PLACED: id=%s sl=%s tgt=%s sym=%s qty=%d side=%s", order_id,
+                        order_ids[1] if stop_loss else '-', order_ids[-1] if target else '-',
+                        symbol, quantity, side.value)
+        return order_id
+
+    async def place_orders_batch(self, orders: List[Dict]) -> List[Optional[str]]:
+        """
+        Place several orders with one basket request per BASKET_MAX_ORDERS orders
+
+        Args:
+            orders: Dicts with symbol, side, quantity and optional order_type, price
+
+        Returns:
+            Order ID (None if rejected) for each input order, in input order
+        """
+        if self.trading_mode is TradingMode.PAPER:
+            order_ids = []
+            for order in orders:
+                order_type = order.get('order_type', OrderType.MARKET)
+                price = order.get('price', 0)
+                order_ids.append(self._simulate_order(order['symbol'], order['side'], order['quantity'],
+                                                      order_type, price))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(" PAPER ORDER: %s %d %s @ %s",
+                                 order['side'].value, order['quantity'], order['symbol'], price or 'Market')
+            logger.info(" PAPER BASKET: %d orders", len(order_ids))
+            return order_ids
+
+        order_ids: List[Optional[str]] = []
+        for start in range(0, len(orders), self.BASKET_MAX_ORDERS):
+            chunk = orders[start:start + self.BASKET_MAX_ORDERS]
+            batch = [
+                self._build_order_data(order['symbol'], order['side'], order['quantity'],
+                                       order.get('order_type', OrderType.MARKET), order.get('price', 0))
+                for order in chunk
+            ]
+
+            try:
+                response = await self._broker_call(self._post_orders, FyersEndpoints.multi_orders, batch)
+            except Exception as e:
+                logger.error("Error placing basket orders: %s", e)
+                order_ids.extend([None] * len(chunk))
+                continue
+
+            # One status per leg, in request order
+            statuses = response.get('data') or []
+            placed_at = datetime.now()
+            if not statuses:
+                logger.error(" Basket order failed: %s", response)
+
+            for i, order in enumerate(chunk):
+                status = statuses[i] if i < len(statuses) else {}
+                body = status.get('body', status)
+
+                if body.get('s') == 'ok':
+                    order_id = body.get('id')
+                    self._record_order(order_id, order['symbol'], order['side'], order['quantity'],
+                                       order.get('order_type', OrderType.MARKET), order.get('price', 0),
+                                       placed_at)
+                    order_ids.append(order_id)
+                else:
+                    if statuses:
+                        logger.error(" Basket leg failed for %s: %s", order['symbol'], body)
+                    order_ids.append(None)
+
+        if any(order_ids):
+            self._orderbook_cache_ts = 0.0
+
+        return order_ids
+
     async def place_stop_loss_order(
             self,
             symbol: str,
@@ -102,38 +496,28 @@ class OrderManager:
         """Place stop loss order"""
         try:
             # Reverse side for exit
-            side = OrderSide.SELL if original_side == OrderSide.BUY else OrderSide.BUY
+            side = _EXIT_SIDE[original_side]
 
-            if self.trading_mode == TradingMode.PAPER:
+            if self.trading_mode is TradingMode.PAPER:
                 order_id = self._simulate_order(symbol, side, quantity, OrderType.STOP_LOSS, stop_price)
-                logger.info(f" PAPER SL: {side.value} {quantity} {symbol} @ {stop_price}")
+                logger.info(" PAPER SL: %s %d %s @ %s", side.value, quantity, symbol, stop_price)
                 return order_id
 
-            order_data = {
-                "symbol": symbol,
-                "qty": quantity,
-                "type": 3,  # Stop loss order
-                "side": 1 if side == OrderSide.BUY else -1,
-                "productType": "INTRADAY",
-                "limitPrice": 0,
-                "stopPrice": stop_price,
-                "validity": "DAY",
-                "disclosedQty": 0,
-                "offlineOrder": False
-            }
+            order_data = self._build_order_data(symbol, side, quantity, OrderType.STOP_LOSS, stop_price)
 
-            response = self.fyers.place_order(data=order_data)
+            response = await self._broker_call(self._post_orders, FyersEndpoints.orders_endpoint, order_data)
 
             if response.get('s') == 'ok':
+                self._orderbook_cache_ts = 0.0
                 order_id = response.get('id')
-                logger.info(f" SL ORDER: {order_id} @ {stop_price}")
+                logger.debug(" SL ORDER: %s @ %s", order_id, stop_price)
                 return order_id
             else:
-                logger.error(f" SL order failed: {response}")
+                logger.error(" SL order failed: %s", response)
                 return None
 
         except Exception as e:
-            logger.error(f"Error placing stop loss: {e}")
+            logger.error("Error placing stop loss: %s", e)
             return None
 
     async def place_target_order(
@@ -146,45 +530,35 @@ class OrderManager:
         """Place target order"""
         try:
             # Reverse side for exit
-            side = OrderSide.SELL if original_side == OrderSide.BUY else OrderSide.BUY
+            side = _EXIT_SIDE[original_side]
 
-            if self.trading_mode == TradingMode.PAPER:
+            if self.trading_mode is TradingMode.PAPER:
                 order_id = self._simulate_order(symbol, side, quantity, OrderType.LIMIT, target_price)
-                logger.info(f" PAPER TARGET: {side.value} {quantity} {symbol} @ {target_price}")
+                logger.info(" PAPER TARGET: %s %d %s @ %s", side.value, quantity, symbol, target_price)
                 return order_id
 
-            order_data = {
-                "symbol": symbol,
-                "qty": quantity,
-                "type": 1,  # Limit order
-                "side": 1 if side == OrderSide.BUY else -1,
-                "productType": "INTRADAY",
-                "limitPrice": target_price,
-                "stopPrice": 0,
-                "validity": "DAY",
-                "disclosedQty": 0,
-                "offlineOrder": False
-            }
+            order_data = self._build_order_data(symbol, side, quantity, OrderType.LIMIT, target_price)
 
-            response = self.fyers.place_order(data=order_data)
+            response = await self._broker_call(self._post_orders, FyersEndpoints.orders_endpoint, order_data)
 
             if response.get('s') == 'ok':
+                self._orderbook_cache_ts = 0.0
                 order_id = response.get('id')
-                logger.info(f" TARGET ORDER: {order_id} @ {target_price}")
+                logger.debug(" TARGET ORDER: %s @ %s", order_id, target_price)
                 return order_id
             else:
-                logger.error(f" Target order failed: {response}")
+                logger.error(" Target order failed: %s", response)
                 return None
 
         except Exception as e:
-            logger.error(f"Error placing target: {e}")
+            logger.error("Error placing target: %s", e)
             return None
 
     async def modify_order(self, order_id: str, new_price: float = None, new_quantity: int = None) -> bool:
         """Modify existing order"""
         try:
-            if self.trading_mode == TradingMode.PAPER:
-                logger.info(f" PAPER MODIFY: Order {order_id}")
+            if self.trading_mode is TradingMode.PAPER:
+                logger.info(" PAPER MODIFY: Order %s", order_id)
                 return True
 
             modify_data = {
@@ -197,72 +571,83 @@ class OrderManager:
             if new_quantity:
                 modify_data["qty"] = new_quantity
 
-            response = self.fyers.modify_order(data=modify_data)
+            response = await _retry(lambda: self._broker_call(self.fyers.modify_order, data=modify_data))
 
             if response.get('s') == 'ok':
-                logger.info(f" ORDER MODIFIED: {order_id}")
+                self._orderbook_cache_ts = 0.0
+                logger.info(" ORDER MODIFIED: %s", order_id)
                 return True
             else:
-                logger.error(f" Modify failed: {response}")
+                logger.error(" Modify failed: %s", response)
                 return False
 
         except Exception as e:
-            logger.error(f"Error modifying order: {e}")
+            logger.error("Error modifying order: %s", e)
             return False
 
     async def cancel_order(self, order_id: str) -> bool:
         """Cancel order"""
         try:
-            if self.trading_mode == TradingMode.PAPER:
-                logger.info(f" PAPER CANCEL: Order {order_id}")
-                if order_id in self.orders:
-                    self.orders[order_id]['status'] = 'CANCELLED'
+            if self.trading_mode is TradingMode.PAPER:
+                logger.info(" PAPER CANCEL: Order %s", order_id)
+                self.orders.set_status(order_id, CANCELLED)
                 return True
 
             cancel_data = {"id": order_id}
-            response = self.fyers.cancel_order(data=cancel_data)
+            response = await _retry(lambda: self._broker_call(self.fyers.cancel_order, data=cancel_data))
 
             if response.get('s') == 'ok':
-                logger.info(f" ORDER CANCELLED: {order_id}")
-                if order_id in self.orders:
-                    self.orders[order_id]['status'] = 'CANCELLED'
+                self._orderbook_cache_ts = 0.0
+                logger.info(" ORDER CANCELLED: %s", order_id)
+                self.orders.set_status(order_id, CANCELLED)
                 return True
             else:
-                logger.error(f" Cancel failed: {response}")
+                logger.error(" Cancel failed: %s", response)
                 return False
 
         except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
+            logger.error("Error cancelling order: %s", e)
             return False
 
-    def get_order_status(self, order_id: str) -> Optional[Dict]:
+    async def get_order_status(self, order_id: str) -> Optional[Dict]:
         """Get order status"""
         try:
-            if self.trading_mode == TradingMode.PAPER:
+            if self.trading_mode is TradingMode.PAPER:
                 return self.orders.get(order_id)
 
+            if self._order_ws_connected.is_set():
+                # Pushed by the order socket; fetch only if no update has arrived yet
+                order = self._orderbook_cache.get(order_id)
+                if order is not None:
+                    return order
+            elif time.monotonic() - self._orderbook_cache_ts < self.ORDERBOOK_CACHE_TTL_SECONDS:
+                return self._orderbook_cache.get(order_id)
+
             # Get order book
-            response = self.fyers.orderbook()
+            response = await _retry(lambda: self._broker_call(self.fyers.orderbook))
 
             if response.get('s') == 'ok':
-                orders = response.get('orderBook', [])
-                for order in orders:
-                    if order.get('id') == order_id:
-                        return order
+                self._orderbook_cache = {order.get('id'): order for order in response.get('orderBook', [])}
+                self._orderbook_cache_ts = time.monotonic()
+                return self._orderbook_cache.get(order_id)
 
             return None
 
         except Exception as e:
-            logger.error(f"Error getting order status: {e}")
+            logger.error("Error getting order status: %s", e)
             return None
 
-    def get_positions(self) -> list:
+    def get_orders_for_symbol(self, symbol: str) -> List[Dict]:
+        """Tracked orders for one symbol, without scanning other symbols"""
+        return [self.orders.get(order_id) for order_id in self.orders.ids_for_symbol(symbol)]
+
+    async def get_positions(self) -> list:
         """Get current positions"""
         try:
-            if self.trading_mode == TradingMode.PAPER:
+            if self.trading_mode is TradingMode.PAPER:
                 return []
 
-            response = self.fyers.positions()
+            response = await self._broker_call(self.fyers.positions)
 
             if response.get('s') == 'ok':
                 return response.get('netPositions', [])
@@ -270,29 +655,41 @@ class OrderManager:
             return []
 
         except Exception as e:
-            logger.error(f"Error getting positions: {e}")
+            logger.error("Error getting positions: %s", e)
             return []
 
+    def _build_order_data(self, symbol: str, side: OrderSide, quantity: int,
+                          order_type: OrderType, price: float) -> Dict:
+        """Build the Fyers payload for one order from the matching template"""
+        order_data = self._ORDER_TEMPLATES[order_type].copy()
+        price_field = self._PRICE_FIELD[order_type]
+        if price_field:
+            order_data[price_field] = price
+        order_data["symbol"] = symbol
+        order_data["qty"] = quantity
+        order_data["type"] = _TYPE_CODE[order_type]
+        order_data["side"] = _SIDE_CODE[side]
+        return order_data
+
+    def _record_order(self, order_id: str, symbol: str, side: OrderSide, quantity: int,
+                      order_type: OrderType, price: float, timestamp: Optional[datetime] = None):
+        """Track a live order accepted by the broker"""
+        self.orders.append(order_id, symbol, side, quantity, order_type, price,
+                           PLACED, timestamp or datetime.now())
+
     def _simulate_order(self, symbol: str, side: OrderSide, quantity: int,
                         order_type: OrderType, price: float) -> str:
         """Simulate order for paper trading"""
-        order_id = f"PAPER_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-
-        self.orders[order_id] = {
-            'symbol': symbol,
-            'side': side,
-            'quantity': quantity,
-            'order_type': order_type,
-            'price': price,
-            'status': 'FILLED',  # Assume instant fill for paper trading
-            'timestamp': datetime.now()
-        }
+        # Nanosecond ids stay unique for bursts of orders within one second
+        order_id = f"PAPER_{time.time_ns()}"
+
+        # Assume instant fill for paper trading
+        self.orders.append(order_id, symbol, side, quantity, order_type, price, FILLED, datetime.now())
 
         return order_id
 
 
 if __name__ == "__main__":
-    import asyncio
     from services.fyers_auth import FyersAuth
     from config.settings import OrderSide, OrderType
 
@@ -332,7 +729,7 @@ if __name__ == "__main__":
             print(f" Order placed: {order_id}")
 
             # Check status
-            status = order_manager.get_order_status(order_id)
+            status = await order_manager.get_order_status(order_id)
             if status:
                 print(f"\nOrder Status:")
                 print(f"  Symbol: {status['symbol']}")
@@ -0,0 +1,81 @@
+# strategy/_mmfs_kernels.py
+
+"""
+Numeric kernels for MMFS setup scoring
+Compiled with numba when it is installed, plain Python otherwise
+"""
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def _kernel(signature: str, parallel: bool = False):
+    """Eagerly compile with an explicit signature and on-disk cache, or no-op without numba"""
+    if njit is None:
+        return lambda fn: fn
+    return njit(signature, cache=True, fastmath=True, parallel=parallel)
+
+
+@_kernel('float64(float64, float64, float64)')
+def setup1_confidence(gap_pct, breadth_strength, volume_ratio):
+    """Confidence score for Setup 1 (Gap-Up Breakout)"""
+    score = 0.5  # Base score
+
+    # Gap strength
+    if gap_pct > 0.5:
+        score += 0.15
+    elif gap_pct > 0.3:
+        score += 0.10
+
+    # Breadth strength
+    if breadth_strength > 70:
+        score += 0.15
+    elif breadth_strength > 60:
+        score += 0.10
+
+    # Volume confirmation
+    if volume_ratio > 2.0:
+        score += 0.10
+    elif volume_ratio > 1.5:
+        score += 0.05
+
+    return min(score, 1.0)
+
+
+@_kernel('void(int32[:], int64, float64, float64[:], float64[:], boolean[:])', parallel=True)
+def batch_setup1_confidence(gap_fx, gap_scale, breadth_strength, volume_ratio, out, mask):
+    """Setup 1 confidence for every masked symbol from fixed-point gaps, written into out (0.0 where unmasked)"""
+    for i in prange(gap_fx.shape[0]):
+        if mask[i]:
+            out[i] = setup1_confidence(gap_fx[i] / gap_scale, breadth_strength, volume_ratio[i])
+        else:
+            out[i] = 0.0
+
+
+
+def _warmup():
+    """Run every kernel once so compile/cache load and thread-pool startup happen at import"""
+    import numpy as np
+
+    setup1_confidence(0.0, 0.0, 0.0)
+    empty = np.zeros(0)
+    batch_setup1_confidence(np.zeros(0, dtype=np.int32), 1, 0.0, empty, empty.copy(), np.zeros(0, dtype=np.bool_))
+
+
+if njit is not None:
+    _warmup()
+
+
+if __name__ == "__main__":
+    print(f"numba available: {njit is not None}")
+    print(f"setup1_confidence(0.6, 75, 2.5) = {setup1_confidence(0.6, 75.0, 2.5):.2f}")
+
+    import numpy as np
+
+    gap_fx = np.array([6000, 4000, 1000], dtype=np.int32)
+    out = np.empty(3)
+    batch_setup1_confidence(gap_fx, 10_000, 65.0, np.array([2.5, 1.6, 1.0]), out, np.array([True, True, False]))
+    print(f"batch_setup1_confidence = {out}")
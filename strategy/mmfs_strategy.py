@@ -8,13 +8,16 @@ Ultra-short scalping strategy for opening minutes (9:15-9:20 AM)
 import asyncio
 import logging
 from datetime import datetime, time, timedelta
+from time import monotonic
 from typing import Dict, List, Optional
 
+import numpy as np
+
 from config.mmfs_config import (
     MMFSStrategyConfig, MMFSTradingConfig,
     GapType, MarketBreadth, MMFSSetupType
 )
-from config.settings import SignalType
+from config.settings import SignalType, TradingConfig
 from models.mmfs_models import (
     PreMarketData, MMFSSignal, MMFSPosition,
     MMFSTradeResult, MMFSStrategyMetrics, MMFSMarketState
@@ -22,13 +25,47 @@ from models.mmfs_models import (
 from services.market_breadth_service import MarketBreadthService
 from services.data_service import DataService
 from services.order_manager import OrderManager
+from strategy._mmfs_kernels import batch_setup1_confidence, setup1_confidence
 
 logger = logging.getLogger(__name__)
 
+# Fixed-point scale for the per-symbol gap column
+GAP_SCALE = 10_000     # int units per 1% gap (0.0001% resolution, below any tick-driven gap change)
+
+# One record per symbol for the first 1-minute candle
+_FIRST_CANDLE_DTYPE = np.dtype([
+    ('high', 'f8'), ('low', 'f8'), ('open', 'f8'), ('close', 'f8'),
+    ('vwap', 'f8'), ('volume', 'f8'), ('vol_ratio', 'f8'), ('valid', '?')
+])
+
+# Exit reasons indexed by the reason codes from _monitor_positions
+_EXIT_REASONS = (None, "TIME_BASED", "STOP_LOSS", "TARGET")
+
+# Opening 5-minute range (9:15-9:20), aligned with MMFSStrategy.symbols
+_RANGE_DTYPE = np.dtype([('high', 'f8'), ('low', 'f8'), ('valid', '?')])
+
+# Open-position row, kept slot-aligned with MMFSStrategy._pos_list
+_POSITION_DTYPE = np.dtype([
+    ('entry', 'f8'), ('stop', 'f8'), ('target', 'f8'), ('dir', 'i1'), ('qty', 'i4'),
+    ('price', 'f8'), ('entry_mono', 'f8'), ('breakeven', '?')
+])
+
 
 class MMFSStrategy:
     """5-Minute Market Force Scalping Strategy"""
 
+    # Phase boundaries
+    PREMARKET_START = time(9, 0)
+    MARKET_OPEN = time(9, 15)
+    FIRST_CANDLE_END = time(9, 16)
+    EXECUTION_END = time(9, 20)
+    SESSION_END = time(9, 25)
+
+    FIRST_CANDLE_RETRY_SECONDS = 1.0
+    FETCH_CONCURRENCY = TradingConfig.DATA_FETCH_CONCURRENCY
+    POSITION_MONITOR_SECONDS = 1.0
+    TICK_POLL_SECONDS = 1.0
+
     def __init__(
             self,
             strategy_config: MMFSStrategyConfig,
@@ -45,6 +82,20 @@ class MMFSStrategy:
         self.breadth_service = breadth_service
         self.symbols = symbols
 
+        # Config values read on the hot path, bound once
+        c = strategy_config
+        self._risk_amount = c.portfolio_value * (c.risk_per_trade_pct / 100)
+        self._rr = c.risk_reward_ratio
+        self._s1_min_gap = round(c.setup1_min_gap_pct * GAP_SCALE)
+        self._s2_min_gap = round(c.setup2_min_gap_pct * GAP_SCALE)
+        self._s3_min_gap = round(c.setup3_min_gap_pct * GAP_SCALE)
+        self._s4_max_gap = round(c.setup4_max_gap_pct * GAP_SCALE)
+        self._s1_require_vwap = c.setup1_require_vwap_above
+        self._s1_max_wick = c.setup1_max_rejection_wick_pct
+        self._s1_min_conf = c.min_confidence_setup1
+        self._max_hold = c.max_holding_minutes
+        self._be_after = c.break_even_after_minutes
+
         # Market state
         self.market_state = MMFSMarketState(
             advances=0, declines=0, ad_ratio=1.0,
@@ -55,14 +106,24 @@ class MMFSStrategy:
         # Pre-market data cache
         self.premarket_data: Dict[str, PreMarketData] = {}
 
-        # First candle data (9:15-9:16)
-        self.first_candle_data: Dict[str, Dict] = {}
+        # Struct-of-arrays view of the premarket cache, indexed by symbol position
+        n_symbols = len(symbols)
+        self._symbol_index: Dict[str, int] = {symbol: i for i, symbol in enumerate(symbols)}
+        self._gap_fx = np.zeros(n_symbols, dtype=np.int32)         # gap % * GAP_SCALE
+        self._has_premarket = np.zeros(n_symbols, dtype=bool)
+        self._has_position = np.zeros(n_symbols, dtype=bool)
+        self._confidence1 = np.zeros(n_symbols, dtype=np.float64)
 
-        # 5-minute range data (9:15-9:20)
-        self.five_min_range: Dict[str, Dict] = {}
+        # First candle data (9:15-9:16), one record per symbol index
+        self._fc = np.zeros(n_symbols, dtype=_FIRST_CANDLE_DTYPE)
 
-        # Active positions
-        self.positions: Dict[str, MMFSPosition] = {}
+        # 5-minute range data (9:15-9:20), one record per symbol index
+        self._range = np.zeros(n_symbols, dtype=_RANGE_DTYPE)
+
+        # Active positions: dense list plus symbol -> slot index (swap-pop on exit)
+        self._pos_list: List[MMFSPosition] = []
+        self._pos_index: Dict[str, int] = {}
+        self._pos_arr = np.zeros(max(1, strategy_config.max_trades_per_day), dtype=_POSITION_DTYPE)
 
         # Completed trades
         self.completed_trades: List[MMFSTradeResult] = []
@@ -75,6 +136,23 @@ class MMFSStrategy:
         self.premarket_collected = False
         self.first_candle_tracked = False
 
+        # Setup eligibility implied by the current breadth classification
+        self._refresh_breadth_flags()
+
+        # Setup predicates and evaluators in priority order (index 0 = Setup 1)
+        self._predicates = (
+            self._should_evaluate_setup1, self._should_evaluate_setup2,
+            self._should_evaluate_setup3, self._should_evaluate_setup4,
+        )
+        self._evaluators = (
+            self._evaluate_setup1_gap_up_breakout, self._evaluate_setup2_gap_up_failure,
+            self._evaluate_setup3_gap_down_recovery, self._evaluate_setup4_range_breakdown,
+        )
+
+        # Phase scheduling state
+        self._signal_deadline = datetime.now()
+        self._position_opened = asyncio.Event()
+
         logger.info(" MMFS Strategy initialized")
 
     async def start(self):
@@ -90,97 +168,201 @@ class MMFSStrategy:
         self.is_running = True
 
         try:
-            # Main strategy loop
-            while self.is_running:
-                current_time = datetime.now().time()
-
-                # Step 1: Collect pre-market data (9:00-9:14)
-                if self._is_premarket_time(current_time) and not self.premarket_collected:
-                    await self._collect_premarket_data()
-                    self.premarket_collected = True
-
-                # Step 2: Update market breadth (9:15)
-                if self._is_market_open(current_time) and not self.market_state.premarket_data_collected:
-                    await self._update_market_breadth()
-                    self.market_state.premarket_data_collected = True
-
-                # Step 3: Track first candle (9:15-9:16)
-                if self._is_first_candle_time(current_time):
-                    await self._track_first_candle()
-                    if current_time >= time(9, 16) and not self.first_candle_tracked:
-                        self.market_state.first_candle_complete = True
-                        self.first_candle_tracked = True
-                        logger.info(" First candle tracking complete")
-
-                # Step 4: Track 5-minute range (9:15-9:20)
-                if self._is_execution_window(current_time):
-                    self.market_state.is_execution_window = True
-                    await self._track_five_min_range()
-
-                # Step 5: Evaluate setups and generate signals (9:16-9:20)
-                if self._is_signal_generation_time(current_time):
-                    await self._evaluate_setups()
-
-                # Step 6: Monitor active positions
-                if len(self.positions) > 0:
-                    await self._monitor_positions()
-
-                # Step 7: Check if trading day complete (after 9:25)
-                if current_time > time(9, 25):
-                    logger.info(" MMFS execution window complete for the day")
-                    break
+            # Each phase sleeps straight to its boundary instead of polling
+            await self._run_phase_premarket()
+            await self._run_phase_first_candle()
+            await self._run_phase_execution()
 
-                await asyncio.sleep(1)  # Check every second
+            if self.is_running:
+                logger.info(" MMFS execution window complete for the day")
 
         except Exception as e:
             logger.error(f" Error in MMFS strategy: {e}", exc_info=True)
         finally:
+            self.data_service.clear_tick_callbacks()
             await self.stop()
 
+    # Phase scheduling
+
+    @staticmethod
+    def _today_at(t: time) -> datetime:
+        """Today's datetime for a wall-clock time"""
+        return datetime.combine(datetime.now().date(), t)
+
+    @staticmethod
+    async def sleep_until(target_dt: datetime):
+        """Sleep until the given wall-clock datetime (returns at once if past)"""
+        delay = (target_dt - datetime.now()).total_seconds()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _run_phase_premarket(self):
+        """Phase 1: collect pre-market data (9:00-9:15)"""
+        await self.sleep_until(self._today_at(self.PREMARKET_START))
+
+        if self.is_running and datetime.now().time() < self.MARKET_OPEN and not self.premarket_collected:
+            await self._collect_premarket_data()
+            self.premarket_collected = True
+
+    async def _run_phase_first_candle(self):
+        """Phase 2: market breadth at the open and first candle (9:15-9:16)"""
+        await self.sleep_until(self._today_at(self.MARKET_OPEN))
+        if not self.is_running:
+            return
+
+        if not self.market_state.premarket_data_collected:
+            await self._update_market_breadth()
+            self.market_state.premarket_data_collected = True
+
+        now = datetime.now().time()
+        if now < self.EXECUTION_END:
+            self.market_state.is_execution_window = True
+
+        # Retry symbols whose quote failed until the candle closes
+        first_candle_end = self._today_at(self.FIRST_CANDLE_END)
+        while self.is_running and datetime.now() < first_candle_end:
+            await self._track_opening_minutes()
+            if self._fc['valid'].all():
+                break
+            await asyncio.sleep(self.FIRST_CANDLE_RETRY_SECONDS)
+
+        await self.sleep_until(first_candle_end)
+        if not self.first_candle_tracked:
+            self.market_state.first_candle_complete = True
+            self.first_candle_tracked = True
+            logger.info(" First candle tracking complete")
+
+    async def _run_phase_execution(self):
+        """Phase 3: tick-driven signals (9:16-9:20) and position monitoring until 9:25"""
+        self._signal_deadline = self._today_at(self.EXECUTION_END)
+        session_end = self._today_at(self.SESSION_END)
+
+        tasks = []
+        if self.is_running and datetime.now() < self._signal_deadline:
+            # One full pass on the closed first candle, then re-evaluate per updated symbol
+            for symbol in self.premarket_data:
+                self.data_service.on_tick(symbol, self._on_tick)
+            await self._evaluate_setups()
+            tasks.append(asyncio.create_task(self._poll_ticks()))
+            tasks.append(asyncio.create_task(self._close_five_min_range()))
+
+        try:
+            await self._monitor_until(session_end)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _poll_ticks(self):
+        """Tick source for the signal window: pull quotes periodically so get_quotes publishes them to _on_tick"""
+        symbols = list(self.premarket_data)
+        while self.is_running:
+            remaining = (self._signal_deadline - datetime.now()).total_seconds()
+            if remaining <= 0:
+                break
+            await self.data_service.get_quotes(symbols)
+            await asyncio.sleep(min(self.TICK_POLL_SECONDS, remaining))
+
+    async def _close_five_min_range(self):
+        """Final opening-minutes pull at 9:20; the session high/low then equals the 5-minute range"""
+        await self.sleep_until(self._signal_deadline)
+        if self.is_running:
+            await self._track_opening_minutes()
+
+    async def _monitor_until(self, session_end: datetime):
+        """Monitor open positions until session end, idling on the fill event when flat"""
+        while self.is_running:
+            remaining = (session_end - datetime.now()).total_seconds()
+            if remaining <= 0:
+                break
+
+            if self._pos_list:
+                await self._monitor_positions()
+                await asyncio.sleep(min(self.POSITION_MONITOR_SECONDS, remaining))
+            else:
+                # Nothing to monitor: wake on the next fill or at session end
+                self._position_opened.clear()
+                try:
+                    await asyncio.wait_for(self._position_opened.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+    async def _on_tick(self, symbol: str, quote: Dict):
+        """Evaluate setups for a symbol as soon as it receives a new quote"""
+        if datetime.now() >= self._signal_deadline:
+            return
+
+        premarket = self.premarket_data.get(symbol)
+        if premarket is not None:
+            await self._evaluate_symbol(symbol, premarket)
+
     async def _collect_premarket_data(self):
         """Collect pre-market data for all symbols"""
         logger.info(" Collecting pre-market data...")
 
-        for symbol in self.symbols:
-            try:
-                logger.debug(f"Collecting data for {symbol}")
-
-                # Fetch previous day data
-                prev_data = await self.data_service.get_previous_day_data(symbol)
-                if not prev_data:
-                    logger.warning(f"Could not fetch previous day data for {symbol}")
-                    continue
-
-                # Fetch current open price
-                quote = await self.data_service.get_current_quote(symbol)
-                if not quote:
-                    logger.warning(f"Could not fetch current quote for {symbol}")
-                    continue
-
-                current_open = quote.get('open') or quote.get('last_price')
-                if not current_open:
-                    logger.warning(f"No open price available for {symbol}")
-                    continue
-
-                # Create PreMarketData object
-                premarket = PreMarketData(
-                    symbol=symbol,
-                    previous_close=prev_data['close'],
-                    today_open=current_open,
-                    prev_high=prev_data['high'],
-                    prev_low=prev_data['low'],
-                    prev_vwap=prev_data['vwap']
-                )
-
-                self.premarket_data[symbol] = premarket
-                logger.info(f"  {symbol}: Gap {premarket.gap_pct:+.2f}% ({premarket.gap_type.value})")
+        # Symbols are independent, so fetch them concurrently under the API limit
+        results = await self._gather_limited(self._fetch_premarket, self.symbols)
 
-            except Exception as e:
-                logger.error(f"Error collecting premarket data for {symbol}: {e}")
+        for symbol, premarket in zip(self.symbols, results):
+            if premarket is None:
+                continue
+
+            self.premarket_data[symbol] = premarket
+
+            i = self._symbol_index[symbol]
+            self._gap_fx[i] = round(premarket.gap_pct * GAP_SCALE)
+            self._has_premarket[i] = True
+            logger.info(f"  {symbol}: Gap {premarket.gap_pct:+.2f}% ({premarket.gap_type.value})")
 
         self.market_state.symbols_analyzed = len(self.premarket_data)
         logger.info(f" Pre-market data collected for {self.market_state.symbols_analyzed} symbols")
 
+    async def _fetch_premarket(self, symbol: str) -> Optional[PreMarketData]:
+        """Fetch previous day data and today's open for one symbol"""
+        try:
+            logger.debug(f"Collecting data for {symbol}")
+
+            # Previous day data and current quote in parallel
+            prev_data, quote = await asyncio.gather(
+                self.data_service.get_previous_day_data(symbol),
+                self.data_service.get_current_quote(symbol)
+            )
+            if not prev_data:
+                logger.warning(f"Could not fetch previous day data for {symbol}")
+                return None
+
+            if not quote:
+                logger.warning(f"Could not fetch current quote for {symbol}")
+                return None
+
+            current_open = quote.get('open') or quote.get('last_price')
+            if not current_open:
+                logger.warning(f"No open price available for {symbol}")
+                return None
+
+            return PreMarketData(
+                symbol=symbol,
+                previous_close=prev_data['close'],
+                today_open=current_open,
+                prev_high=prev_data['high'],
+                prev_low=prev_data['low'],
+                prev_vwap=prev_data['vwap']
+            )
+
+        except Exception as e:
+            logger.error(f"Error collecting premarket data for {symbol}: {e}")
+            return None
+
+    async def _gather_limited(self, fetch, symbols: List[str]) -> list:
+        """Run fetch(symbol) for every symbol concurrently, at most FETCH_CONCURRENCY at a time"""
+        semaphore = asyncio.Semaphore(self.FETCH_CONCURRENCY)
+
+        async def limited(symbol):
+            async with semaphore:
+                return await fetch(symbol)
+
+        return await asyncio.gather(*(limited(symbol) for symbol in symbols))
+
     async def _update_market_breadth(self):
         """Update market breadth classification"""
         logger.info(" Updating market breadth...")
@@ -189,131 +371,170 @@ class MMFSStrategy:
             # Get breadth summary (automatically uses WebSocket if available)
             summary = self.breadth_service.get_breadth_summary()
 
-            if summary.get('available'):
-                self.market_state.advances = summary['advances']
-                self.market_state.declines = summary['declines']
-                self.market_state.ad_ratio = summary['ad_ratio']
-                self.market_state.breadth_classification = self.breadth_service.get_market_breadth()
-                self.market_state.breadth_strength = self.breadth_service.get_breadth_strength_score()
-
-                source = summary.get('source', 'unknown')
-                ws_active = " (WebSocket)" if summary.get('websocket_active') else " (REST API)"
-
-                logger.info(f" Market Breadth{ws_active}: {summary['classification']} "
-                            f"(A/D: {summary['ad_ratio']:.2f}, Strength: {self.market_state.breadth_strength:.0f}/100)")
-                logger.info(f"  Advances: {summary['advances']} ({summary['advance_pct']}%), "
-                            f"Declines: {summary['declines']} ({summary['decline_pct']}%)")
+            if summary.available:
+                self.market_state.advances = summary.advances
+                self.market_state.declines = summary.declines
+                self.market_state.ad_ratio = summary.ad_ratio
+                if hasattr(self.breadth_service, 'get_breadth_snapshot'):
+                    # One ratio calculation for classification and score
+                    snapshot = self.breadth_service.get_breadth_snapshot()
+                    self.market_state.breadth_classification = (
+                        MarketBreadth.BULLISH if snapshot.is_bullish
+                        else MarketBreadth.BEARISH if snapshot.is_bearish
+                        else MarketBreadth.NEUTRAL
+                    )
+                    self.market_state.breadth_strength = snapshot.score
+                else:
+                    self.market_state.breadth_classification = self.breadth_service.get_market_breadth()
+                    self.market_state.breadth_strength = self.breadth_service.get_breadth_strength_score()
+                self._refresh_breadth_flags()
+
+                source = summary.source
+                ws_active = " (WebSocket)" if summary.websocket_active else " (REST API)"
+
+                logger.info(f" Market Breadth{ws_active}: {summary.classification} "
+                            f"(A/D: {summary.ad_ratio:.2f}, Strength: {self.market_state.breadth_strength:.0f}/100)")
+                logger.info(f"  Advances: {summary.advances} ({summary.advance_pct:.1f}%), "
+                            f"Declines: {summary.declines} ({summary.decline_pct:.1f}%)")
             else:
-                logger.warning(f" Could not fetch market breadth data: {summary.get('error')}")
+                logger.warning(f" Could not fetch market breadth data: {summary.error}")
 
         except Exception as e:
             logger.error(f"Error updating market breadth: {e}")
 
-    async def _track_first_candle(self):
-        """Track first 1-minute candle (9:15-9:16)"""
-        if self.market_state.first_candle_complete:
+    def _refresh_breadth_flags(self):
+        """Cache which setups the current breadth classification allows"""
+        breadth = self.market_state.breadth_classification
+        self._s1_ok = breadth == MarketBreadth.BULLISH
+        self._s2_ok = breadth in (MarketBreadth.BEARISH, MarketBreadth.NEUTRAL)
+        self._s3_ok = breadth == MarketBreadth.BULLISH
+        self._s4_ok = breadth == MarketBreadth.NEUTRAL
+
+    async def _track_opening_minutes(self):
+        """Track the first candle (9:15-9:16) and 5-minute range (9:15-9:20) from one batched quote pull"""
+        quotes = await self.data_service.get_quotes(self.symbols)
+        if not quotes:
             return
 
-        for symbol in self.symbols:
+        fc = self._fc
+        rng = self._range
+        track_candle = not self.market_state.first_candle_complete
+
+        for symbol, quote in quotes.items():
+            i = self._symbol_index.get(symbol)
+            if i is None:
+                continue
             try:
-                # Skip if already tracked
-                if symbol in self.first_candle_data:
-                    continue
-
-                # Get current quote for live candle data
-                quote = await self.data_service.get_current_quote(symbol)
-                if not quote:
-                    continue
-
-                # Calculate VWAP approximation
-                vwap = (quote['high'] + quote['low'] + quote['last_price']) / 3
-
-                self.first_candle_data[symbol] = {
-                    'high': quote['high'],
-                    'low': quote['low'],
-                    'open': quote['open'],
-                    'close': quote['last_price'],
-                    'vwap': vwap,
-                    'volume': quote.get('volume', 0),
-                    'volume_ratio': 1.5  # Default for now - calculate properly with historical avg
-                }
-
-                logger.debug(f"First candle tracked for {symbol}: H={quote['high']}, L={quote['low']}")
+                high = quote['high']
+                low = quote['low']
 
-            except Exception as e:
-                logger.error(f"Error tracking first candle for {symbol}: {e}")
+                if track_candle and not fc['valid'][i]:
+                    # Calculate VWAP approximation
+                    vwap = (high + low + quote['last_price']) / 3
 
-    async def _track_five_min_range(self):
-        """Track 5-minute range (9:15-9:20)"""
-        for symbol in self.symbols:
-            try:
-                # Update 5-minute range
-                # Placeholder - implement actual tracking
-                pass
+                    # Volume ratio defaults to 1.5 for now - calculate properly with historical avg
+                    fc[i] = (high, low, quote['open'], quote['last_price'],
+                             vwap, quote.get('volume') or 0, 1.5, True)
+
+                    logger.debug("First candle tracked for %s: H=%s, L=%s", symbol, high, low)
+
+                # Quote high/low are session extremes, so they are also the running 5-minute range
+                if rng['valid'][i]:
+                    rng[i] = (max(rng['high'][i], high), min(rng['low'][i], low), True)
+                else:
+                    rng[i] = (high, low, True)
 
             except Exception as e:
-                logger.error(f"Error tracking 5-min range for {symbol}: {e}")
+                logger.error("Error tracking opening minutes for %s: %s", symbol, e)
 
     async def _evaluate_setups(self):
         """Evaluate all four MMFS setups"""
         if len(self.premarket_data) == 0:
             return
 
-        for symbol, premarket in self.premarket_data.items():
-            # Skip if already have position
-            if symbol in self.positions:
-                continue
+        # Setup eligibility for every symbol in one vectorized pass
+        gap = self._gap_fx
 
-            # Check if can take more trades
-            can_trade, reason = self.market_state.can_take_trade(
-                self.strategy_config.max_trades_per_day,
-                self.strategy_config.max_loss_per_day_pct,
-                self.strategy_config.portfolio_value
-            )
+        m1 = (gap >= self._s1_min_gap) & self._s1_ok
+        m2 = (gap >= self._s2_min_gap) & self._s2_ok
+        m3 = (gap <= -self._s3_min_gap) & self._s3_ok
+        m4 = (np.abs(gap) < self._s4_max_gap) & self._s4_ok
+
+        # Setup 1 confidence for all eligible symbols in one kernel call
+        confidence1 = self._confidence1
+        batch_setup1_confidence(gap, GAP_SCALE, float(self.market_state.breadth_strength),
+                                self._fc['vol_ratio'], confidence1, m1)
+        low_confidence = m1 & (confidence1 < self._s1_min_conf)
+
+        # First matching setup per symbol, in priority order
+        masks = np.stack((m1, m2, m3, m4))
+        setup_idx = masks.argmax(axis=0)
+        candidates = masks.any(axis=0) & ~low_confidence & self._has_premarket & ~self._has_position
 
-            if not can_trade:
-                logger.debug(f"Cannot take trade: {reason}")
+        for i in np.flatnonzero(candidates):
+            if not self._can_trade():
                 break
 
-            # Evaluate each setup
-            signal = None
+            k = int(setup_idx[i])
+            symbol = self.symbols[i]
+            confidence = float(confidence1[i]) if k == 0 else None
+            await self._run_setup(k, symbol, self.premarket_data[symbol], confidence)
 
-            if self._should_evaluate_setup1(premarket):
-                signal = await self._evaluate_setup1_gap_up_breakout(symbol, premarket)
+    async def _evaluate_symbol(self, symbol: str, premarket: PreMarketData) -> bool:
+        """Evaluate setups for one symbol; returns False once no more trades are allowed"""
+        # Skip if already have position
+        if symbol in self._pos_index:
+            return True
 
-            elif self._should_evaluate_setup2(premarket):
-                signal = await self._evaluate_setup2_gap_up_failure(symbol, premarket)
+        if not self._can_trade():
+            return False
 
-            elif self._should_evaluate_setup3(premarket):
-                signal = await self._evaluate_setup3_gap_down_recovery(symbol, premarket)
+        gap = int(self._gap_fx[self._symbol_index[symbol]])
+        for k, should_evaluate in enumerate(self._predicates):
+            if should_evaluate(gap):
+                await self._run_setup(k, symbol, premarket)
+                break
+
+        return True
+
+    def _can_trade(self) -> bool:
+        """Check daily trade and loss limits"""
+        can_trade, reason = self.market_state.can_take_trade(
+            self.strategy_config.max_trades_per_day,
+            self.strategy_config.max_loss_per_day_pct,
+            self.strategy_config.portfolio_value
+        )
+
+        if not can_trade:
+            logger.debug("Cannot take trade: %s", reason)
+        return can_trade
 
-            elif self._should_evaluate_setup4(premarket):
-                signal = await self._evaluate_setup4_range_breakdown(symbol, premarket)
+    async def _run_setup(self, setup_idx: int, symbol: str, premarket: PreMarketData,
+                         confidence: Optional[float] = None):
+        """Evaluate one setup (0-based index into the evaluator table) and execute any signal"""
+        signal = await self._evaluators[setup_idx](symbol, premarket, confidence)
 
-            if signal:
-                await self._execute_signal(signal)
+        if signal:
+            await self._execute_signal(signal)
 
-    def _should_evaluate_setup1(self, premarket: PreMarketData) -> bool:
+    def _should_evaluate_setup1(self, gap: int) -> bool:
         """Check if should evaluate Setup 1: Gap-Up Breakout"""
-        return (premarket.gap_pct >= self.strategy_config.setup1_min_gap_pct and
-                self.market_state.breadth_classification == MarketBreadth.BULLISH)
+        return self._s1_ok and gap >= self._s1_min_gap
 
-    def _should_evaluate_setup2(self, premarket: PreMarketData) -> bool:
+    def _should_evaluate_setup2(self, gap: int) -> bool:
         """Check if should evaluate Setup 2: Gap-Up Failure"""
-        return (premarket.gap_pct >= self.strategy_config.setup2_min_gap_pct and
-                self.market_state.breadth_classification in [MarketBreadth.BEARISH, MarketBreadth.NEUTRAL])
+        return self._s2_ok and gap >= self._s2_min_gap
 
-    def _should_evaluate_setup3(self, premarket: PreMarketData) -> bool:
+    def _should_evaluate_setup3(self, gap: int) -> bool:
         """Check if should evaluate Setup 3: Gap-Down Recovery"""
-        return (premarket.gap_pct <= -self.strategy_config.setup3_min_gap_pct and
-                self.market_state.breadth_classification == MarketBreadth.BULLISH)
+        return self._s3_ok and gap <= -self._s3_min_gap
 
-    def _should_evaluate_setup4(self, premarket: PreMarketData) -> bool:
+    def _should_evaluate_setup4(self, gap: int) -> bool:
         """Check if should evaluate Setup 4: Range Breakdown"""
-        return (abs(premarket.gap_pct) < self.strategy_config.setup4_max_gap_pct and
-                self.market_state.breadth_classification == MarketBreadth.NEUTRAL)
+        return self._s4_ok and abs(gap) < self._s4_max_gap
 
-    async def _evaluate_setup1_gap_up_breakout(self, symbol: str, premarket: PreMarketData) -> Optional[MMFSSignal]:
+    async def _evaluate_setup1_gap_up_breakout(self, symbol: str, premarket: PreMarketData,
+                                               confidence: Optional[float] = None) -> Optional[MMFSSignal]:
         """
         Setup 1: Gap-Up Breakout (LONG)
 
@@ -327,40 +548,40 @@ class MMFSStrategy:
         Stop: First candle low
         Target: Previous day high or 1:1.5 RR
         """
-        # Get first candle data
-        if symbol not in self.first_candle_data:
+        # Get first candle data (one unboxing of the whole record)
+        high, low, open_, close, vwap, _volume, volume_ratio, valid = self._fc[self._symbol_index[symbol]].item()
+        if not valid:
             return None
 
-        first_candle = self.first_candle_data[symbol]
-
         # Check VWAP alignment
-        if self.strategy_config.setup1_require_vwap_above:
-            if first_candle['close'] <= first_candle['vwap']:
+        if self._s1_require_vwap:
+            if close <= vwap:
                 return None
 
         # Check rejection wick
-        candle_range = first_candle['high'] - first_candle['low']
+        candle_range = high - low
         if candle_range > 0:
-            upper_wick = first_candle['high'] - max(first_candle['open'], first_candle['close'])
+            upper_wick = high - max(open_, close)
             rejection_pct = (upper_wick / candle_range) * 100
 
-            if rejection_pct > self.strategy_config.setup1_max_rejection_wick_pct:
+            if rejection_pct > self._s1_max_wick:
                 return None
         else:
             return None
 
         # Calculate entry, stop, target
-        entry_price = first_candle['high']
-        stop_loss = first_candle['low']
+        entry_price = high
+        stop_loss = low
 
         # Target: Previous day high or RR-based
-        rr_target = entry_price + (entry_price - stop_loss) * self.strategy_config.risk_reward_ratio
+        rr_target = entry_price + (entry_price - stop_loss) * self._rr
         target_price = min(rr_target, premarket.prev_high)
 
-        # Calculate confidence
-        confidence = self._calculate_setup1_confidence(premarket, first_candle)
+        # Calculate confidence (precomputed by the batch kernel on the vectorized path)
+        if confidence is None:
+            confidence = self._calculate_setup1_confidence(premarket, volume_ratio)
 
-        if confidence < self.strategy_config.min_confidence_setup1:
+        if confidence < self._s1_min_conf:
             return None
 
         # Create signal
@@ -375,46 +596,30 @@ class MMFSStrategy:
             gap_type=premarket.gap_type,
             market_breadth=self.market_state.breadth_classification,
             ad_ratio=self.market_state.ad_ratio,
-            first_candle_high=first_candle['high'],
-            first_candle_low=first_candle['low'],
-            first_candle_close=first_candle['close'],
-            first_candle_vwap=first_candle['vwap'],
+            first_candle_high=high,
+            first_candle_low=low,
+            first_candle_close=close,
+            first_candle_vwap=vwap,
             confidence=confidence,
-            volume_ratio=first_candle.get('volume_ratio', 1.0),
+            volume_ratio=volume_ratio,
             vwap_alignment=True
         )
 
-        logger.info(f" Setup 1 Signal: {symbol} LONG @ {entry_price:.2f} "
-                    f"(Gap: {premarket.gap_pct:+.2f}%, Confidence: {confidence:.0%})")
+        logger.info(" Setup 1 Signal: %s LONG @ %.2f (Gap: %+.2f%%, Confidence: %.0f%%)",
+                    symbol, entry_price, premarket.gap_pct, confidence * 100)
 
         return signal
 
-    def _calculate_setup1_confidence(self, premarket: PreMarketData, first_candle: Dict) -> float:
+    def _calculate_setup1_confidence(self, premarket: PreMarketData, volume_ratio: float) -> float:
         """Calculate confidence score for Setup 1"""
-        score = 0.5  # Base score
-
-        # Gap strength
-        if premarket.gap_pct > 0.5:
-            score += 0.15
-        elif premarket.gap_pct > 0.3:
-            score += 0.10
-
-        # Breadth strength
-        if self.market_state.breadth_strength > 70:
-            score += 0.15
-        elif self.market_state.breadth_strength > 60:
-            score += 0.10
-
-        # Volume confirmation
-        volume_ratio = first_candle.get('volume_ratio', 1.0)
-        if volume_ratio > 2.0:
-            score += 0.10
-        elif volume_ratio > 1.5:
-            score += 0.05
-
-        return min(score, 1.0)
-
-    async def _evaluate_setup2_gap_up_failure(self, symbol: str, premarket: PreMarketData) -> Optional[MMFSSignal]:
+        return setup1_confidence(
+            float(premarket.gap_pct),
+            float(self.market_state.breadth_strength),
+            volume_ratio
+        )
+
+    async def _evaluate_setup2_gap_up_failure(self, symbol: str, premarket: PreMarketData,
+                                              confidence: Optional[float] = None) -> Optional[MMFSSignal]:
         """
         Setup 2: Gap-Up Failure (SHORT)
 
@@ -423,7 +628,8 @@ class MMFSStrategy:
         # TODO: Implement Setup 2 logic
         return None
 
-    async def _evaluate_setup3_gap_down_recovery(self, symbol: str, premarket: PreMarketData) -> Optional[MMFSSignal]:
+    async def _evaluate_setup3_gap_down_recovery(self, symbol: str, premarket: PreMarketData,
+                                                 confidence: Optional[float] = None) -> Optional[MMFSSignal]:
         """
         Setup 3: Gap-Down Recovery (LONG)
 
@@ -432,7 +638,8 @@ class MMFSStrategy:
         # TODO: Implement Setup 3 logic
         return None
 
-    async def _evaluate_setup4_range_breakdown(self, symbol: str, premarket: PreMarketData) -> Optional[MMFSSignal]:
+    async def _evaluate_setup4_range_breakdown(self, symbol: str, premarket: PreMarketData,
+                                               confidence: Optional[float] = None) -> Optional[MMFSSignal]:
         """
         Setup 4: Opening Range Breakdown (Scalp)
 
@@ -443,21 +650,22 @@ class MMFSStrategy:
 
     async def _execute_signal(self, signal: MMFSSignal):
         """Execute MMFS trade signal"""
-        logger.info(f" Executing {signal.setup_type.value} signal for {signal.symbol}")
+        logger.info(" Executing %s signal for %s", signal.setup_type.value, signal.symbol)
 
         # Calculate position size
-        risk_amount = self.strategy_config.portfolio_value * (self.strategy_config.risk_per_trade_pct / 100)
+        risk_amount = self._risk_amount
         price_risk = abs(signal.entry_price - signal.stop_loss)
 
         if price_risk > 0:
             quantity = int(risk_amount / price_risk)
         else:
-            logger.warning(f"Invalid price risk for {signal.symbol}, skipping trade")
+            logger.warning("Invalid price risk for %s, skipping trade", signal.symbol)
             return
 
-        logger.info(f"  Position Size: {quantity} units")
-        logger.info(f"  Risk Amount: ₹{risk_amount:.2f}")
-        logger.info(f"  Entry: {signal.entry_price}, Stop: {signal.stop_loss}, Target: {signal.target_price}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("  Position Size: %d units", quantity)
+            logger.info("  Risk Amount: ₹%.2f", risk_amount)
+            logger.info("  Entry: %s, Stop: %s, Target: %s", signal.entry_price, signal.stop_loss, signal.target_price)
 
         # Create position tracking
         position = MMFSPosition(
@@ -473,7 +681,7 @@ class MMFSStrategy:
             entry_vwap=signal.first_candle_vwap,
             entry_time=datetime.now(),
             entry_minute=signal.signal_minute,
-            max_holding_minutes=self.strategy_config.max_holding_minutes
+            max_holding_minutes=self._max_hold
         )
 
         try:
@@ -487,71 +695,110 @@ class MMFSStrategy:
             # )
             # position.order_id = order_id
 
-            self.positions[signal.symbol] = position
-            logger.info(f" Position opened for {signal.symbol}")
+            slot = len(self._pos_list)
+            if slot == len(self._pos_arr):
+                self._pos_arr = np.resize(self._pos_arr, 2 * slot)
+            self._pos_arr[slot] = (position.entry_price, position.current_stop_loss, position.target_price,
+                                   position.direction, position.quantity, position.entry_price,
+                                   position.entry_monotonic, False)
+            self._pos_index[signal.symbol] = slot
+            self._pos_list.append(position)
+            self._set_position_flag(signal.symbol, True)
+            self._position_opened.set()
+            logger.info(" Position opened for %s", signal.symbol)
 
         except Exception as e:
-            logger.error(f" Error executing signal: {e}")
+            logger.error(" Error executing signal: %s", e)
+
+    @property
+    def positions(self) -> Dict[str, MMFSPosition]:
+        """Snapshot of open positions keyed by symbol"""
+        return {position.symbol: position for position in self._pos_list}
+
+    def _set_position_flag(self, symbol: str, has_position: bool):
+        """Keep the open-position mask in sync with the position list"""
+        i = self._symbol_index.get(symbol)
+        if i is not None:
+            self._has_position[i] = has_position
 
     async def _monitor_positions(self):
         """Monitor active MMFS positions"""
-        current_time = datetime.now()
+        pos_list = self._pos_list
+        n = len(pos_list)
+        if n == 0:
+            return
 
-        for symbol, position in list(self.positions.items()):
+        # One clock read and one batched price fetch shared by every position on this pass
+        now = monotonic()
+        prices = await self.data_service.get_prices([position.symbol for position in pos_list])
+
+        a = self._pos_arr[:n]
+        price_col = a['price']
+        fresh = np.zeros(n, dtype=bool)  # rows priced on this pass
+        for i, position in enumerate(pos_list):
+            current_price = prices.get(position.symbol)
+            if current_price is not None:
+                try:
+                    position.update_price(current_price)
+                    price_col[i] = current_price
+                    fresh[i] = True
+                except Exception as e:
+                    logger.error("Error updating price for %s: %s", position.symbol, e)
+
+        # Exit and breakeven decisions for all positions in one vectorized pass;
+        # the direction sign (+1 long, -1 short) folds both sides into one comparison
+        direction = a['dir']
+        elapsed = now - a['entry_mono']
+        # Price levels are only checked against quotes from this pass, never a stale price
+        time_exit = elapsed >= self._max_hold * 60
+        hit_sl = fresh & (direction * (price_col - a['stop']) <= 0)
+        hit_tgt = fresh & (direction * (price_col - a['target']) >= 0)
+        in_profit = direction * (price_col - a['entry']) > 0
+
+        # One reason code per row, first match wins: time, stop, target (0 = stay in)
+        reason_code = np.select([time_exit, hit_sl, hit_tgt], [1, 2, 3], 0)
+        to_breakeven = (reason_code == 0) & ~a['breakeven'] & (elapsed >= self._be_after * 60) & in_profit
+
+        # Resolve rows to positions before exits reshuffle slots
+        exits = [(pos_list[i], _EXIT_REASONS[reason_code[i]], elapsed[i] / 60, price_col[i])
+                 for i in np.flatnonzero(reason_code)]
+        breakevens = [pos_list[i] for i in np.flatnonzero(to_breakeven)]
+
+        for position, reason, held, price in exits:
             try:
-                # Check holding time
-                holding_duration = position.get_holding_duration()
-
-                # Time-based exit
-                if position.should_exit_by_time():
-                    logger.info(f" Time-based exit for {symbol} (held {holding_duration:.1f}min)")
-                    await self._exit_position(position, "TIME_BASED")
-                    continue
-
-                # Update current price and P&L
-                # Placeholder - fetch actual current price
-                # current_price = await self.data_service.get_current_price(symbol)
-                # position.update_price(current_price)
-
-                # Check stop loss and target
-                # if position.signal_type == SignalType.LONG:
-                #     if current_price <= position.current_stop_loss:
-                #         await self._exit_position(position, "STOP_LOSS")
-                #     elif current_price >= position.target_price:
-                #         await self._exit_position(position, "TARGET")
-
-                # Move to breakeven after configured time
-                if (not position.moved_to_breakeven and
-                        holding_duration >= self.strategy_config.break_even_after_minutes):
-                    if self._should_move_to_breakeven(position):
-                        await self._move_to_breakeven(position)
-
+                if reason == "TIME_BASED":
+                    logger.info(" Time-based exit for %s (held %.1fmin)", position.symbol, held)
+                else:
+                    logger.info(" %s hit for %s at %.2f", reason, position.symbol, price)
+                await self._exit_position(position, reason)
             except Exception as e:
-                logger.error(f"Error monitoring position for {symbol}: {e}")
+                logger.error("Error monitoring position for %s: %s", position.symbol, e)
 
-    def _should_move_to_breakeven(self, position: MMFSPosition) -> bool:
-        """Check if position should be moved to breakeven"""
-        # Check if position is in profit
-        if position.signal_type == SignalType.LONG:
-            return position.current_price > position.entry_price
-        else:
-            return position.current_price < position.entry_price
+        for position in breakevens:
+            try:
+                await self._move_to_breakeven(position)
+            except Exception as e:
+                logger.error("Error monitoring position for %s: %s", position.symbol, e)
 
     async def _move_to_breakeven(self, position: MMFSPosition):
         """Move stop loss to breakeven"""
-        logger.info(f" Moving {position.symbol} to breakeven")
+        logger.info(" Moving %s to breakeven", position.symbol)
 
         position.current_stop_loss = position.entry_price
         position.moved_to_breakeven = True
         position.breakeven_time = datetime.now()
 
+        row = self._pos_arr[self._pos_index[position.symbol]]
+        row['stop'] = position.entry_price
+        row['breakeven'] = True
+
         # Update stop loss order
         # Placeholder - implement actual stop loss modification
         # await self.order_manager.modify_stop_loss(position.sl_order_id, position.entry_price)
 
     async def _exit_position(self, position: MMFSPosition, exit_reason: str):
         """Exit MMFS position"""
-        logger.info(f" Exiting {position.symbol} - Reason: {exit_reason}")
+        logger.info(" Exiting %s - Reason: %s", position.symbol, exit_reason)
 
         # Placeholder - get actual exit price
         exit_price = position.current_price if position.current_price > 0 else position.entry_price
@@ -579,14 +826,21 @@ class MMFSStrategy:
         self.market_state.update_after_trade(trade.net_pnl)
         self.completed_trades.append(trade)
 
-        # Remove position
-        del self.positions[position.symbol]
+        # Remove position: move the last slot into the freed one
+        i = self._pos_index.pop(position.symbol)
+        last = self._pos_list.pop()
+        if i < len(self._pos_list):
+            self._pos_list[i] = last
+            self._pos_index[last.symbol] = i
+            self._pos_arr[i] = self._pos_arr[len(self._pos_list)]
+        self._set_position_flag(position.symbol, False)
 
         # Log trade result
-        result_emoji = "" if trade.is_winner() else "" if trade.is_loser() else "⚖"
-        logger.info(f"{result_emoji} Trade Complete: {trade.symbol} | "
-                    f"P&L: ₹{trade.net_pnl:+,.2f} ({trade.return_pct:+.2f}%) | "
-                    f"Held: {trade.holding_duration_seconds}s")
+        if logger.isEnabledFor(logging.INFO):
+            result_emoji = "" if trade.is_winner() else "" if trade.is_loser() else "⚖"
+            logger.info("%s Trade Complete: %s | P&L: ₹%s (%+.2f%%) | Held: %ss",
+                        result_emoji, trade.symbol, format(trade.net_pnl, '+,.2f'),
+                        trade.return_pct, trade.holding_duration_seconds)
 
         # Check if should stop trading after first loss
         if (self.strategy_config.stop_after_first_loss and
@@ -595,28 +849,6 @@ class MMFSStrategy:
             self.market_state.stop_trading_till_945 = True
             logger.warning(" First trade was a loss. Stopping trading till 9:45 AM")
 
-    # Helper methods
-
-    def _is_premarket_time(self, current_time: time) -> bool:
-        """Check if it's pre-market time"""
-        return time(9, 0) <= current_time < time(9, 15)
-
-    def _is_market_open(self, current_time: time) -> bool:
-        """Check if market is open"""
-        return current_time >= time(9, 15)
-
-    def _is_execution_window(self, current_time: time) -> bool:
-        """Check if in execution window (9:15-9:20)"""
-        return time(9, 15) <= current_time < time(9, 20)
-
-    def _is_first_candle_time(self, current_time: time) -> bool:
-        """Check if tracking first candle"""
-        return time(9, 15) <= current_time <= time(9, 16)
-
-    def _is_signal_generation_time(self, current_time: time) -> bool:
-        """Check if time to generate signals"""
-        return time(9, 16) <= current_time < time(9, 20)
-
     async def stop(self):
         """Stop MMFS strategy"""
         logger.info("=" * 80)
@@ -624,14 +856,20 @@ class MMFSStrategy:
         self.is_running = False
 
         # Close any open positions
-        for symbol in list(self.positions.keys()):
-            await self._exit_position(self.positions[symbol], "STRATEGY_STOP")
+        while self._pos_list:
+            await self._exit_position(self._pos_list[-1], "STRATEGY_STOP")
 
         # Stop breadth service
-        if hasattr(self.breadth_service, 'stop'):
+        if hasattr(self.breadth_service, 'aclose'):
+            await self.breadth_service.aclose()
+            logger.info(" Market breadth service stopped")
+        elif hasattr(self.breadth_service, 'stop'):
             self.breadth_service.stop()
             logger.info(" Market breadth service stopped")
 
+        # Stop order updates
+        await self.order_manager.close()
+
         # Print final metrics
         self._print_final_metrics()
 
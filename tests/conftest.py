@@ -0,0 +1,13 @@
+# tests/conftest.py
+
+"""
+Shared pytest setup: make the project root importable for every test module
+"""
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = str(Path(__file__).resolve().parent.parent)
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,110 @@
+# tests/test_auth_helper.py
+
+"""
+Unit tests for token expiry, token storage and unattended token refresh
+"""
+
+import base64
+import json
+import time
+
+import pytest
+
+from utils import enhanced_auth_helper
+from utils.enhanced_auth_helper import FyersAuthManager
+
+
+def _jwt(exp: float) -> str:
+    """Unsigned JWT carrying only an exp claim"""
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).rstrip(b'=').decode()
+    return f"header.{payload}.signature"
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def auth(monkeypatch, tmp_path):
+    """Auth manager writing its .env into a temp dir, with prompts disabled"""
+    monkeypatch.chdir(tmp_path)
+    for key in ('FYERS_ACCESS_TOKEN', 'FYERS_REFRESH_TOKEN', 'FYERS_PIN'):
+        monkeypatch.delenv(key, raising=False)
+
+    def no_prompt(*args, **kwargs):
+        raise AssertionError("unexpected prompt")
+
+    monkeypatch.setattr('builtins.input', no_prompt)
+    monkeypatch.setattr(enhanced_auth_helper.getpass, 'getpass', no_prompt)
+    return FyersAuthManager()
+
+
+def test_get_token_expiry_reads_jwt_exp():
+    assert FyersAuthManager.get_token_expiry(_jwt(1700000000)) == 1700000000.0
+
+
+@pytest.mark.parametrize("token", [None, "", "not-a-jwt", "a.!!!.c"])
+def test_get_token_expiry_unreadable(token):
+    assert FyersAuthManager.get_token_expiry(token) is None
+
+
+def test_store_tokens_updates_cached_state(auth, tmp_path):
+    token = _jwt(time.time() + 3600)
+
+    assert auth._store_tokens(token, "refresh-1")
+
+    assert auth.access_token == token
+    assert auth.refresh_token == "refresh-1"
+    assert 0 < auth.seconds_until_refresh() <= 3600
+    assert f"FYERS_ACCESS_TOKEN={token}" in (tmp_path / '.env').read_text()
+
+
+def test_refresh_without_pin_does_not_prompt(auth):
+    auth.refresh_token = "refresh-1"
+
+    assert auth.refresh_access_token() is None
+
+
+def test_refresh_with_rejected_pin_does_not_prompt(auth, monkeypatch):
+    auth.refresh_token = "refresh-1"
+    auth.pin = "1234"
+    monkeypatch.setattr(enhanced_auth_helper.requests, 'post',
+                        lambda *args, **kwargs: FakeResponse({'s': 'error', 'message': 'Invalid PIN'}))
+
+    assert auth.refresh_access_token() is None
+    assert auth.refresh_token == "refresh-1"
+
+
+def test_refresh_stores_new_tokens(auth, monkeypatch):
+    token = _jwt(time.time() + 3600)
+    auth.refresh_token = "refresh-1"
+    auth.pin = "1234"
+    monkeypatch.setattr(enhanced_auth_helper.requests, 'post',
+                        lambda *args, **kwargs: FakeResponse({'s': 'ok', 'access_token': token,
+                                                              'refresh_token': "refresh-2"}))
+
+    assert auth.refresh_access_token() == token
+    assert auth.access_token == token
+    assert auth.refresh_token == "refresh-2"
+    assert auth.seconds_until_refresh() > 0
+
+
+def test_full_authentication_updates_cached_tokens(auth, monkeypatch):
+    token = _jwt(time.time() + 3600)
+    auth.client_id, auth.secret_key, auth.pin = "APP-100", "secret", "1234"
+    monkeypatch.setattr('builtins.input', lambda prompt='': "auth-code")
+    monkeypatch.setattr(auth, 'get_tokens_from_auth_code', lambda code: (token, "refresh-1"))
+    monkeypatch.setattr(auth, 'is_token_valid', lambda access_token: True)
+    monkeypatch.setattr(enhanced_auth_helper.requests, 'get',
+                        lambda *args, **kwargs: FakeResponse({'s': 'error'}))
+
+    assert auth.setup_full_authentication() == token
+    assert auth.access_token == token
+    assert auth.refresh_token == "refresh-1"
+    assert auth.seconds_until_refresh() > 0
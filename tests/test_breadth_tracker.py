@@ -0,0 +1,210 @@
+# tests/test_breadth_tracker.py
+
+"""
+Unit tests for the WebSocket breadth tracker (no socket is opened)
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.fyers_breadth_websocket import FyersWebSocketBreadthTracker
+
+
+class FakeSocket:
+    """SDK data socket stub; close_connection fires on_close synchronously like the SDK"""
+
+    def __init__(self, tracker):
+        self.tracker = tracker
+        self.connects = 0
+        self.closed = False
+
+    def connect(self):
+        self.connects += 1
+
+    def close_connection(self):
+        self.closed = True
+        self.tracker.on_close("closed")
+
+    def subscribe(self, symbols, data_type):
+        pass
+
+
+def _wait_for(condition, timeout: float = 2.0):
+    """Poll until condition() holds (reconnects run on their own thread)"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = FyersWebSocketBreadthTracker("token", "APP-100", use_quick_basket=True)
+    sockets = []
+
+    def build_socket():
+        sockets.append(FakeSocket(tracker))
+        return sockets[-1]
+
+    monkeypatch.setattr(tracker, '_build_socket', build_socket)
+    tracker.sockets = sockets
+    tracker.ws = build_socket()
+    yield tracker
+    tracker.is_running = False
+    if tracker._reconnect_timer is not None:
+        tracker._reconnect_timer.cancel()
+
+
+def test_token_refresh_reconnects_once(tracker):
+    tracker.is_running = True
+    old_socket = tracker.ws
+
+    tracker.update_access_token("new-token")
+    _wait_for(lambda: len(tracker.sockets) == 2 and tracker.ws.connects == 1)
+
+    assert tracker.access_token == "APP-100:new-token"
+    assert old_socket.closed
+    assert tracker.ws is tracker.sockets[-1] and tracker.ws.connects == 1
+    assert len(tracker.sockets) == 2
+    assert tracker._reconnect_timer is None
+    assert tracker._reconnect_attempt == 0
+
+
+def test_unexpected_close_schedules_reconnect(tracker):
+    tracker.is_running = True
+
+    tracker.on_close("dropped")
+
+    assert tracker._reconnect_timer is not None
+    assert tracker._reconnect_attempt == 1
+
+
+def test_recalculate_breadth_counts_moves_beyond_threshold(tracker):
+    s0, s1, s2, s3 = tracker.symbols[:4]
+    tracker.set_previous_closes({s0: 100.0, s1: 100.0, s2: 100.0})
+
+    for symbol, ltp in ((s0, 101.0), (s1, 99.0), (s2, 100.05), (s3, 50.0)):
+        assert tracker._apply_tick({'symbol': symbol, 'ltp': ltp})
+    tracker._recalculate_breadth()
+
+    data = tracker.get_breadth_data()
+    assert (data['advances'], data['declines'], data['unchanged'], data['total']) == (1, 1, 1, 3)
+    assert data['ad_ratio'] == 1.0
+    assert data['symbols_tracked'] == 4  # s3 has a price but no previous close
+    assert tracker.last_update_mono is not None
+
+
+def test_recalculate_breadth_waits_for_previous_closes(tracker):
+    tracker._apply_tick({'symbol': tracker.symbols[0], 'ltp': 101.0})
+    tracker._recalculate_breadth()
+
+    assert tracker.last_update_mono is None
+    assert tracker.get_breadth_data()['total'] == 0
+
+
+def test_apply_tick_ignores_unusable_messages(tracker):
+    assert not tracker._apply_tick({'symbol': tracker.symbols[0]})
+    assert not tracker._apply_tick({'ltp': 101.0})
+    assert not tracker._apply_tick(b'not json')
+    assert tracker.error_count == 1
+    assert tracker._apply_tick(b'{"symbol": "%s", "ltp": 101.0}' % tracker.symbols[0].encode())
+
+
+def test_enqueue_drops_oldest_tick_when_full(tracker):
+    async def run():
+        tracker._tick_queue = asyncio.Queue(maxsize=2)
+        for ltp in (1.0, 2.0, 3.0):
+            tracker._enqueue_tick({'symbol': tracker.symbols[0], 'ltp': ltp})
+        return [tracker._tick_queue.get_nowait()['ltp'] for _ in range(2)]
+
+    assert asyncio.run(run()) == [2.0, 3.0]
+    assert tracker.dropped_count == 1
+
+
+def test_process_ticks_recalculates_once_per_batch(tracker, monkeypatch):
+    tracker.set_previous_closes({symbol: 100.0 for symbol in tracker.symbols})
+    tracker.batch_size = 2
+    publishes = []
+    monkeypatch.setattr(tracker, '_publish_update', lambda: publishes.append(tracker.message_count))
+
+    async def run():
+        tracker._tick_queue = asyncio.Queue()
+        tracker._stop_evt = asyncio.Event()
+        for symbol in tracker.symbols[:5]:
+            tracker._enqueue_tick({'symbol': symbol, 'ltp': 101.0})
+        task = asyncio.create_task(tracker._process_ticks())
+        await asyncio.sleep(0)
+        tracker._signal_stop()
+        await asyncio.wait_for(task, 1)
+
+    asyncio.run(run())
+
+    assert publishes == [2, 4, 5]
+
+
+def test_reconnect_delay_is_capped_exponential(tracker, monkeypatch):
+    monkeypatch.setattr('services.fyers_breadth_websocket.random.uniform', lambda low, high: high)
+
+    delays = []
+    for attempt in (0, 1, 3, 20):
+        tracker._reconnect_attempt = attempt
+        delays.append(tracker._get_reconnect_delay())
+
+    assert delays == [1, 2, 8, tracker._max_backoff]
+
+
+def test_pending_reconnect_is_not_rescheduled(tracker, monkeypatch):
+    monkeypatch.setattr(tracker, '_get_reconnect_delay', lambda: 60.0)
+    tracker.is_running = True
+
+    tracker.on_close("dropped")
+    timer = tracker._reconnect_timer
+    tracker.on_close("dropped again")
+
+    assert tracker._reconnect_timer is timer
+    assert tracker._reconnect_attempt == 1
+
+
+def test_live_tick_resets_backoff(tracker):
+    tracker._reconnect_attempt = 4
+
+    tracker._apply_tick({'symbol': tracker.symbols[0], 'ltp': 101.0})
+
+    assert tracker._reconnect_attempt == 0
+
+
+@pytest.mark.parametrize("silent_for, market_open, expected", [
+    (FyersWebSocketBreadthTracker.STALE_FEED_SECONDS + 1, True, True),
+    (1, True, False),
+    (FyersWebSocketBreadthTracker.STALE_FEED_SECONDS + 1, False, False),
+])
+def test_is_stale(tracker, monkeypatch, silent_for, market_open, expected):
+    monkeypatch.setattr('services.fyers_breadth_websocket.is_market_open', lambda: (market_open, ""))
+    tracker.is_connected = True
+    tracker._last_tick_ts = time.monotonic() - silent_for
+
+    assert tracker.is_stale is expected
+
+
+def test_watchdog_reconnects_stalled_feed(tracker, monkeypatch):
+    monkeypatch.setattr('services.fyers_breadth_websocket.is_market_open', lambda: (True, ""))
+    monkeypatch.setattr(tracker, '_get_reconnect_delay', lambda: 60.0)
+    tracker.is_running = True
+    tracker.is_connected = True
+    tracker._last_tick_ts = time.monotonic() - tracker.STALE_FEED_SECONDS - 1
+    stalled = tracker.ws
+
+    watchdog = threading.Thread(target=tracker._watch_feed, daemon=True)
+    watchdog.start()
+    try:
+        _wait_for(lambda: tracker._reconnect_timer is not None, timeout=3)
+    finally:
+        tracker._watchdog_stop.set()
+        watchdog.join(timeout=2)
+
+    assert stalled.closed
+    assert not tracker.is_connected
+    assert tracker._reconnect_attempt == 1
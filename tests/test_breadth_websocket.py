@@ -2,17 +2,21 @@
 
 """
 Test script for WebSocket-based market breadth tracking
+
+Run from the project root: python -m tests.test_breadth_websocket
+(pytest picks up the project root from tests/conftest.py)
+
+The monitoring loop writes rows to stdout and flushes once per wait;
+run with python -u (or PYTHONUNBUFFERED=1) for per-row output.
 """
 
+import asyncio
 import os
 import sys
 import time
 import logging
 from dotenv import load_dotenv
 
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from services.hybrid_breadth_service import HybridMarketBreadthService
 from fyers_apiv3 import fyersModel
 
@@ -27,6 +31,11 @@ logger = logging.getLogger(__name__)
 
 def test_hybrid_breadth_service():
     """Test hybrid breadth service with WebSocket"""
+    return asyncio.run(_run_hybrid_breadth_test())
+
+
+async def _run_hybrid_breadth_test():
+    """Run the hybrid breadth check on an event loop (the tracker processes ticks on it)"""
 
     print("=" * 80)
     print(" HYBRID MARKET BREADTH SERVICE TEST")
@@ -59,11 +68,12 @@ def test_hybrid_breadth_service():
             access_token=access_token,
             client_id=client_id,
             use_quick_basket=True,
-            enable_websocket=True
+            enable_websocket=True,
+            ws_batch_size=64
         )
 
         # Initialize
-        if not breadth_service.initialize():
+        if not await breadth_service.initialize():
             print(" Initialization failed")
             return False
 
@@ -75,49 +85,57 @@ def test_hybrid_breadth_service():
 
         start_time = time.time()
         update_count = 0
+        out = sys.stdout.write
 
         try:
             while time.time() - start_time < 30:
                 # Get breadth summary
                 summary = breadth_service.get_breadth_summary()
 
-                if summary.get('available'):
+                if summary.available:
                     update_count += 1
 
-                    source = "WS" if summary.get('websocket_active') else "REST"
+                    source = "WS" if summary.websocket_active else "REST"
 
-                    print(f"[{update_count:3d}] [{source:4s}] "
-                          f"Breadth: {summary['classification']:8s} | "
-                          f"A/D: {summary['ad_ratio']:5.2f} | "
-                          f"Adv: {summary['advances']:2d} ({summary['advance_pct']:4.1f}%) | "
-                          f"Dec: {summary['declines']:2d} ({summary['decline_pct']:4.1f}%)")
+                    out(f"[{update_count:3d}] [{source:4s}] "
+                        f"Breadth: {summary.classification:8s} | "
+                        f"A/D: {summary.ad_ratio:5.2f} | "
+                        f"Adv: {summary.advances:2d} ({summary.advance_pct:4.1f}%) | "
+                        f"Dec: {summary.declines:2d} ({summary.decline_pct:4.1f}%)\n")
                 else:
-                    print(f"[{update_count:3d}] ERROR: {summary.get('error')}")
+                    out(f"[{update_count:3d}] ERROR: {summary.error}\n")
 
-                time.sleep(2)  # Update every 2 seconds
+                # Flush buffered rows, then wake on the next WebSocket update (at most every 2 seconds)
+                sys.stdout.flush()
+                await asyncio.to_thread(breadth_service.wait_for_update, 2.0)
 
         except KeyboardInterrupt:
             print("\n\n Test interrupted by user")
 
-        # Get final statistics
-        print(f"\n" + "=" * 80)
-        print(" STATISTICS")
-        print("=" * 80)
-
+        # Get final statistics, written in one call
         stats = breadth_service.get_statistics()
-        print(f"WebSocket Enabled: {stats['websocket_enabled']}")
-        print(f"Using WebSocket Data: {stats['using_websocket_data']}")
+        lines = [
+            "\n" + "=" * 80,
+            " STATISTICS",
+            "=" * 80,
+            f"WebSocket Enabled: {stats['websocket_enabled']}",
+            f"Using WebSocket Data: {stats['using_websocket_data']}"
+        ]
 
         if 'websocket_stats' in stats:
             ws_stats = stats['websocket_stats']
-            print(f"\nWebSocket Statistics:")
-            print(f"  Connected: {ws_stats['is_connected']}")
-            print(f"  Messages Received: {ws_stats['message_count']}")
-            print(f"  Errors: {ws_stats['error_count']}")
-            print(f"  Symbols Tracked: {ws_stats['symbols_tracked']}/{ws_stats['total_symbols']}")
+            lines += [
+                "\nWebSocket Statistics:",
+                f"  Connected: {ws_stats['is_connected']}",
+                f"  Messages Received: {ws_stats['message_count']}",
+                f"  Errors: {ws_stats['error_count']}",
+                f"  Symbols Tracked: {ws_stats['symbols_tracked']}/{ws_stats['total_symbols']}"
+            ]
+
+        sys.stdout.write("\n".join(lines) + "\n")
 
         # Stop service
-        breadth_service.stop()
+        await breadth_service.aclose()
         print(f"\n Service stopped cleanly")
 
         return True
@@ -0,0 +1,64 @@
+# tests/test_data_service.py
+
+"""
+Unit tests for batched, rate-limited quote fetching in DataService
+"""
+
+import asyncio
+import time
+
+from services.data_service import DataService
+from utils.rate_limiter import AsyncRateLimiter
+
+
+class FakeFyers:
+    """Fyers client stub answering every quotes call with a last price per symbol"""
+
+    def __init__(self):
+        self.quote_calls = []
+
+    def quotes(self, data):
+        symbols = data['symbols'].split(',')
+        self.quote_calls.append(symbols)
+        return {'s': 'ok', 'd': [{'n': symbol, 'v': {'lp': 100.0 + i}} for i, symbol in enumerate(symbols)]}
+
+
+def _symbols(count):
+    return [f"NSE:S{i}-EQ" for i in range(count)]
+
+
+def test_get_quotes_batches_symbols():
+    fyers = FakeFyers()
+    service = DataService(fyers)
+
+    quotes = asyncio.run(service.get_quotes(_symbols(120)))
+
+    assert [len(batch) for batch in fyers.quote_calls] == [50, 50, 20]
+    assert len(quotes) == 120
+    assert quotes["NSE:S50-EQ"]['last_price'] == 100.0
+
+
+def test_get_quotes_publishes_ticks_to_registered_symbols():
+    service = DataService(FakeFyers())
+    seen = []
+
+    async def on_tick(symbol, quote):
+        seen.append((symbol, quote['last_price']))
+
+    service.on_tick("NSE:S1-EQ", on_tick)
+    asyncio.run(service.get_quotes(_symbols(3)))
+
+    assert seen == [("NSE:S1-EQ", 101.0)]
+
+
+def test_get_quotes_calls_are_rate_limited():
+    fyers = FakeFyers()
+    service = DataService(fyers)
+    service._rate_limiter = AsyncRateLimiter(rate=20, capacity=1)
+
+    start = time.monotonic()
+    asyncio.run(service.get_quotes(_symbols(150)))
+
+    # Three batches: the first starts at once, the next two wait 1/20 s each
+    assert len(fyers.quote_calls) == 3
+    assert time.monotonic() - start >= 0.09
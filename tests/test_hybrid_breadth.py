@@ -0,0 +1,105 @@
+# tests/test_hybrid_breadth.py
+
+"""
+Unit tests for the hybrid (REST + WebSocket) breadth service
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from config.mmfs_config import MMFSStrategyConfig, MMFSTradingConfig, MarketBreadth
+from services.data_service import DataService
+from services.hybrid_breadth_service import HybridMarketBreadthService
+from strategy.mmfs_strategy import MMFSStrategy
+
+
+class FakeFyers:
+    """Fyers client stub: the first `advancing` basket symbols are up 1%, the rest down 1%"""
+
+    def __init__(self, advancing: int):
+        self.advancing = advancing
+
+    def quotes(self, data):
+        symbols = data['symbols'].split(',')
+        return {'s': 'ok', 'd': [
+            {'n': symbol, 'v': {'lp': 101.0, 'prev_close_price': 100.0, 'chp': 1.0 if i < self.advancing else -1.0}}
+            for i, symbol in enumerate(symbols)
+        ]}
+
+
+def _hybrid(advancing: int, enable_websocket: bool = False) -> HybridMarketBreadthService:
+    return HybridMarketBreadthService(FakeFyers(advancing), "token", "APP-100",
+                                      use_quick_basket=True, enable_websocket=enable_websocket)
+
+
+def test_snapshot_from_rest():
+    service = _hybrid(advancing=10)
+    basket = len(service.rest_service.symbols)
+
+    snapshot = service.get_breadth_snapshot()
+
+    assert snapshot.ratio == pytest.approx(10 / (basket - 10))
+    assert snapshot.classification == service.get_breadth_summary().classification
+    assert snapshot.score == pytest.approx(service.get_breadth_strength_score())
+
+
+def test_snapshot_from_live_websocket():
+    service = _hybrid(advancing=10, enable_websocket=True)
+    tracker = service.ws_tracker
+    service.use_websocket_data = True
+    tracker.is_connected = True
+    tracker._last_tick_ts = time.monotonic()
+    tracker.advances, tracker.declines = 3, 6
+
+    snapshot = service.get_breadth_snapshot()
+
+    assert snapshot.ratio == 0.5
+    assert snapshot.classification == "BEARISH" and snapshot.is_bearish
+    assert snapshot.score == pytest.approx(tracker.get_breadth_strength_score())
+
+
+def test_initialize_without_websocket_never_builds_tracker():
+    service = _hybrid(advancing=10)
+
+    assert asyncio.run(service.initialize())
+    service.get_breadth_summary()
+
+    assert service._ws_tracker is None
+    assert not service.use_websocket_data
+
+
+def test_summary_json_is_built_on_demand():
+    service = _hybrid(advancing=10)
+
+    summary = service.get_breadth_summary()
+    assert service._summary_json_bytes is None
+
+    payload = service.get_breadth_summary_bytes()
+    assert json.loads(payload)['classification'] == summary.classification
+    assert service.get_breadth_summary_bytes() is payload
+
+
+class CountingHybrid(HybridMarketBreadthService):
+    """Hybrid service counting snapshot requests"""
+
+    __slots__ = ('snapshots',)
+
+    def get_breadth_snapshot(self):
+        self.snapshots += 1
+        return super().get_breadth_snapshot()
+
+
+def test_strategy_breadth_update_uses_snapshot():
+    service = CountingHybrid(FakeFyers(12), "token", "APP-100", use_quick_basket=True, enable_websocket=False)
+    service.snapshots = 0
+    strategy = MMFSStrategy(MMFSStrategyConfig(), MMFSTradingConfig(), DataService(FakeFyers(12)),
+                            None, service, ['NSE:A-EQ'])
+
+    asyncio.run(strategy._update_market_breadth())
+
+    assert service.snapshots == 1
+    assert strategy.market_state.breadth_classification is MarketBreadth.BULLISH
+    assert strategy.market_state.breadth_strength == pytest.approx(service.get_breadth_strength_score())
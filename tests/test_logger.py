@@ -0,0 +1,79 @@
+# tests/test_logger.py
+
+"""
+Unit tests for the queued console/file logger
+"""
+
+import logging
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from utils import logger as logger_module
+from utils.logger import setup_logger, shutdown_logger
+
+
+@pytest.fixture
+def log_dir(monkeypatch, tmp_path):
+    """Point the dated log file at a temp dir and stop listeners afterwards"""
+    monkeypatch.setattr(logger_module, '_LOG_DIR', tmp_path / 'logs')
+    logger_module._log_file_for.cache_clear()
+    yield tmp_path / 'logs'
+    shutdown_logger()
+    logger_module._log_file_for.cache_clear()
+
+
+def _read_log(log_dir) -> str:
+    files = list(log_dir.glob('*.log'))
+    return files[0].read_text() if files else ""
+
+
+def test_file_log_is_written_without_waiting_for_shutdown(log_dir):
+    log = setup_logger('test_logger_prompt', log_to_file=True)
+
+    log.info("order %s placed", "ABC")
+
+    deadline = time.monotonic() + 2
+    while "order ABC placed" not in _read_log(log_dir):
+        assert time.monotonic() < deadline, "INFO record not written to the file log"
+        time.sleep(0.01)
+
+
+def test_file_log_uses_configured_format(log_dir):
+    log = setup_logger('test_logger_format', log_to_file=True)
+
+    log.warning("breadth stale")
+    shutdown_logger()
+
+    line = _read_log(log_dir).strip()
+    assert line.endswith(" - test_logger_format - WARNING - breadth stale")
+    time.strptime(line[:19], '%Y-%m-%d %H:%M:%S')
+
+
+def test_setup_logger_is_idempotent(log_dir):
+    first = setup_logger('test_logger_once', log_to_file=True)
+    handlers = list(first.handlers)
+
+    assert setup_logger('test_logger_once', log_to_file=True) is first
+    assert first.handlers == handlers
+
+
+
+def test_import_leaves_record_fields_alone():
+    code = "import logging, utils.logger; print(logging.logThreads, logging.logProcesses)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent, check=True)
+
+    assert result.stdout.split() == ["True", "True"]
+
+
+def test_setup_logger_skips_thread_and_process_fields(log_dir, monkeypatch):
+    monkeypatch.setattr(logging, 'logThreads', True)
+    monkeypatch.setattr(logging, 'logProcesses', True)
+
+    setup_logger('test_logger_fields', log_to_file=False)
+
+    assert not logging.logThreads and not logging.logProcesses
@@ -0,0 +1,148 @@
+# tests/test_market_breadth.py
+
+"""
+Unit tests for breadth classification, NSE breadth parsing and the simulated breadth summary
+"""
+
+from dataclasses import replace
+
+import pytest
+
+from config.mmfs_config import (
+    MarketBreadth, BREADTH_BULL_THRESHOLD, BREADTH_BEAR_THRESHOLD,
+    classify_breadth, classify_market_breadth
+)
+from models.mmfs_models import BreadthSummary
+from services.market_breadth_service import MarketBreadthService, SimulatedMarketBreadthService
+
+
+@pytest.mark.parametrize("ad_ratio, expected", [
+    (BREADTH_BULL_THRESHOLD, "BULLISH"),
+    (BREADTH_BULL_THRESHOLD + 1e-9, "BULLISH"),
+    (BREADTH_BULL_THRESHOLD - 1e-9, "NEUTRAL"),
+    (1.0, "NEUTRAL"),
+    (BREADTH_BEAR_THRESHOLD + 1e-9, "NEUTRAL"),
+    (BREADTH_BEAR_THRESHOLD, "BEARISH"),
+    (0.0, "BEARISH"),
+])
+def test_classify_breadth_boundaries(ad_ratio, expected):
+    assert classify_breadth(ad_ratio) == expected
+
+
+def test_classify_breadth_custom_threshold():
+    assert classify_breadth(2.0, bull_threshold=2.0) == "BULLISH"
+    assert classify_breadth(1.9, bull_threshold=2.0) == "NEUTRAL"
+    assert classify_breadth(0.5, bull_threshold=2.0) == "BEARISH"
+    assert classify_breadth(0.6, bull_threshold=2.0) == "NEUTRAL"
+
+
+def test_classify_market_breadth_member():
+    assert classify_market_breadth(3.0) is MarketBreadth.BULLISH
+    assert classify_market_breadth(1.0) is MarketBreadth.NEUTRAL
+    assert classify_market_breadth(0.2) is MarketBreadth.BEARISH
+
+
+@pytest.fixture
+def nse_service():
+    return MarketBreadthService()
+
+
+def test_parse_nse_breadth_counts_signs(nse_service):
+    rows = [{'pChange': 1.2}, {'pChange': -0.4}, {'pChange': 0.0}, {'pChange': None}, {'pChange': 3.0}]
+
+    data = nse_service._parse_nse_breadth_data({'data': rows})
+
+    assert (data['advances'], data['declines'], data['unchanged'], data['total']) == (2, 1, 2, 5)
+
+
+def test_parse_nse_breadth_uses_change_field(nse_service):
+    rows = [{'change': -2.0}, {'change': -1.0}, {'change': 0.5}]
+
+    data = nse_service._parse_nse_breadth_data({'data': rows})
+
+    assert (data['advances'], data['declines'], data['unchanged']) == (1, 2, 0)
+
+
+@pytest.mark.parametrize("payload", [{}, {'data': []}, {'data': [{'pChange': 0.0}]}, {'data': {'rows': 1}}])
+def test_parse_nse_breadth_without_moves(nse_service, payload):
+    assert nse_service._parse_nse_breadth_data(payload) is None
+
+
+def test_parse_nse_breadth_mixed_row_layouts(nse_service):
+    # First row decides nothing on its own: later rows carry only the other field
+    rows = [{'pChange': 1.0}, {'change': -1.0}, {'change': 2.0, 'pChange': -0.5}, {'symbol': 'X'}]
+
+    data = nse_service._parse_nse_breadth_data({'data': rows})
+
+    assert (data['advances'], data['declines'], data['unchanged'], data['total']) == (1, 2, 0, 3)
+
+
+def test_parse_nse_breadth_prefers_pchange_per_row(nse_service):
+    rows = [{'change': 1.0}, {'change': 1.0, 'pChange': -1.0}]
+
+    data = nse_service._parse_nse_breadth_data({'data': rows})
+
+    assert (data['advances'], data['declines']) == (1, 1)
+
+
+@pytest.mark.parametrize("ad_ratio, score", [(0.1, 0.0), (0.33, 0.0), (1.0, 50.0), (2.0, 75.0), (3.0, 100.0), (9.0, 100.0)])
+def test_strength_score_piecewise_linear(ad_ratio, score):
+    assert MarketBreadthService._strength_score(ad_ratio) == pytest.approx(score)
+
+
+def test_tracker_strength_score_matches_service():
+    from services.fyers_breadth_websocket import FyersWebSocketBreadthTracker
+
+    tracker = FyersWebSocketBreadthTracker("token", "APP-100")
+    for advances, declines in ((30, 10), (10, 10), (7, 13), (1, 40)):
+        tracker.advances, tracker.declines = advances, declines
+        expected = MarketBreadthService._strength_score(max(advances, 1) / max(declines, 1))
+        assert tracker.get_breadth_strength_score() == expected
+
+
+def test_breadth_summary_supports_dict_style_access():
+    summary = BreadthSummary(available=True, advances=120, declines=80, ad_ratio=1.5, classification="BULLISH")
+
+    assert summary['advances'] == 120 and summary.get('classification') == "BULLISH"
+    assert summary.get('missing', 'default') == 'default'
+    assert 'ad_ratio' in summary and 'missing' not in summary
+    assert summary.to_dict()['declines'] == 80
+    with pytest.raises(KeyError):
+        summary['missing']
+
+    unavailable = BreadthSummary.unavailable("no data")
+    assert not unavailable['available'] and unavailable.get('error') == "no data"
+
+
+def test_simulated_summary_is_a_fresh_copy():
+    service = SimulatedMarketBreadthService(simulated_advances=150, simulated_declines=50)
+
+    first = service.get_breadth_summary()
+    first.advances = -1
+    second = service.get_breadth_summary()
+
+    assert first is not second
+    assert second.advances == 150
+    assert second.classification == "BULLISH"
+    assert second.timestamp is not None
+    assert service._cached_summary.timestamp is None
+
+
+def test_simulated_summary_follows_new_values():
+    service = SimulatedMarketBreadthService()
+    service.set_simulated_breadth(advances=40, declines=160)
+
+    summary = service.get_breadth_summary()
+
+    assert summary.is_bearish and not summary.is_bullish
+    assert summary.ad_ratio == pytest.approx(0.25)
+
+
+@pytest.mark.parametrize("advances, declines", [(120, 80), (40, 160), (100, 0), (0, 100), (0, 0), (99, 66)])
+def test_simulated_summary_matches_fetch_based_summary(advances, declines):
+    service = SimulatedMarketBreadthService(simulated_advances=advances, simulated_declines=declines)
+
+    expected = MarketBreadthService.get_breadth_summary(service)
+    summary = service.get_breadth_summary()
+
+    assert replace(summary, timestamp=None) == replace(expected, timestamp=None)
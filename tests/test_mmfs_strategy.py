@@ -0,0 +1,165 @@
+# tests/test_mmfs_strategy.py
+
+"""
+Unit tests for MMFS position monitoring (exit masks and position slot bookkeeping)
+"""
+
+import asyncio
+from time import monotonic
+
+import pytest
+
+from config.mmfs_config import MMFSStrategyConfig, MMFSTradingConfig, MarketBreadth, MMFSSetupType
+from config.settings import SignalType
+from models.mmfs_models import BreadthSummary, MMFSSignal
+from services.data_service import DataService
+from strategy.mmfs_strategy import MMFSStrategy
+
+
+class FakeFyers:
+    """Fyers client stub quoting the last price set in `prices` (unknown symbols are omitted)"""
+
+    def __init__(self):
+        self.prices = {}
+
+    def history(self, data):
+        # Two daily candles (epoch, open, high, low, close, volume); the last is the previous day
+        return {'s': 'ok', 'candles': [[0, 99.0, 101.0, 98.0, 100.0, 1000], [0, 100.0, 102.0, 99.0, 100.0, 1000]]}
+
+    def quotes(self, data):
+        symbols = [symbol for symbol in data['symbols'].split(',') if symbol in self.prices]
+        return {'s': 'ok', 'd': [{'n': symbol, 'v': {'lp': self.prices[symbol]}} for symbol in symbols]}
+
+
+class FakeBreadth:
+    def get_breadth_summary(self):
+        return BreadthSummary.unavailable('not used')
+
+
+class FakeOrderManager:
+    async def close(self):
+        pass
+
+
+def _signal(symbol: str, signal_type: SignalType) -> MMFSSignal:
+    """Entry at 100 with a 1-point stop and a 2-point target on the signal's side"""
+    sign = 1 if signal_type == SignalType.LONG else -1
+    return MMFSSignal(
+        symbol=symbol, setup_type=MMFSSetupType.GAP_UP_BREAKOUT, signal_type=signal_type,
+        entry_price=100.0, stop_loss=100.0 - sign, target_price=100.0 + 2 * sign,
+        gap_pct=1.0, gap_type=None, market_breadth=MarketBreadth.BULLISH, ad_ratio=1.0,
+        first_candle_high=101.0, first_candle_low=99.0, first_candle_close=100.0, first_candle_vwap=100.0,
+        confidence=1.0, volume_ratio=1.0, vwap_alignment=True
+    )
+
+
+@pytest.fixture
+def strategy():
+    symbols = ['A', 'B', 'C', 'D', 'E']
+    fyers = FakeFyers()
+    strategy = MMFSStrategy(MMFSStrategyConfig(max_trades_per_day=1), MMFSTradingConfig(),
+                            DataService(fyers), FakeOrderManager(), FakeBreadth(), symbols)
+    strategy.fyers = fyers
+    return strategy
+
+
+def _open(strategy, positions):
+    async def run():
+        for symbol, signal_type in positions:
+            await strategy._execute_signal(_signal(symbol, signal_type))
+    asyncio.run(run())
+
+
+def _assert_slots_aligned(strategy):
+    n = len(strategy._pos_list)
+    rows = strategy._pos_arr[:n]
+    for i, position in enumerate(strategy._pos_list):
+        assert strategy._pos_index[position.symbol] == i
+        assert rows[i]['entry'] == position.entry_price
+        assert rows[i]['stop'] == position.current_stop_loss
+        assert rows[i]['target'] == position.target_price
+    assert len(strategy._pos_index) == n
+
+
+def test_positions_grow_past_initial_capacity(strategy):
+    _open(strategy, [('A', SignalType.LONG), ('B', SignalType.SHORT), ('C', SignalType.LONG)])
+
+    assert len(strategy._pos_arr) >= 3
+    assert [position.symbol for position in strategy._pos_list] == ['A', 'B', 'C']
+    assert list(strategy._pos_arr[:3]['dir']) == [1, -1, 1]
+    _assert_slots_aligned(strategy)
+
+
+def test_stop_loss_and_target_exits_for_both_sides(strategy):
+    _open(strategy, [('A', SignalType.LONG), ('B', SignalType.SHORT), ('C', SignalType.LONG),
+                     ('D', SignalType.SHORT), ('E', SignalType.LONG)])
+    strategy.fyers.prices.update(A=98.9, B=101.5, C=102.0, D=97.0, E=100.5)
+
+    asyncio.run(strategy._monitor_positions())
+
+    exits = {trade.symbol: trade.exit_reason for trade in strategy.completed_trades}
+    assert exits == {'A': "STOP_LOSS", 'B': "STOP_LOSS", 'C': "TARGET", 'D': "TARGET"}
+    assert [position.symbol for position in strategy._pos_list] == ['E']
+    _assert_slots_aligned(strategy)
+
+
+def test_time_exit_takes_precedence(strategy):
+    _open(strategy, [('A', SignalType.LONG)])
+    strategy._pos_list[0].entry_monotonic = strategy._pos_arr[0]['entry_mono'] = \
+        monotonic() - strategy._max_hold * 60
+    strategy.fyers.prices['A'] = 102.5  # also beyond target
+
+    asyncio.run(strategy._monitor_positions())
+
+    assert [trade.exit_reason for trade in strategy.completed_trades] == ["TIME_BASED"]
+    assert strategy._pos_list == []
+
+
+def test_levels_ignore_positions_without_a_fresh_quote(strategy):
+    _open(strategy, [('A', SignalType.LONG), ('B', SignalType.SHORT)])
+    strategy._pos_arr[0]['price'] = 50.0  # stale price far below the stop
+    strategy.fyers.prices['B'] = 100.5
+
+    asyncio.run(strategy._monitor_positions())
+
+    assert strategy.completed_trades == []
+    assert len(strategy._pos_list) == 2
+
+
+def test_breakeven_moves_stop_for_profitable_positions(strategy):
+    _open(strategy, [('A', SignalType.LONG), ('B', SignalType.SHORT), ('C', SignalType.LONG)])
+    held = monotonic() - strategy._be_after * 60
+    for i in range(3):
+        strategy._pos_list[i].entry_monotonic = strategy._pos_arr[i]['entry_mono'] = held
+    strategy.fyers.prices.update(A=101.0, B=99.5, C=99.5)
+
+    asyncio.run(strategy._monitor_positions())
+
+    moved = {position.symbol: position.moved_to_breakeven for position in strategy._pos_list}
+    assert moved == {'A': True, 'B': True, 'C': False}
+    assert list(strategy._pos_arr[:3]['breakeven']) == [True, True, False]
+    _assert_slots_aligned(strategy)
+
+
+def test_exit_keeps_remaining_slots_aligned(strategy):
+    _open(strategy, [('A', SignalType.LONG), ('B', SignalType.SHORT), ('C', SignalType.LONG)])
+
+    asyncio.run(strategy._exit_position(strategy._pos_list[0], "TEST"))
+
+    assert [position.symbol for position in strategy._pos_list] == ['C', 'B']
+    assert not strategy._has_position[strategy._symbol_index['A']]
+    assert strategy._has_position[strategy._symbol_index['C']]
+    _assert_slots_aligned(strategy)
+
+
+def test_premarket_collection_fills_gap_column(strategy):
+    strategy.fyers.prices.update(A=101.0, C=99.5)
+
+    asyncio.run(strategy._collect_premarket_data())
+
+    assert set(strategy.premarket_data) == {'A', 'C'}
+    idx = strategy._symbol_index
+    assert list(strategy._has_premarket) == [True, False, True, False, False]
+    assert strategy._gap_fx[idx['A']] == 10_000   # +1.00%
+    assert strategy._gap_fx[idx['C']] == -5_000   # -0.50%
+
@@ -0,0 +1,100 @@
+# tests/test_order_manager.py
+
+"""
+Unit tests for the column-wise order store, order-socket updates and bracket order placement
+"""
+
+import asyncio
+from datetime import datetime
+
+from config.settings import OrderSide, OrderType, TradingMode
+from services.order_manager import OrderManager, OrderStore, PLACED, FILLED, CANCELLED
+
+
+class FakeFyers:
+    """Fyers client stub: basket legs answered from a fixed list, cancels recorded"""
+
+    def __init__(self, leg_results):
+        self.leg_results = leg_results
+        self.cancelled = []
+
+    def place_basket_orders(self, data):
+        return {'s': 'ok', 'data': [{'body': body} for body in self.leg_results[:len(data)]]}
+
+    def cancel_order(self, data):
+        self.cancelled.append(data['id'])
+        return {'s': 'ok'}
+
+
+def _live_manager(leg_results) -> OrderManager:
+    manager = OrderManager(FakeFyers(leg_results))
+    manager.trading_mode = TradingMode.LIVE
+    return manager
+
+
+def test_order_store_grows_past_capacity():
+    store = OrderStore(capacity=2)
+    now = datetime(2024, 1, 1, 9, 16)
+
+    for i in range(5):
+        store.append(f"ID{i}", "NSE:SBIN-EQ", OrderSide.BUY, 10 + i, OrderType.LIMIT, 100.0 + i, PLACED, now)
+
+    assert len(store) == 5
+    assert len(store.sides) >= 5
+    assert store.get("ID0")['quantity'] == 10
+    assert store.get("ID4") == {
+        'symbol': "NSE:SBIN-EQ",
+        'side': OrderSide.BUY,
+        'quantity': 14,
+        'order_type': OrderType.LIMIT,
+        'price': 104.0,
+        'status': 'PLACED',
+        'timestamp': now
+    }
+    assert store.ids_for_symbol("NSE:SBIN-EQ") == [f"ID{i}" for i in range(5)]
+
+
+def test_order_store_set_status():
+    store = OrderStore()
+    store.append("A", "NSE:TCS-EQ", OrderSide.SELL, 1, OrderType.MARKET, 0.0, PLACED, datetime.now())
+
+    assert store.set_status("A", FILLED)
+    assert store.get("A")['status'] == 'FILLED'
+    assert store.get("A")['side'] is OrderSide.SELL
+    assert not store.set_status("missing", CANCELLED)
+    assert store.get("missing") is None
+    assert "A" in store and "missing" not in store
+
+
+def test_order_update_sets_tracked_status():
+    manager = _live_manager([])
+    manager._record_order("A", "NSE:TCS-EQ", OrderSide.BUY, 1, OrderType.MARKET, 0.0)
+
+    manager._apply_order_update({'orders': {'id': "A", 'status': 2}})
+
+    assert manager.orders.get("A")['status'] == 'FILLED'
+    assert manager._orderbook_cache["A"]['status'] == 2
+
+
+def test_bracket_order_returns_entry_id():
+    manager = _live_manager([{'s': 'ok', 'id': "E"}, {'s': 'ok', 'id': "SL"}, {'s': 'ok', 'id': "T"}])
+
+    order_id = asyncio.run(manager.place_order("NSE:SBIN-EQ", OrderSide.BUY, 10, OrderType.LIMIT,
+                                               price=100.0, stop_loss=99.0, target=102.0))
+
+    assert order_id == "E"
+    assert manager.fyers.cancelled == []
+    assert manager.orders.get("SL")['order_type'] is OrderType.STOP_LOSS
+    assert manager.orders.get("T")['side'] is OrderSide.SELL
+
+
+def test_bracket_order_cancels_exit_legs_when_entry_fails():
+    manager = _live_manager([{'s': 'error', 'message': "rejected"}, {'s': 'ok', 'id': "SL"}, {'s': 'ok', 'id': "T"}])
+
+    order_id = asyncio.run(manager.place_order("NSE:SBIN-EQ", OrderSide.BUY, 10, OrderType.LIMIT,
+                                               price=100.0, stop_loss=99.0, target=102.0))
+
+    assert order_id is None
+    assert manager.fyers.cancelled == ["SL", "T"]
+    assert manager.orders.get("SL")['status'] == 'CANCELLED'
+    assert manager.orders.get("T")['status'] == 'CANCELLED'
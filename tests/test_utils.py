@@ -0,0 +1,104 @@
+# tests/test_utils.py
+
+"""
+Unit tests for the market status TTL cache, the API rate limiter and gap calculations
+"""
+
+import asyncio
+import time
+import warnings
+
+import numpy as np
+import pytest
+
+from utils import helpers
+from utils.rate_limiter import AsyncRateLimiter
+
+
+@pytest.fixture
+def market_status_calls(monkeypatch):
+    """Count _market_status computations with a controllable monotonic clock"""
+    calls = []
+    clock = [1000.0]
+
+    def fake_status():
+        calls.append(clock[0])
+        return True, "Market is open"
+
+    monkeypatch.setattr(helpers, '_market_status', fake_status)
+    monkeypatch.setattr(helpers, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(helpers, '_market_status_cache', None)
+    return calls, clock
+
+
+def test_is_market_open_reuses_status_within_ttl(market_status_calls):
+    calls, clock = market_status_calls
+
+    assert helpers.is_market_open() == (True, "Market is open")
+    clock[0] += helpers.MARKET_STATUS_TTL_SECONDS
+    helpers.is_market_open()
+
+    assert len(calls) == 1
+
+
+def test_is_market_open_recomputes_after_ttl(market_status_calls):
+    calls, clock = market_status_calls
+
+    helpers.is_market_open()
+    clock[0] += helpers.MARKET_STATUS_TTL_SECONDS + 0.01
+    helpers.is_market_open()
+
+    assert len(calls) == 2
+
+
+def test_rate_limiter_allows_initial_burst():
+    async def run():
+        limiter = AsyncRateLimiter(rate=5)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) < 0.1
+
+
+def test_rate_limiter_paces_calls_beyond_burst():
+    async def run():
+        limiter = AsyncRateLimiter(rate=20, capacity=1)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+        return time.monotonic() - start
+
+    # First call is immediate, the other four wait 1/20 s each
+    assert asyncio.run(run()) >= 0.19
+
+
+def test_rate_limiter_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        AsyncRateLimiter(rate=0)
+
+
+def test_gap_percent_vec_zero_closes_are_silent():
+    closes = np.array([0.0, 100.0, 0.0, 200.0])
+    opens = np.array([5.0, 102.0, 0.0, 190.0])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        gaps = helpers.calculate_gap_percent_vec(closes, opens)
+
+    np.testing.assert_allclose(gaps, [0.0, 2.0, 0.0, -5.0])
+
+
+def test_gap_percent_vec_compiled_path_matches_scalar():
+    pytest.importorskip('numba')
+    assert helpers.vectorize is not None
+
+    closes = np.array([0.0, 50.0, 125.5])
+    opens = np.array([1.0, 49.0, 130.0])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        gaps = helpers.calculate_gap_percent_vec(closes, opens)
+
+    expected = [helpers.calculate_gap_percent(c, o) for c, o in zip(closes, opens)]
+    np.testing.assert_allclose(gaps, expected)
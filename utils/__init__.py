@@ -1,20 +1,29 @@
 # utils/__init__.py
 
-from utils.logger import setup_logger, get_logger
+from utils.logger import setup_logger, get_logger, shutdown_logger
+from utils.rate_limiter import AsyncRateLimiter
 from utils.helpers import (
     is_market_open,
     get_current_ist_time,
     format_currency,
     calculate_position_size,
-    round_to_tick_size
+    calculate_position_size_batch,
+    calculate_gap_percent_vec,
+    round_to_tick_size,
+    round_to_tick_size_vec
 )
 
 __all__ = [
     'setup_logger',
     'get_logger',
+    'shutdown_logger',
     'is_market_open',
     'get_current_ist_time',
     'format_currency',
     'calculate_position_size',
-    'round_to_tick_size'
+    'calculate_position_size_batch',
+    'calculate_gap_percent_vec',
+    'round_to_tick_size',
+    'round_to_tick_size_vec',
+    'AsyncRateLimiter'
 ]
\ No newline at end of file
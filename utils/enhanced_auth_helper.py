@@ -5,6 +5,8 @@ Enhanced Fyers Authentication Helper for MFS Trading Strategy
 Provides comprehensive authentication with auto-refresh, PIN support, and error handling
 """
 
+import asyncio
+import base64
 import hashlib
 import requests
 import logging
@@ -13,7 +15,7 @@ import json
 import getpass
 import sys
 import time
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Callable
 
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,9 @@ logger = logging.getLogger(__name__)
 class FyersAuthManager:
     """Enhanced Fyers authentication manager with refresh token and PIN support"""
 
+    # Refresh this many seconds before the access token's JWT expiry
+    TOKEN_REFRESH_MARGIN_SECONDS = 60
+
     def __init__(self):
         self.client_id = os.environ.get('FYERS_CLIENT_ID')
         self.secret_key = os.environ.get('FYERS_SECRET_KEY')
@@ -29,6 +34,7 @@ class FyersAuthManager:
         self.refresh_token = os.environ.get('FYERS_REFRESH_TOKEN')
         self.access_token = os.environ.get('FYERS_ACCESS_TOKEN')
         self.pin = os.environ.get('FYERS_PIN')
+        self._token_expiry: Optional[float] = self.get_token_expiry(self.access_token)
 
         # API endpoints
         self.auth_url = "https://api-t1.fyers.in/api/v3/generate-authcode"
@@ -313,13 +319,25 @@ class FyersAuthManager:
             logger.error(f" Unexpected error during token exchange: {e}")
             return None, None
 
-    def generate_access_token_with_refresh(self, refresh_token: str) -> Tuple[Optional[str], Optional[str]]:
-        """Generate new access token using refresh token with PIN verification"""
+    def generate_access_token_with_refresh(self, refresh_token: str,
+                                           interactive: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Generate new access token using refresh token with PIN verification
+
+        With interactive=False (unattended refresh) a missing or rejected PIN is
+        logged and (None, None) returned instead of prompting on stdin.
+        """
         try:
             logger.info(" Refreshing access token using refresh token...")
 
             # Get PIN (from env or user input)
-            pin = self.get_or_request_pin()
+            if interactive:
+                pin = self.get_or_request_pin()
+            elif self.pin:
+                pin = self.pin
+            else:
+                logger.error(" No saved PIN, cannot refresh access token unattended")
+                return None, None
 
             headers = {"Content-Type": "application/json"}
 
@@ -346,6 +364,9 @@ class FyersAuthManager:
                 # Handle specific PIN-related errors
                 if 'pin' in error_msg.lower() or 'invalid pin' in error_msg.lower():
                     logger.error(f" PIN verification failed: {error_msg}")
+                    if not interactive:
+                        return None, None
+
                     print(f"\n PIN verification failed: {error_msg}")
                     print("The saved PIN might be incorrect.")
 
@@ -370,6 +391,80 @@ class FyersAuthManager:
             logger.error(f" Unexpected error while refreshing token: {e}")
             return None, None
 
+    @staticmethod
+    def get_token_expiry(access_token: Optional[str]) -> Optional[float]:
+        """Read the expiry (unix seconds) from the access token's JWT payload without a network call"""
+        if not access_token:
+            return None
+
+        try:
+            payload = access_token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return float(claims['exp'])
+
+        except Exception as e:
+            logger.debug(f"Could not read token expiry: {e}")
+            return None
+
+    def seconds_until_refresh(self) -> Optional[float]:
+        """Seconds left before the access token should be refreshed, None if expiry is unknown"""
+        if self._token_expiry is None:
+            return None
+        return self._token_expiry - self.TOKEN_REFRESH_MARGIN_SECONDS - time.time()
+
+    def _store_tokens(self, access_token: str, refresh_token: Optional[str] = None) -> bool:
+        """Persist tokens to .env and update the cached tokens and expiry; False if a save failed"""
+        saved = self.save_to_env('FYERS_ACCESS_TOKEN', access_token)
+        self.access_token = access_token
+        self._token_expiry = self.get_token_expiry(access_token)
+
+        if refresh_token:
+            saved = self.save_to_env('FYERS_REFRESH_TOKEN', refresh_token) and saved
+            self.refresh_token = refresh_token
+
+        return saved
+
+    def refresh_access_token(self) -> Optional[str]:
+        """Refresh the access token with the stored refresh token and persist the result (never prompts)"""
+        if not self.refresh_token:
+            logger.warning(" No refresh token available")
+            return None
+
+        new_access_token, new_refresh_token = self.generate_access_token_with_refresh(
+            self.refresh_token, interactive=False)
+        if not new_access_token:
+            logger.warning(" Failed to refresh access token")
+            return None
+
+        self._store_tokens(new_access_token, new_refresh_token)
+        return new_access_token
+
+    async def run_token_refresher(self, on_refresh: Callable[[str], None]):
+        """Refresh the access token shortly before it expires and hand the new token to on_refresh"""
+        while True:
+            delay = self.seconds_until_refresh()
+            if delay is None:
+                logger.warning(" Token expiry unknown, proactive refresh disabled")
+                return
+
+            await asyncio.sleep(max(delay, 0))
+
+            logger.info(" Access token nearing expiry, refreshing proactively...")
+            new_access_token = await asyncio.to_thread(self.refresh_access_token)
+            if not new_access_token:
+                logger.error(" Proactive token refresh failed")
+                return
+
+            try:
+                on_refresh(new_access_token)
+            except Exception as e:
+                logger.error(f" Error applying refreshed token: {e}")
+
+    def start_token_refresher(self, on_refresh: Callable[[str], None]) -> asyncio.Task:
+        """Start the proactive refresher on the running event loop"""
+        return asyncio.get_running_loop().create_task(self.run_token_refresher(on_refresh))
+
     def is_token_valid(self, access_token: str) -> bool:
         """Check if access token is still valid"""
         if not access_token or not self.client_id:
@@ -395,8 +490,15 @@ class FyersAuthManager:
     def get_valid_access_token(self) -> Optional[str]:
         """Get a valid access token, using refresh token if available"""
         try:
-            # First, check if current access token is still valid
-            if self.access_token and self.is_token_valid(self.access_token):
+            # Trust the token's own expiry when it is known, avoiding a profile round trip
+            remaining = self.seconds_until_refresh()
+            if self.access_token and remaining is not None:
+                if remaining > 0:
+                    logger.info(" Current access token is still valid")
+                    return self.access_token
+
+            # Otherwise check with the API if current access token is still valid
+            elif self.access_token and self.is_token_valid(self.access_token):
                 logger.info(" Current access token is still valid")
                 return self.access_token
 
@@ -411,13 +513,7 @@ class FyersAuthManager:
                     logger.info(" Successfully refreshed access token")
 
                     # Save new tokens
-                    self.save_to_env('FYERS_ACCESS_TOKEN', new_access_token)
-                    self.access_token = new_access_token
-
-                    if new_refresh_token:
-                        self.save_to_env('FYERS_REFRESH_TOKEN', new_refresh_token)
-                        self.refresh_token = new_refresh_token
-
+                    self._store_tokens(new_access_token, new_refresh_token)
                     return new_access_token
                 else:
                     logger.warning(" Failed to refresh access token")
@@ -493,15 +589,11 @@ class FyersAuthManager:
             # Save all tokens to .env
             print(f"\n Saving authentication data...")
 
-            saved_items = []
-            if self.save_to_env('FYERS_ACCESS_TOKEN', access_token):
-                saved_items.append("Access Token")
-
-            if refresh_token and self.save_to_env('FYERS_REFRESH_TOKEN', refresh_token):
-                saved_items.append("Refresh Token")
-
-            if saved_items:
-                print(f" Saved: {', '.join(saved_items)}")
+            # Also updates the cached tokens and expiry used by the token refresher
+            if self._store_tokens(access_token, refresh_token):
+                print(f" Saved: Access Token{', Refresh Token' if refresh_token else ''}")
+            else:
+                print(" Could not save tokens to .env file")
 
             # Verify the setup
             if self.is_token_valid(access_token):
@@ -657,6 +749,7 @@ def authenticate_fyers(config_dict: dict) -> bool:
         if access_token:
             # Update config with the valid token
             config_dict['fyers_config'].access_token = access_token
+            config_dict['auth_manager'] = auth_manager
             logger.info(" Fyers authentication successful")
             return True
         else:
@@ -5,14 +5,37 @@ Helper functions for MMFS strategy
 """
 
 from datetime import datetime, time
-import pytz
-from typing import Tuple
+from functools import lru_cache
+from time import monotonic
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+try:
+    from numba import vectorize
+except ImportError:
+    vectorize = None
+
+_IST = ZoneInfo('Asia/Kolkata')
+
+# Market hours: 9:15 AM to 3:30 PM IST, as minutes since midnight
+_OPEN_MIN = 9 * 60 + 15
+_CLOSE_MIN = 15 * 60 + 30
+
+# Bit n set = weekday n (Monday=0) is a weekend day
+_WEEKEND_MASK = 0b1100000
+
+# Market status only changes at minute boundaries; reuse the last answer briefly
+MARKET_STATUS_TTL_SECONDS = 1.0
+_market_status_cache: Optional[Tuple[float, Tuple[bool, str]]] = None
+
+_AMOUNT_FMT = "{:,.2f}".format
 
 
 def get_current_ist_time() -> datetime:
     """Get current time in IST"""
-    ist = pytz.timezone('Asia/Kolkata')
-    return datetime.now(ist)
+    return datetime.now(_IST)
 
 
 def is_market_open() -> Tuple[bool, str]:
@@ -22,20 +45,30 @@ def is_market_open() -> Tuple[bool, str]:
     Returns:
         Tuple of (is_open, reason)
     """
-    now = get_current_ist_time()
-    current_time = now.time()
+    global _market_status_cache
+
+    ts = monotonic()
+    cached = _market_status_cache
+    if cached is not None and ts - cached[0] <= MARKET_STATUS_TTL_SECONDS:
+        return cached[1]
+
+    result = _market_status()
+    _market_status_cache = (ts, result)
+    return result
+
+
+def _market_status() -> Tuple[bool, str]:
+    """Compute market status from the current IST time (field reads and int compares only)"""
+    now = datetime.now(_IST)
 
     # Check if weekend
-    if now.weekday() >= 5:  # Saturday or Sunday
+    if (_WEEKEND_MASK >> now.weekday()) & 1:  # Saturday or Sunday
         return False, "Market closed - Weekend"
 
-    # Market hours: 9:15 AM to 3:30 PM IST
-    market_open = time(9, 15)
-    market_close = time(15, 30)
-
-    if current_time < market_open:
+    cur_min = now.hour * 60 + now.minute
+    if cur_min < _OPEN_MIN:
         return False, "Market not yet open"
-    elif current_time > market_close:
+    elif cur_min >= _CLOSE_MIN:
         return False, "Market closed for the day"
     else:
         return True, "Market is open"
@@ -43,9 +76,8 @@ def is_market_open() -> Tuple[bool, str]:
 
 def format_currency(amount: float, currency: str = '₹') -> str:
     """Format currency with Indian numbering system"""
-    if amount < 0:
-        return f"-{currency}{abs(amount):,.2f}"
-    return f"{currency}{amount:,.2f}"
+    sign = "-" if amount < 0 else ""
+    return f"{sign}{currency}{_AMOUNT_FMT(abs(amount))}"
 
 
 def calculate_position_size(
@@ -76,11 +108,44 @@ def calculate_position_size(
     return position_size
 
 
+def calculate_position_size_batch(
+        portfolio_value,
+        risk_per_trade_pct,
+        entry_price,
+        stop_loss
+) -> np.ndarray:
+    """
+    Vectorized calculate_position_size over arrays of candidates
+
+    Args accept scalars or arrays and broadcast elementwise.
+
+    Returns:
+        int64 array of position sizes (0 where entry equals stop)
+    """
+    risk_amount = np.multiply(portfolio_value, np.divide(risk_per_trade_pct, 100), dtype=np.float64)
+    price_risk = np.abs(np.subtract(entry_price, stop_loss, dtype=np.float64))
+
+    sizes = np.zeros(np.broadcast(risk_amount, price_risk).shape, dtype=np.float64)
+    np.divide(risk_amount, price_risk, out=sizes, where=price_risk != 0)
+    return sizes.astype(np.int64)
+
+
 def round_to_tick_size(price: float, tick_size: float = 0.05) -> float:
     """Round price to tick size"""
     return round(price / tick_size) * tick_size
 
 
+if vectorize is not None:
+    @vectorize(['float64(float64, float64)'], cache=True)
+    def round_to_tick_size_vec(price, tick_size):
+        """Round an array of prices to tick size (compiled ufunc)"""
+        return round(price / tick_size) * tick_size
+else:
+    def round_to_tick_size_vec(price, tick_size):
+        """Round an array of prices to tick size"""
+        return np.round(np.divide(price, tick_size)) * tick_size
+
+
 def calculate_gap_percent(previous_close: float, current_open: float) -> float:
     """Calculate gap percentage"""
     if previous_close == 0:
@@ -88,18 +153,43 @@ def calculate_gap_percent(previous_close: float, current_open: float) -> float:
     return ((current_open - previous_close) / previous_close) * 100
 
 
+if vectorize is not None:
+    @vectorize(['float64(float64, float64)'], cache=True)
+    def _gap_percent_ufunc(previous_close, current_open):
+        """Gap percentage for one close/open pair (compiled ufunc)"""
+        if previous_close == 0.0:
+            return 0.0
+        return (current_open - previous_close) / previous_close * 100.0
+
+    def calculate_gap_percent_vec(previous_close, current_open):
+        """Gap percentage over arrays of closes/opens (0.0 where previous close is 0)"""
+        # The compiled loop evaluates the division for zero closes before selecting 0.0,
+        # so silence those FP flags as the NumPy fallback's where= mask does
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _gap_percent_ufunc(previous_close, current_open)
+else:
+    def calculate_gap_percent_vec(previous_close, current_open):
+        """Gap percentage over arrays of closes/opens (0.0 where previous close is 0)"""
+        previous_close = np.asarray(previous_close, dtype=np.float64)
+        change = np.subtract(current_open, previous_close, dtype=np.float64)
+
+        gaps = np.zeros(np.broadcast(change, previous_close).shape, dtype=np.float64)
+        np.divide(change, previous_close, out=gaps, where=previous_close != 0)
+        return gaps * 100.0
+
+
+@lru_cache(maxsize=4096)
 def format_time_duration(seconds: int) -> str:
-    """Format seconds into readable duration"""
+    """Format seconds into readable duration (memoized, report durations repeat)"""
     if seconds < 60:
         return f"{seconds}s"
-    elif seconds < 3600:
-        minutes = seconds // 60
-        secs = seconds % 60
+
+    minutes, secs = divmod(seconds, 60)
+    if minutes < 60:
         return f"{minutes}m {secs}s"
-    else:
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        return f"{hours}h {minutes}m"
+
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
 
 
 def is_within_execution_window(
@@ -126,6 +216,17 @@ def calculate_risk_reward_ratio(entry: float, stop: float, target: float) -> flo
     return reward / risk
 
 
+def calculate_risk_reward_ratio_batch(entry, stop, target) -> np.ndarray:
+    """Vectorized calculate_risk_reward_ratio (0.0 where entry equals stop)"""
+    entry = np.asarray(entry, dtype=np.float64)
+    risk = np.abs(entry - np.asarray(stop, dtype=np.float64))
+    reward = np.abs(np.asarray(target, dtype=np.float64) - entry)
+
+    ratios = np.zeros(np.broadcast(risk, reward).shape, dtype=np.float64)
+    np.divide(reward, risk, out=ratios, where=risk != 0)
+    return ratios
+
+
 if __name__ == "__main__":
     print("Helper Functions Test")
     print("=" * 60)
@@ -159,4 +260,12 @@ if __name__ == "__main__":
     rr = calculate_risk_reward_ratio(entry, stop, target)
     print(f"\nRisk-Reward Ratio: 1:{rr:.2f}")
 
+    # Test batch variants
+    entries = np.array([21500, 1500, 250])
+    stops = np.array([21450, 1500, 248])
+    print(f"\nBatch Position Sizes: {calculate_position_size_batch(portfolio, risk_pct, entries, stops)}")
+    print(f"Batch Risk-Reward: {calculate_risk_reward_ratio_batch(entries, stops, entries + 5)}")
+    print(f"Batch Gap %: {calculate_gap_percent_vec(np.array([100.0, 0.0, 250.0]), np.array([101.5, 10.0, 245.0]))}")
+    print(f"Batch Tick Rounding: {round_to_tick_size_vec(np.array([101.02, 99.98, 250.13]), 0.05)}")
+
     print("\n" + "=" * 60)
\ No newline at end of file
@@ -0,0 +1,36 @@
+# utils/json_utils.py
+
+"""
+JSON helpers backed by orjson when it is installed, standard json otherwise
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes (datetimes as ISO strings)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=lambda o: o.isoformat() if hasattr(o, 'isoformat') else str(o)).encode('utf-8')
+
+
+if __name__ == "__main__":
+    from datetime import datetime
+
+    print(f"orjson available: {orjson is not None}")
+    payload = json_dumps({'symbol': 'NSE:SBIN-EQ', 'ltp': 812.5, 'timestamp': datetime.now()})
+    print(payload)
+    print(json_loads(payload))
@@ -4,17 +4,43 @@
 Logging configuration for MMFS strategy
 """
 
+import atexit
 import logging
+import queue
 import sys
-from datetime import datetime
+from datetime import date
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict
 from config.settings import LogConfig, TradingConfig
 
+# Resolved once per process
+_LEVEL = getattr(logging, TradingConfig.LOG_LEVEL)
+
+_CONSOLE_FMT = logging.Formatter(
+    '%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%H:%M:%S'
+)
+
+# Applied by the file handler on the QueueListener thread; QueueHandler.prepare()
+# still merges the message arguments on the logging caller's thread
+_FILE_FMT = logging.Formatter(LogConfig.LOG_FORMAT, datefmt=LogConfig.LOG_DATE_FORMAT)
+
+_LOG_DIR = Path(LogConfig.LOG_DIR)
+
+# Background listeners that own the real handlers, one per configured logger
+_listeners: Dict[str, QueueListener] = {}
+
 
 def setup_logger(name: str = 'mmfs', log_to_file: bool = True):
     """
     Setup logger with console and file handlers
 
+    Records are put on a queue by the logger and written by a background
+    QueueListener, so callers never block on I/O (the caller still merges
+    message arguments; timestamps and layout are formatted by the listener).
+
     Args:
         name: Logger name
         log_to_file: Whether to log to file
@@ -24,45 +50,66 @@ def setup_logger(name: str = 'mmfs', log_to_file: bool = True):
     """
     # Create logger
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, TradingConfig.LOG_LEVEL))
 
-    # Remove existing handlers
-    logger.handlers = []
+    # Already set up: skip rebuilding handlers and touching the filesystem
+    if logger.handlers:
+        return logger
 
-    # Create formatters
-    console_formatter = logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%H:%M:%S'
-    )
+    # No handler here formats thread/process fields; skip collecting them per record
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    logger.setLevel(_LEVEL)
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    console_handler.setFormatter(_CONSOLE_FMT)
+    handlers = [console_handler]
 
     # File handler
     if log_to_file or TradingConfig.LOG_TO_FILE:
-        # Create logs directory if it doesn't exist
-        log_dir = Path(LogConfig.LOG_DIR)
-        log_dir.mkdir(exist_ok=True)
+        log_file = _log_file_for(date.today())
 
-        # Create log file with date
-        log_file = log_dir / f"{LogConfig.LOG_FILE_PREFIX}_{datetime.now().strftime('%Y%m%d')}.log"
-
-        file_handler = logging.FileHandler(log_file)
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=LogConfig.LOG_MAX_BYTES,
+            backupCount=LogConfig.LOG_BACKUP_COUNT
+        )
         file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(_FILE_FMT)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
 
     return logger
 
 
+@lru_cache(maxsize=1)
+def _log_file_for(day: date) -> Path:
+    """Dated log file path; creates the logs directory on first use each day"""
+    _LOG_DIR.mkdir(exist_ok=True)
+    return _LOG_DIR / f"{LogConfig.LOG_FILE_PREFIX}_{day:%Y%m%d}.log"
+
+
+def shutdown_logger():
+    """Drain queued records and flush handlers of every logger set up here"""
+    while _listeners:
+        _, listener = _listeners.popitem()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+atexit.register(shutdown_logger)
+
+
 def get_logger(name: str):
     """Get logger by name"""
     return logging.getLogger(name)
@@ -76,5 +123,6 @@ if __name__ == "__main__":
     logger.info("Info message")
     logger.warning("Warning message")
     logger.error("Error message")
+    shutdown_logger()
 
     print("\n Logger test complete. Check logs/ directory for log file.")
\ No newline at end of file
@@ -0,0 +1,45 @@
+# utils/rate_limiter.py
+
+"""
+Async token-bucket rate limiter
+Caps how many broker API calls start per second
+"""
+
+import asyncio
+from time import monotonic
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """Token bucket: `rate` calls per second, bursting up to `capacity`"""
+
+    __slots__ = ('rate', 'capacity', '_tokens', '_updated', '_lock')
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it (waiters are served in order)"""
+        async with self._lock:
+            self._refill(monotonic())
+            while self._tokens < 1.0:
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+                self._refill(monotonic())
+            self._tokens -= 1.0
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False